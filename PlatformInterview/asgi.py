@@ -13,4 +13,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PlatformInterview.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from platform_app.uploads import ASGIRequestSizeLimit  # noqa: E402 (needs the app registry set up above)
+
+application = ASGIRequestSizeLimit(django_application)
@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -28,6 +30,8 @@ DEBUG = True
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS','').split(',')
 
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS','').split(',')
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'if-none-match')
+CORS_EXPOSE_HEADERS = ['ETag', 'Idempotent-Replayed', 'Retry-After']
 
 CSRF_TRUSTED_ORIGINS = os.getenv('CSRF_TRUSTED_ORIGINS', '').split(',')
 
@@ -63,7 +67,7 @@ SITE_ID = 1
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'platform_app.authentication.ActivityTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -85,7 +89,10 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'Netrika Gemink',
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
-
+    # Several serializers expose an interview `status`; give its choices one stable name.
+    'ENUM_NAME_OVERRIDES': {
+        'InterviewStatusEnum': 'platform_app.models.Interviews.StatusField',
+    },
 }
 
 SOCIALACCOUNT_EMAIL_VERIFICATION = 'none'
@@ -109,6 +116,7 @@ SOCIALACCOUNT_PROVIDERS = {
 }
 
 MIDDLEWARE = [
+    'platform_app.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -118,6 +126,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    # Below CorsMiddleware, so browsers can read the 413s it answers cross-origin uploads with.
+    'platform_app.uploads.UploadSizeLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'PlatformInterview.urls'
@@ -139,6 +149,56 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'PlatformInterview.wsgi.application'
 
+# 'wsgi' (sync gunicorn workers) or 'asgi' (uvicorn workers with async n8n-bound views), see gunicorn.conf.py
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+
+# Result readiness server-sent events (ASGI only): how often each process checks the readiness flag of a
+# watched interview, how often idle streams send a keep-alive, and how long a stream stays open (seconds).
+RESULT_EVENTS_POLL_SECONDS = float(os.getenv('RESULT_EVENTS_POLL_SECONDS', 1))
+RESULT_EVENTS_KEEPALIVE = float(os.getenv('RESULT_EVENTS_KEEPALIVE', 15))
+RESULT_EVENTS_TIMEOUT = float(os.getenv('RESULT_EVENTS_TIMEOUT', 300))
+
+# Responses to POSTs sent with an Idempotency-Key header are replayed for repeats of the key within the TTL.
+# A duplicate sent while the first request runs (for at most the lock time, longer than the slowest n8n call)
+# checks every IDEMPOTENCY_POLL_SECONDS whether it has finished and replays its response; after
+# IDEMPOTENCY_WAIT_SECONDS it gets a 409 asking it to retry after IDEMPOTENCY_RETRY_AFTER seconds instead.
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', 24 * 60 * 60))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_SECONDS', 120))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', 10))
+IDEMPOTENCY_POLL_SECONDS = float(os.getenv('IDEMPOTENCY_POLL_SECONDS', 0.25))
+IDEMPOTENCY_RETRY_AFTER = int(os.getenv('IDEMPOTENCY_RETRY_AFTER', 2))
+
+# Once result analysis is started for an interview, further triggers within this many seconds attach to
+# that run instead of starting another one (unless the start failed).
+RESULT_GENERATION_LOCK_SECONDS = int(os.getenv('RESULT_GENERATION_LOCK_SECONDS', 10 * 60))
+
+# Cached get-result snapshots of completed interviews (seconds); they are rebuilt on the next view after expiry.
+RESULT_SNAPSHOT_TTL = int(os.getenv('RESULT_SNAPSHOT_TTL', 30 * 24 * 60 * 60))
+
+# Cached slot availability per date (seconds). Bookings made through the app refresh it right away; run
+# `rebuild_slot_availability` periodically for interviews booked or cancelled elsewhere.
+SLOT_AVAILABILITY_CACHE_TTL = int(os.getenv('SLOT_AVAILABILITY_CACHE_TTL', 60 * 60))
+# Longest window (days) the availability calendar returns in one request.
+AVAILABILITY_CALENDAR_MAX_DAYS = int(os.getenv('AVAILABILITY_CALENDAR_MAX_DAYS', 62))
+# Seconds a seat stays held for a booking while n8n books it. Keep it above the screener endpoint's connect +
+# read timeout; holds of bookings that never finish (e.g. a killed worker) are given back after it.
+SLOT_HOLD_SECONDS = int(os.getenv('SLOT_HOLD_SECONDS', 180))
+
+# Rows read per query by the streaming admin CSV / NDJSON exports.
+ADMIN_EXPORT_BATCH_SIZE = int(os.getenv('ADMIN_EXPORT_BATCH_SIZE', 2000))
+
+# Daily rollups of the dashboard metrics: the dashboard aggregates today live once its row is older than this many
+# seconds, and `rollup_daily_metrics` recounts this many past days on every run to pick up late transaction updates.
+DAILY_METRICS_MAX_AGE = int(os.getenv('DAILY_METRICS_MAX_AGE', 5 * 60))
+DAILY_METRICS_LOOKBACK_DAYS = int(os.getenv('DAILY_METRICS_LOOKBACK_DAYS', 3))
+# Days the per-day active user sketches are kept (see platform_app/activity.py); windows reaching further back
+# count no users for the expired days.
+USER_ACTIVITY_RETENTION_DAYS = int(os.getenv('USER_ACTIVITY_RETENTION_DAYS', 400))
+# User growth series: closed periods are cached for this many seconds (then re-read from the daily rollups), and
+# longer series are downsampled to this many points.
+USER_GROWTH_CACHE_TTL = int(os.getenv('USER_GROWTH_CACHE_TTL', 24 * 60 * 60))
+USER_GROWTH_MAX_POINTS = int(os.getenv('USER_GROWTH_MAX_POINTS', 366))
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -153,6 +213,15 @@ DATABASES = {
     }
 }
 
+# SQLite (development and tests) takes its write lock when a transaction begins and waits for it,
+# so concurrent bookings queue up as they do on MySQL instead of failing. The test database is a
+# file rather than in memory so that the concurrency tests' threads share it.
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE', 'timeout': 30}
+    DATABASES['default']['TEST'] = {
+        'NAME': os.getenv('DATABASE_TEST_NAME', os.path.join(tempfile.gettempdir(), 'test_platform.sqlite3')),
+    }
+
 CACHES = {
     "default": {
         "BACKEND": os.getenv('REDIS_BACKEND'),
@@ -197,3 +266,109 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# File uploads. Uploads larger than FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to a temporary file, and
+# UploadSizeLimitHandler aborts an upload as soon as it exceeds its limit (in bytes). Under ASGI Django reads
+# (and spools) the whole body before the handlers run, so only UPLOAD_MAX_BATCH_REQUEST_SIZE is enforced while
+# the body is received there (by ASGIRequestSizeLimit in asgi.py); the other limits apply afterwards.
+
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('FILE_UPLOAD_MAX_MEMORY_SIZE', 256 * 1024))
+FILE_UPLOAD_HANDLERS = [
+    'platform_app.uploads.UploadSizeLimitHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+UPLOAD_MAX_REQUEST_SIZE = int(os.getenv('UPLOAD_MAX_REQUEST_SIZE', 25 * 1024 * 1024))
+UPLOAD_MAX_FILE_SIZE = int(os.getenv('UPLOAD_MAX_FILE_SIZE', 10 * 1024 * 1024))
+UPLOAD_MAX_CV_SIZE = int(os.getenv('UPLOAD_MAX_CV_SIZE', 10 * 1024 * 1024))
+UPLOAD_MAX_FILE_SIZES = {
+    'cv': UPLOAD_MAX_CV_SIZE,
+    'cvs': UPLOAD_MAX_CV_SIZE,
+    'image': int(os.getenv('UPLOAD_MAX_IMAGE_SIZE', 5 * 1024 * 1024)),
+    'images': int(os.getenv('UPLOAD_MAX_IMAGE_SIZE', 5 * 1024 * 1024)),
+}
+# Batch endpoints accept a larger request (and a zip `archive` of up to this size); files inside still
+# have to fit their own limit.
+UPLOAD_MAX_BATCH_REQUEST_SIZE = int(os.getenv('UPLOAD_MAX_BATCH_REQUEST_SIZE', 250 * 1024 * 1024))
+
+# Uploaded files (queued CV screening jobs)
+
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', BASE_DIR / 'media')
+MEDIA_URL = 'media/'
+
+# CV screening results are cached by upload content and workflow version; bump the version whenever
+# the n8n screening workflow changes. A TTL of 0 disables the cache.
+
+CV_SCREENING_WORKFLOW_VERSION = os.getenv('CV_SCREENING_WORKFLOW_VERSION', '1')
+CV_SCREENING_CACHE_TTL = int(os.getenv('CV_SCREENING_CACHE_TTL', 7 * 24 * 60 * 60))
+
+# CV screening job queue, processed by `manage.py process_cv_screening_jobs` (started next to gunicorn by
+# docker-entrypoint.sh unless CV_SCREENING_WORKER=0)
+
+CV_SCREENING_WORKERS = int(os.getenv('CV_SCREENING_WORKERS', 4))
+CV_SCREENING_JOB_MAX_ATTEMPTS = int(os.getenv('CV_SCREENING_JOB_MAX_ATTEMPTS', 3))
+CV_SCREENING_JOB_STALE_SECONDS = int(os.getenv('CV_SCREENING_JOB_STALE_SECONDS', 300))
+CV_SCREENING_JOB_POLL_SECONDS = float(os.getenv('CV_SCREENING_JOB_POLL_SECONDS', 2))
+
+# Batch CV screening: files screened at once per request and files accepted per request. Keep the
+# concurrency below the cv_screener `max_concurrency` in N8N_ENDPOINTS, or batches get turned away by it.
+
+CV_SCREENING_BATCH_CONCURRENCY = int(os.getenv('CV_SCREENING_BATCH_CONCURRENCY', 4))
+CV_SCREENING_BATCH_MAX_FILES = int(os.getenv('CV_SCREENING_BATCH_MAX_FILES', 200))
+
+# Prometheus metrics at /metrics. Scrapers send `Authorization: Bearer <METRICS_TOKEN>`; while it is unset the
+# metrics are only served to staff users.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# n8n webhooks. Every endpoint gets its own keep-alive connection pool, timeouts (in seconds) and a cap on
+# concurrent calls across all workers, e.g. N8N_SCREENER_URL, N8N_SCREENER_CONNECT_TIMEOUT,
+# N8N_SCREENER_READ_TIMEOUT, N8N_SCREENER_POOL_SIZE, N8N_SCREENER_MAX_CONCURRENCY.
+
+def _n8n_endpoint(name, read_timeout, pool_size=10, max_concurrency=10):
+    return {
+        'url': os.getenv(f'N8N_{name}_URL'),
+        'connect_timeout': float(os.getenv(f'N8N_{name}_CONNECT_TIMEOUT', 5)),
+        'read_timeout': float(os.getenv(f'N8N_{name}_READ_TIMEOUT', read_timeout)),
+        'pool_size': int(os.getenv(f'N8N_{name}_POOL_SIZE', pool_size)),
+        'max_concurrency': int(os.getenv(f'N8N_{name}_MAX_CONCURRENCY', max_concurrency)),
+    }
+
+
+N8N_ENDPOINTS = {
+    'screener': _n8n_endpoint('SCREENER', 60),
+    'result': _n8n_endpoint('RESULT', 30),
+    'cv_screener': _n8n_endpoint('CV_SCREENER', 90, max_concurrency=8),
+    # Single-frame camera workflow, used until N8N_CAMERA_ANALYSIS_BATCH_URL is set.
+    'camera_analysis': _n8n_endpoint('CAMERA_ANALYSIS', 15, max_concurrency=20),
+    'camera_analysis_batch': _n8n_endpoint('CAMERA_ANALYSIS_BATCH', 30, max_concurrency=20),
+}
+
+# Camera frames are buffered per interview and sent to the batch workflow once this many are waiting or the
+# oldest has waited this many seconds, by this many threads per worker process (see platform_app/camera.py).
+# A batch n8n doesn't take is sent again, up to this many attempts in all. The max age must be above 0. Frames
+# still buffered are lost when a worker is killed outright (SIGKILL, OOM).
+CAMERA_ANALYSIS_BATCH_SIZE = int(os.getenv('CAMERA_ANALYSIS_BATCH_SIZE', 10))
+CAMERA_ANALYSIS_BATCH_MAX_AGE = float(os.getenv('CAMERA_ANALYSIS_BATCH_MAX_AGE', 5))
+CAMERA_ANALYSIS_FLUSH_WORKERS = int(os.getenv('CAMERA_ANALYSIS_FLUSH_WORKERS', 4))
+CAMERA_ANALYSIS_MAX_ATTEMPTS = int(os.getenv('CAMERA_ANALYSIS_MAX_ATTEMPTS', 3))
+
+# Shared secret n8n sends in the X-N8N-Secret header when calling back into the API (e.g. with a finished result)
+N8N_WEBHOOK_SECRET = os.getenv('N8N_WEBHOOK_SECRET')
+
+# Circuit breaker shared by all n8n endpoints: this many failures within the window open it for the reset time.
+N8N_BREAKER_FAILURE_THRESHOLD = int(os.getenv('N8N_BREAKER_FAILURE_THRESHOLD', 5))
+N8N_BREAKER_WINDOW_SECONDS = int(os.getenv('N8N_BREAKER_WINDOW_SECONDS', 60))
+N8N_BREAKER_RESET_SECONDS = int(os.getenv('N8N_BREAKER_RESET_SECONDS', 30))
+
+# Application logs (e.g. camera frames that couldn't be delivered) go to stderr, next to gunicorn's own.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'platform_app': {'handlers': ['console'], 'level': os.getenv('APP_LOG_LEVEL', 'INFO')},
+        'admin_app': {'handlers': ['console'], 'level': os.getenv('APP_LOG_LEVEL', 'INFO')},
+    },
+}
@@ -0,0 +1,120 @@
+"""
+User growth series for the admin dashboard.
+
+Closed periods are summed from the new users of the complete daily rollups (see
+`admin_app.rollups`); the days without one, e.g. before `rollup_daily_metrics` first ran, are
+counted live. The closed periods are cached per granularity until a period closes or for
+`USER_GROWTH_CACHE_TTL`, which picks up rollups recounted since. Only the open (current) period is
+counted on every request, with a range scan of the `date_joined` index.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, DateField
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from platform_app import metrics
+
+from .models import DailyMetrics
+
+PERIODS = {
+    'daily': lambda field: TruncDate(field),
+    'weekly': lambda field: TruncWeek(field, output_field=DateField()),
+    'monthly': lambda field: TruncMonth(field, output_field=DateField()),
+}
+
+
+def period_start(period, day):
+    """The first day of the period `day` falls in (weeks start on Monday, as `TruncWeek` does)."""
+    if period == 'daily':
+        return day
+    if period == 'weekly':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _count_periods(period, first_day=None, last_day=None):
+    """`[(period start, new users), ...]` of the users who joined from `first_day` until before `last_day`."""
+    users = User.objects.all()
+    if first_day is not None:
+        users = users.filter(date_joined__gte=_day_start(first_day))
+    if last_day is not None:
+        users = users.filter(date_joined__lt=_day_start(last_day))
+    return [tuple(row) for row in users.annotate(period=PERIODS[period]('date_joined')).values('period')
+            .annotate(new_users=Count('id')).order_by('period').values_list('period', 'new_users')]
+
+
+def _uncovered_days(days, end):
+    """`(first day or None, day after the last)` of the runs of days before `end` that aren't in the sorted `days`."""
+    first = None
+    for day in days:
+        if first is None or day > first:
+            yield first, day
+        first = day + timedelta(days=1)
+    if first is None or first < end:
+        yield first, end
+
+
+def _closed_periods(period, open_start):
+    """`[(period start, new users), ...]` of every period before `open_start`, from cache or the rollups."""
+    key = f'user_growth_{period}'
+    cached = cache.get(key)
+    metrics.record_cache_lookup('user_growth', cached is not None and cached['open_start'] == open_start)
+    if cached is not None and cached['open_start'] == open_start:
+        return cached['periods']
+
+    rolled_up = DailyMetrics.objects.filter(complete=True, date__lt=open_start).order_by('date')
+    new_users = defaultdict(int)
+    days = []
+    for day, count in rolled_up.values_list('date', 'new_users'):
+        new_users[period_start(period, day)] += count
+        days.append(day)
+    for first_day, last_day in _uncovered_days(days, open_start):
+        for start, count in _count_periods(period, first_day, last_day):
+            new_users[start] += count
+    periods = sorted((start, count) for start, count in new_users.items() if count)
+    cache.set(key, {'open_start': open_start, 'periods': periods}, timeout=settings.USER_GROWTH_CACHE_TTL)
+    return periods
+
+
+def _downsample(points, max_points):
+    """Merges runs of consecutive points so at most `max_points` remain; each keeps its first period."""
+    size = math.ceil(len(points) / max_points)
+    if size <= 1:
+        return points
+    return [{
+        'period': points[i]['period'],
+        'new_users': sum(point['new_users'] for point in points[i:i + size]),
+        'total_users': points[min(i + size, len(points)) - 1]['total_users'],
+    } for i in range(0, len(points), size)]
+
+
+def get_user_growth(period, first_day=None, last_day=None):
+    """
+    New and total users per period from `first_day` to `last_day` (inclusive; both default to the
+    whole history), downsampled to at most `USER_GROWTH_MAX_POINTS` points. Periods without new
+    users are left out.
+    """
+    open_start = period_start(period, timezone.localdate())
+    periods = _closed_periods(period, open_start)
+    open_users = User.objects.filter(date_joined__gte=_day_start(open_start)).count()
+    if open_users:
+        periods = periods + [(open_start, open_users)]
+
+    first_period = period_start(period, first_day) if first_day else None
+    points = []
+    total_users = 0
+    for start, new_users in periods:
+        total_users += new_users
+        if (first_period is None or start >= first_period) and (last_day is None or start <= last_day):
+            points.append({'period': start, 'new_users': new_users, 'total_users': total_users})
+    return _downsample(points, settings.USER_GROWTH_MAX_POINTS)
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from admin_app.models import DailyMetrics
+from admin_app.rollups import live_metrics, pending_days, rollup_days
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}, expected YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = ("Rolls up the admin dashboard metrics per day. Without dates it recounts the days that are "
+            "still open; run it periodically (e.g. hourly). With --from it backfills a date range, and "
+            "with --check it compares the stored rollups with the live aggregates instead.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='from_date', type=parse_date,
+                            help='First date to roll up or check (YYYY-MM-DD).')
+        parser.add_argument('--to', dest='to_date', type=parse_date,
+                            help='Last date to roll up or check (YYYY-MM-DD); defaults to today.')
+        parser.add_argument('--check', action='store_true',
+                            help='Report rollups that differ from the live aggregates (last 30 days by default).')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        last_day = options['to_date'] or today
+        if options['check']:
+            self.check(options['from_date'] or last_day - timedelta(days=29), last_day)
+            return
+
+        if options['from_date']:
+            first_day = options['from_date']
+        else:
+            first_day, last_day = pending_days(today)
+        count = rollup_days(first_day, last_day)
+        self.stdout.write(self.style.SUCCESS(f"Rolled up the metrics of {count} days."))
+
+    def check(self, first_day, last_day):
+        rows = {row.date: row for row in DailyMetrics.objects.filter(date__range=(first_day, last_day))}
+        mismatches = []
+        day = first_day
+        while day <= last_day:
+            row = rows.get(day)
+            if row is None:
+                mismatches.append(f"{day}: no rollup")
+            else:
+                live = live_metrics(day)
+                if row.revenue != live['revenue']:
+                    mismatches.append(f"{day}: revenue {row.revenue} != {live['revenue']}")
+                if row.new_users != live['new_users']:
+                    mismatches.append(f"{day}: new users {row.new_users} != {live['new_users']}")
+                # Logins move on to later days, so a rollup may only count more users than `last_login` still shows.
+                if row.active_users < live['active_users']:
+                    mismatches.append(f"{day}: active users {row.active_users} < {live['active_users']}")
+            day += timedelta(days=1)
+
+        if mismatches:
+            raise CommandError("Rollups differing from the live aggregates:\n" + "\n".join(mismatches))
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollups of {(last_day - first_day).days + 1} days match the live aggregates."))
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0002_remove_subscriptions_user_remove_transactions_user_and_more'),
+        ('platform_app', '0028_cvscreeningjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscriptions',
+            index=models.Index(fields=['is_active', 'start_date'], name='subscription_active_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactions',
+            index=models.Index(fields=['status', 'created_at'], name='transaction_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0003_hot_table_indexes'),
+        ('platform_app', '0029_hot_table_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscriptions',
+            index=models.Index(fields=['package', 'start_date'], name='subscription_package_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscriptions',
+            index=models.Index(fields=['start_date'], name='subscription_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactions',
+            index=models.Index(fields=['package', 'created_at'], name='transaction_pkg_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactions',
+            index=models.Index(fields=['created_at'], name='transaction_created_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0004_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMetrics',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+                ('active_users', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('complete', models.BooleanField(default=False, help_text='Rolled up after the day ended')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Daily Metrics',
+                'verbose_name_plural': 'Daily Metrics',
+                'db_table': 'daily_metrics',
+            },
+        ),
+    ]
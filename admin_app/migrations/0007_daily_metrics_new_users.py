@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+def recount_existing_rows(apps, schema_editor):
+    # Rows rolled up before the column existed count no new users; the next `rollup_daily_metrics` run recounts
+    # every incomplete row, and the user growth series counts their days live until then.
+    apps.get_model('admin_app', 'DailyMetrics').objects.update(complete=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0006_user_date_joined_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailymetrics',
+            name='new_users',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(recount_existing_rows, migrations.RunPython.noop),
+    ]
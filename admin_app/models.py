@@ -28,6 +28,11 @@ class Subscriptions(models.Model):
         db_table = 'subscriptions'
         verbose_name = 'Subscription'
         verbose_name_plural = 'Subscriptions'
+        indexes = [
+            models.Index(fields=['is_active', 'start_date'], name='subscription_active_start_idx'),
+            models.Index(fields=['package', 'start_date'], name='subscription_package_start_idx'),
+            models.Index(fields=['start_date'], name='subscription_start_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user_profile.full_name}'s {self.package.name} Subscription"
@@ -51,6 +56,11 @@ class Transactions(models.Model):
         verbose_name = 'Transaction'
         verbose_name_plural = 'Transactions'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='transaction_status_created_idx'),
+            models.Index(fields=['package', 'created_at'], name='transaction_pkg_created_idx'),
+            models.Index(fields=['created_at'], name='transaction_created_idx'),
+        ]
 
     def __str__(self):
         return f"Transaction {self.transaction_id} - {self.status}"
@@ -65,4 +75,21 @@ class SystemSetting(models.Model):
         verbose_name_plural = 'System Settings'
 
     def __str__(self):
-        return self.key
\ No newline at end of file
+        return self.key
+
+class DailyMetrics(models.Model):
+    """One day of the admin dashboard metrics, rolled up by `admin_app.rollups`."""
+    date = models.DateField(primary_key=True)
+    active_users = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    new_users = models.PositiveIntegerField(default=0)
+    complete = models.BooleanField(default=False, help_text="Rolled up after the day ended")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'daily_metrics'
+        verbose_name = 'Daily Metrics'
+        verbose_name_plural = 'Daily Metrics'
+
+    def __str__(self):
+        return f"Metrics of {self.date}"
@@ -0,0 +1,22 @@
+from rest_framework.pagination import CursorPagination
+
+
+class AdminCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the admin tables that grow without bound: each page is an index range
+    scan from the cursor position, so deep pages cost the same as the first and no COUNT query
+    is run. `ordering` must lead with an indexed timestamp; filtered lists need a composite index
+    of the filter column and that timestamp. The id breaks ties between rows written within the same
+    instant (InnoDB secondary indexes end with the primary key, so it still reads in index order).
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class TransactionPagination(AdminCursorPagination):
+    ordering = ('-created_at', '-id')
+
+
+class SubscriptionPagination(AdminCursorPagination):
+    ordering = ('-start_date', '-id')
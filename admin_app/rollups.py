@@ -0,0 +1,137 @@
+"""
+Daily rollups of the admin dashboard metrics.
+
+`DailyMetrics` holds per day the active users (see `platform_app.activity`), the revenue of
+successful transactions and the users who joined, so the dashboard and the user growth series (see
+`admin_app.growth`) read a few rows instead of aggregating `auth_user` and `transactions` on every
+load. Only `rollup_daily_metrics` writes rows: it recounts the days that are still open (run it e.g.
+hourly), backfills everything since the first user joined on its first run, and backfills or checks
+date ranges.
+The dashboard never writes; days without a row, and today's once older than
+`DAILY_METRICS_MAX_AGE`, are aggregated live with a few grouped queries instead.
+
+A day's row is complete once it was rolled up after the day ended. Past days are recounted for
+`DAILY_METRICS_LOOKBACK_DAYS` anyway, as transactions may succeed after the day they were made.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from platform_app.activity import count_active_users
+
+from .models import DailyMetrics, Transactions
+
+
+def day_bounds(day):
+    """The aware datetimes the day starts and ends at, in the current time zone."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def _per_day(queryset, field, aggregate):
+    """`{day: aggregate}` of the queryset's rows grouped by the local date of `field`."""
+    return dict(queryset.annotate(day=TruncDate(field)).values('day').annotate(value=aggregate)
+                .values_list('day', 'value'))
+
+
+def live_rows(first_day, last_day):
+    """
+    Unsaved rows of every day from `first_day` to `last_day` (inclusive), aggregated from the
+    source tables with three grouped queries however many days there are.
+    """
+    start, end = day_bounds(first_day)[0], day_bounds(last_day)[1]
+    revenue = _per_day(Transactions.objects.filter(
+        status=Transactions.Status.SUCCESS, created_at__gte=start, created_at__lt=end,
+    ), 'created_at', Sum('amount'))
+    logins = _per_day(User.objects.filter(last_login__gte=start, last_login__lt=end), 'last_login', Count('id'))
+    joined = _per_day(User.objects.filter(date_joined__gte=start, date_joined__lt=end), 'date_joined', Count('id'))
+
+    rows = {}
+    day = first_day
+    while day <= last_day:
+        rows[day] = DailyMetrics(
+            date=day,
+            # Days from before activity was recorded have no sketch; `last_login` still shows some of their users.
+            active_users=max(count_active_users(day, day), logins.get(day, 0)),
+            revenue=revenue.get(day) or 0,
+            new_users=joined.get(day, 0),
+        )
+        day += timedelta(days=1)
+    return rows
+
+
+def live_metrics(day):
+    """Aggregates the metrics of a day from the source tables."""
+    row = live_rows(day, day)[day]
+    return {'active_users': row.active_users, 'revenue': row.revenue, 'new_users': row.new_users}
+
+
+def _store(live, counted_at):
+    """Stores a row of `live_rows` counted at `counted_at` and returns it."""
+    with transaction.atomic():
+        row = DailyMetrics.objects.select_for_update().filter(date=live.date).first()
+        values = {'active_users': live.active_users, 'revenue': live.revenue, 'new_users': live.new_users}
+        # `last_login` only keeps a user's latest login, so a day's count can only drop once the day is
+        # over (its users log in again later); the highest count seen is the closest to the true one.
+        if row is not None:
+            values['active_users'] = max(values['active_users'], row.active_users)
+        values['complete'] = counted_at >= day_bounds(live.date)[1]
+        row, _ = DailyMetrics.objects.update_or_create(date=live.date, defaults=values)
+    return row
+
+
+def rollup_days(first_day, last_day):
+    """
+    Recounts every day from `first_day` to `last_day` (inclusive); returns how many. The days are
+    aggregated together, so a backfill of years scans `auth_user` once rather than once a day.
+    """
+    counted_at = timezone.now()
+    rows = live_rows(first_day, last_day) if last_day >= first_day else {}
+    for live in rows.values():
+        _store(live, counted_at)
+    return len(rows)
+
+
+def pending_days(today):
+    """
+    The first and last day an incremental run recounts: from the earliest incomplete day (or the
+    day after the latest row) but at least `DAILY_METRICS_LOOKBACK_DAYS` back, through today. The
+    first run, with no rows yet, starts at the first day of last month, as the dashboard reads. Any
+    run also backfills the days since the first user joined that come before the first row, as the
+    user growth series reads them.
+    """
+    bounds = DailyMetrics.objects.aggregate(
+        first_incomplete=Min('date', filter=Q(complete=False)), first=Min('date'), last=Max('date'),
+    )
+    first_day = today - timedelta(days=settings.DAILY_METRICS_LOOKBACK_DAYS)
+    if bounds['last'] is not None:
+        first_day = min(first_day, bounds['last'] + timedelta(days=1))
+    else:
+        first_day = min(first_day, (today.replace(day=1) - timedelta(days=1)).replace(day=1))
+    first_joined = User.objects.aggregate(first=Min('date_joined'))['first']
+    if first_joined is not None and timezone.localdate(first_joined) < (bounds['first'] or today):
+        first_day = min(first_day, timezone.localdate(first_joined))
+    if bounds['first_incomplete'] is not None:
+        first_day = min(first_day, bounds['first_incomplete'])
+    return first_day, today
+
+
+def get_daily_metrics(first_day, last_day):
+    """
+    The rows of `first_day` to `last_day` by date, for the dashboard. Read-only: missing days, and
+    incomplete ones (today's) once older than `DAILY_METRICS_MAX_AGE`, are aggregated live and not
+    stored; `rollup_daily_metrics` stores them.
+    """
+    rows = {row.date: row for row in DailyMetrics.objects.filter(date__range=(first_day, last_day))}
+    stale_before = timezone.now() - timedelta(seconds=settings.DAILY_METRICS_MAX_AGE)
+    outdated = [day for day in (first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1))
+                if day not in rows or (not rows[day].complete and rows[day].updated_at < stale_before)]
+    if outdated:
+        live = live_rows(outdated[0], outdated[-1])
+        rows.update((day, live[day]) for day in outdated)
+    return rows
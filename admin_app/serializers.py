@@ -56,6 +56,8 @@ class SystemSettingSerializer(serializers.ModelSerializer):
 class DashboardMetricsSerializer(serializers.Serializer):
     daily_active_users = serializers.IntegerField()
     dau_percentage_change = serializers.FloatField()
+    weekly_active_users = serializers.IntegerField()
+    monthly_active_users = serializers.IntegerField()
     monthly_revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
     revenue_percentage_change = serializers.FloatField()
     active_subscriptions = serializers.IntegerField()
@@ -76,3 +78,9 @@ class PackageDistributionSerializer(serializers.Serializer):
 class UserDemographicsSerializer(serializers.Serializer):
     group = serializers.CharField()
     count = serializers.IntegerField()
+
+
+class CVScreeningCacheStatsSerializer(serializers.Serializer):
+    hits = serializers.IntegerField()
+    misses = serializers.IntegerField()
+    hit_ratio = serializers.FloatField()
@@ -1,3 +1,223 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from collections import Counter
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from platform_app.models import UserProfiles
+
+from .growth import period_start
+from .models import DailyMetrics, Packages, Subscriptions, Transactions
+from .rollups import day_bounds
+
+
+class AdminTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='secret', is_staff=True)
+        cls.profile = UserProfiles.objects.create(user=User.objects.create_user('candidate', password='secret'))
+        cls.package = Packages.objects.create(name='Pro', price=10)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+
+class CursorPaginationTests(AdminTestCase):
+
+    def fetch_all(self, url):
+        ids = []
+        while url:
+            with self.assertNumQueries(1):
+                page = self.client.get(url).json()
+            ids.extend(row['id'] for row in page['results'])
+            url = page['next']
+        return ids
+
+    def test_rows_written_in_the_same_instant_are_all_listed_once(self):
+        created_at = timezone.now()
+        transactions = Transactions.objects.bulk_create(
+            Transactions(user_profile=self.profile, package=self.package, amount=10, transaction_id=f'tx-{i}')
+            for i in range(7)
+        )
+        Transactions.objects.update(created_at=created_at)
+        subscriptions = Subscriptions.objects.bulk_create(
+            Subscriptions(user_profile=self.profile, package=self.package) for _ in range(7)
+        )
+        Subscriptions.objects.update(start_date=created_at)
+
+        for url, rows in (('/api/admin/transactions/', transactions), ('/api/admin/subscriptions/', subscriptions)):
+            with self.subTest(url=url):
+                expected = sorted((row.pk for row in rows), reverse=True)
+                self.assertEqual(self.fetch_all(f'{url}?page_size=2'), expected)
+                self.assertEqual(self.fetch_all(f'{url}?page_size=3'), expected)
+
+
+@override_settings(ADMIN_EXPORT_BATCH_SIZE=5)
+class ExportTests(AdminTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # 23 rows over 8 timestamps, so batch boundaries fall inside runs of equal timestamps.
+        start = timezone.now()
+        for i in range(23):
+            transaction = Transactions.objects.create(
+                user_profile=cls.profile, package=cls.package, amount=i, transaction_id=f'tx-{i}',
+                status=Transactions.Status.SUCCESS if i % 3 else Transactions.Status.FAILED,
+            )
+            Transactions.objects.filter(pk=transaction.pk).update(created_at=start - timedelta(minutes=i // 3))
+        cls.transactions = sorted(Transactions.objects.all(), key=lambda row: (row.created_at, row.pk), reverse=True)
+
+    def export(self, query):
+        response = self.client.get(f'/api/admin/transactions/export/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_spans_batches_in_order(self):
+        # One query per batch of 5, and one more that finds nothing after the last row.
+        with self.assertNumQueries(6):
+            rows = list(csv.DictReader(io.StringIO(self.export('output=csv'))))
+        self.assertEqual([int(row['id']) for row in rows], [row.pk for row in self.transactions])
+
+    def test_ndjson_export_spans_batches_in_order(self):
+        rows = [json.loads(line) for line in self.export('output=ndjson').splitlines()]
+        self.assertEqual([row['id'] for row in rows], [row.pk for row in self.transactions])
+        self.assertEqual(rows[0]['package_name'], 'Pro')
+
+    def test_filtered_export(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('output=csv&status=Failed'))))
+        self.assertEqual([int(row['id']) for row in rows],
+                         [row.pk for row in self.transactions if row.status == Transactions.Status.FAILED])
+
+    def test_unknown_format_is_refused(self):
+        self.assertEqual(self.client.get('/api/admin/transactions/export/?output=xml').status_code, 400)
+
+
+class DashboardMetricsTests(AdminTestCase):
+    url = '/api/admin/dashboard/metrics/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        today = timezone.localdate()
+        cls.start_of_this_month = day_bounds(today.replace(day=1))[0]
+        cls.last_month = cls.start_of_this_month - timedelta(days=20)
+
+        def dated(model, field, when, **fields):
+            row = model.objects.create(**fields)
+            model.objects.filter(pk=row.pk).update(**{field: when})
+
+        for when, is_active in ((cls.last_month, True), (cls.last_month, False), (cls.start_of_this_month, True)):
+            dated(Subscriptions, 'start_date', when, user_profile=cls.profile, package=cls.package, is_active=is_active)
+        for i, (when, amount) in enumerate(((cls.last_month, 40), (cls.start_of_this_month, 30),
+                                            (cls.start_of_this_month, 30))):
+            dated(Transactions, 'created_at', when, user_profile=cls.profile, package=cls.package, amount=amount,
+                  transaction_id=f'tx-{i}', status=Transactions.Status.SUCCESS)
+
+    def assertMetrics(self, metrics):
+        self.assertEqual(float(metrics['monthly_revenue']), 60)
+        self.assertEqual(metrics['revenue_percentage_change'], 50)
+        # Active now: the ones started last month and this month; active at the start of the month: one.
+        self.assertEqual(metrics['active_subscriptions'], 2)
+        self.assertEqual(metrics['subscriptions_percentage_change'], 100)
+
+    def test_cold_load_aggregates_live_without_writing(self):
+        # The stored rows, three grouped live aggregates, and the subscriptions.
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertMetrics(response.json())
+        self.assertFalse(DailyMetrics.objects.exists())
+
+    def test_first_rollup_backfills_what_the_dashboard_reads(self):
+        call_command('rollup_daily_metrics', stdout=io.StringIO())
+
+        self.assertEqual(DailyMetrics.objects.order_by('date').first().date,
+                         (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=1))
+        with self.assertNumQueries(2):
+            self.assertMetrics(self.client.get(self.url).json())
+        call_command('rollup_daily_metrics', '--check', stdout=io.StringIO())
+
+    def test_stale_today_is_aggregated_live(self):
+        call_command('rollup_daily_metrics', stdout=io.StringIO())
+        stored = DailyMetrics.objects.filter(date=timezone.localdate())
+        stored.update(updated_at=timezone.now() - timedelta(hours=1))
+        revenue = stored.get().revenue
+        Transactions.objects.create(user_profile=self.profile, package=self.package, amount=10, transaction_id='tx-new',
+                                    status=Transactions.Status.SUCCESS)
+
+        self.assertEqual(float(self.client.get(self.url).json()['monthly_revenue']), 70)
+        self.assertEqual(stored.get().revenue, revenue)
+
+
+class UserGrowthTests(AdminTestCase):
+    url = '/api/admin/dashboard/user-growth/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        today = timezone.localdate()
+        for i, days_ago in enumerate((400, 45, 45, 10, 1)):
+            user = User.objects.create_user(f'joined{i}')
+            User.objects.filter(pk=user.pk).update(
+                date_joined=day_bounds(today - timedelta(days=days_ago))[0] + timedelta(hours=12))
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def series(self, period='monthly'):
+        return self.client.get(self.url, {'period': period}).json()
+
+    def expected(self, period='monthly'):
+        new_users = Counter(period_start(period, timezone.localdate(user.date_joined)) for user in User.objects.all())
+        total_users = 0
+        points = []
+        for start in sorted(new_users):
+            total_users += new_users[start]
+            points.append({'period': start.isoformat(), 'new_users': new_users[start], 'total_users': total_users})
+        return points
+
+    def test_series_from_rollups_matches_the_users(self):
+        for period in ('daily', 'weekly', 'monthly'):
+            with self.subTest(period=period, rollups=False):
+                self.assertEqual(self.series(period), self.expected(period))
+
+        call_command('rollup_daily_metrics', stdout=io.StringIO())
+        self.assertEqual(DailyMetrics.objects.order_by('date').first().date, timezone.localdate() - timedelta(days=400))
+        # A day without its rollup is counted live.
+        DailyMetrics.objects.filter(date=timezone.localdate() - timedelta(days=45)).delete()
+        for period in ('daily', 'weekly', 'monthly'):
+            with self.subTest(period=period, rollups=True):
+                cache.clear()
+                self.assertEqual(self.series(period), self.expected(period))
+
+    def test_closed_periods_are_served_from_cache(self):
+        call_command('rollup_daily_metrics', stdout=io.StringIO())
+        # The rollups, the users before them and the open period.
+        with self.assertNumQueries(3):
+            series = self.series()
+        self.assertEqual(series, self.expected())
+
+        User.objects.filter(username='joined0').delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.series(), series)
+
+    def test_open_period_counts_new_users(self):
+        series = self.series()
+        User.objects.create_user('newcomer')
+
+        with self.assertNumQueries(1):
+            latest = self.series()[-1]
+        self.assertEqual(latest['period'], period_start('monthly', timezone.localdate()).isoformat())
+        self.assertEqual((latest['new_users'], latest['total_users']),
+                         (series[-1]['new_users'] + 1, series[-1]['total_users'] + 1))
@@ -1,7 +1,8 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import PackageViewSet, TransactionViewSet, SubscriptionViewSet, SystemSettingsAPIView, \
-    DashboardMetricsAPIView, UserGrowthAPIView, PackageDistributionAPIView, UserDemographicsAPIView
+    DashboardMetricsAPIView, UserGrowthAPIView, PackageDistributionAPIView, UserDemographicsAPIView, \
+    CVScreeningCacheStatsAPIView
 
 router = DefaultRouter()
 router.register(r'packages', PackageViewSet, basename='package')
@@ -15,5 +16,6 @@ urlpatterns = router.urls + [
     path('dashboard/package-distribution/', PackageDistributionAPIView.as_view(),
          name='dashboard-package-distribution'),
     path('dashboard/user-demographics/', UserDemographicsAPIView.as_view(), name='dashboard-user-demographics'),
+    path('dashboard/cv-screening-cache/', CVScreeningCacheStatsAPIView.as_view(), name='dashboard-cv-screening-cache'),
 
 ]
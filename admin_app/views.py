@@ -1,7 +1,6 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
 from django.utils import timezone
-from django.db.models import Count, Sum, Avg, Case, When, Value, CharField
-from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
+from django.db.models import Count, Avg, Case, When, Value, CharField, Q
 from django.core.cache import cache
 from django.contrib.auth.models import User
 from dateutil.relativedelta import relativedelta
@@ -15,11 +14,17 @@ from rest_framework.permissions import IsAdminUser
 from drf_spectacular.utils import extend_schema, OpenApiResponse, inline_serializer, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
+from platform_app.activity import count_active_users
+from platform_app.cv_screening import get_cache_stats
+from .exports import ExportMixin
+from .growth import get_user_growth
 from .models import Packages, Transactions, Subscriptions, SystemSetting, UserProfiles
+from .pagination import SubscriptionPagination, TransactionPagination
+from .rollups import day_bounds, get_daily_metrics
 from .serializers import (
     PackageSerializer, TransactionSerializer, SubscriptionSerializer,
     DashboardMetricsSerializer, UserGrowthSerializer, PackageDistributionSerializer,
-    UserDemographicsSerializer
+    UserDemographicsSerializer, CVScreeningCacheStatsSerializer
 )
 
 
@@ -35,25 +40,45 @@ class PackageViewSet(ModelViewSet):
 
 
 @extend_schema(tags=["Admin: Transactions"])
-class TransactionViewSet(ModelViewSet):
+class TransactionViewSet(ExportMixin, ModelViewSet):
     """
     A ViewSet for viewing transactions. This is a read-only endpoint.
     """
     permission_classes = [IsAdminUser]
     queryset = Transactions.objects.select_related('user_profile', 'package').all()
     serializer_class = TransactionSerializer
+    pagination_class = TransactionPagination
+    export_columns = {
+        'id': 'id',
+        'transaction_id': 'transaction_id',
+        'user_full_name': 'user_profile__full_name',
+        'package_name': 'package__name',
+        'amount': 'amount',
+        'status': 'status',
+        'created_at': 'created_at',
+    }
     filterset_fields = ['status', 'package__name']
     http_method_names = ['get', 'head', 'options'] # Read-only
 
 
 @extend_schema(tags=["Admin: Subscriptions"])
-class SubscriptionViewSet(ModelViewSet):
+class SubscriptionViewSet(ExportMixin, ModelViewSet):
     """
     A ViewSet for viewing and editing user subscriptions.
     """
     permission_classes = [IsAdminUser]
     queryset = Subscriptions.objects.select_related('user_profile', 'package').all()
     serializer_class = SubscriptionSerializer
+    pagination_class = SubscriptionPagination
+    export_key = 'start_date'
+    export_columns = {
+        'id': 'id',
+        'user_full_name': 'user_profile__full_name',
+        'package_name': 'package__name',
+        'start_date': 'start_date',
+        'end_date': 'end_date',
+        'is_active': 'is_active',
+    }
     filterset_fields = ['is_active', 'package__name']
 
 
@@ -158,39 +183,46 @@ class SystemSettingsAPIView(APIView):
 @extend_schema(
     tags=["Admin: Dashboard"],
     summary="Get Core Dashboard Metrics",
-    description="Provides key performance indicators like DAU, monthly revenue, and active subscriptions with percentage changes.",
+    description="Provides key performance indicators like DAU, WAU (last 7 days), MAU (last 30 days), monthly revenue, "
+                "and active subscriptions with percentage changes. Active users are estimated from per-day sketches "
+                "(about 0.8% error); revenue is read from daily rollups, so today's may be up to a few minutes old. "
+                "Subscriptions are counted live; the change compares them with the active subscriptions started "
+                "before this month.",
     responses={200: DashboardMetricsSerializer}
 )
 class DashboardMetricsAPIView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request, *args, **kwargs):
-        today = timezone.now().date()
+        today = timezone.localdate()
         yesterday = today - timedelta(days=1)
         start_of_this_month = today.replace(day=1)
         start_of_last_month = (start_of_this_month - timedelta(days=1)).replace(day=1)
+        rows = get_daily_metrics(start_of_last_month, today)
 
-        dau_today = User.objects.filter(last_login__date=today).count()
-        dau_yesterday = User.objects.filter(last_login__date=yesterday).count()
+        dau_today = count_active_users(today, today)
+        dau_yesterday = count_active_users(yesterday, yesterday)
         dau_change = ((dau_today - dau_yesterday) / dau_yesterday * 100) if dau_yesterday > 0 else 0
 
-        revenue_this_month = Transactions.objects.filter(
-            status='Success', created_at__gte=start_of_this_month
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        revenue_last_month = Transactions.objects.filter(
-            status='Success', created_at__gte=start_of_last_month, created_at__lt=start_of_this_month
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        revenue_this_month = sum(row.revenue for day, row in rows.items() if day >= start_of_this_month)
+        revenue_last_month = sum(row.revenue for day, row in rows.items() if day < start_of_this_month)
         revenue_change = ((revenue_this_month - revenue_last_month) / revenue_last_month * 100) if revenue_last_month > 0 else 0
 
-        active_subs_count = Subscriptions.objects.filter(is_active=True).count()
-        subs_at_start_of_month = Subscriptions.objects.filter(
-            start_date__lt=start_of_this_month, is_active=True
-        ).count()
+        # Counted live, as before the rollups: subscriptions that are active now, and those of them started
+        # before this month. Both are one pass over the `is_active` index.
+        subscriptions = Subscriptions.objects.filter(is_active=True).aggregate(
+            active=Count('id'),
+            at_start_of_month=Count('id', filter=Q(start_date__lt=day_bounds(start_of_this_month)[0])),
+        )
+        active_subs_count = subscriptions['active']
+        subs_at_start_of_month = subscriptions['at_start_of_month']
         subscriptions_change = ((active_subs_count - subs_at_start_of_month) / subs_at_start_of_month * 100) if subs_at_start_of_month > 0 else 0
 
         data = {
             'daily_active_users': dau_today,
             'dau_percentage_change': round(dau_change, 2),
+            'weekly_active_users': count_active_users(today - timedelta(days=6), today),
+            'monthly_active_users': count_active_users(today - timedelta(days=29), today),
             'monthly_revenue': revenue_this_month,
             'revenue_percentage_change': round(revenue_change, 2),
             'active_subscriptions': active_subs_count,
@@ -203,36 +235,39 @@ class DashboardMetricsAPIView(APIView):
 @extend_schema(
     tags=["Admin: Dashboard"],
     summary="Get User Growth Data",
-    description="Provides time-series data for new and total user growth. Can be filtered by a time period.",
+    description="Provides time-series data for new and total user growth. Can be filtered by a time period and a date "
+                "range; long series are downsampled by merging consecutive periods.",
     parameters=[
         OpenApiParameter(name='period', type=OpenApiTypes.STR, enum=['daily', 'weekly', 'monthly'], default='monthly',
-                         description='The time period to group the growth data by.')
+                         description='The time period to group the growth data by.'),
+        OpenApiParameter(name='from', type=OpenApiTypes.DATE, required=False,
+                         description='First date to include (YYYY-MM-DD); defaults to the first user.'),
+        OpenApiParameter(name='to', type=OpenApiTypes.DATE, required=False,
+                         description='Last date to include (YYYY-MM-DD); defaults to today.'),
     ],
-    responses={200: UserGrowthSerializer(many=True)}
+    responses={
+        200: UserGrowthSerializer(many=True),
+        400: OpenApiResponse(description="Invalid 'from' or 'to' date."),
+    }
 )
 class UserGrowthAPIView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request, *args, **kwargs):
         period = request.query_params.get('period', 'monthly').lower()
-        if period == 'weekly':
-            trunc_level = TruncWeek
-        elif period == 'daily':
-            trunc_level = TruncDay
-        else:
-            trunc_level = TruncMonth
-
-        new_user_data = User.objects.annotate(period=trunc_level('date_joined')).values('period').annotate(
-            new_users=Count('id')).order_by('period')
-        chart_data = []
-        total_users_so_far = 0
-        for item in new_user_data:
-            total_users_so_far += item['new_users']
-            chart_data.append({
-                'period': item['period'],
-                'new_users': item['new_users'],
-                'total_users': total_users_so_far
-            })
+        if period not in ('daily', 'weekly'):
+            period = 'monthly'
+        try:
+            first_day, last_day = (
+                datetime.strptime(value, '%Y-%m-%d').date() if value else None
+                for value in (request.query_params.get('from'), request.query_params.get('to'))
+            )
+        except ValueError:
+            return Response({"error": "Date format must be YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        if first_day and last_day and first_day > last_day:
+            return Response({"error": "'to' must be on or after 'from'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        chart_data = get_user_growth(period, first_day, last_day)
         serializer = UserGrowthSerializer(instance=chart_data, many=True)
         return Response(serializer.data)
 
@@ -293,4 +328,18 @@ class UserDemographicsAPIView(APIView):
             return Response({"error": "Invalid group_by parameter"}, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = UserDemographicsSerializer(instance=queryset, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+
+@extend_schema(
+    tags=["Admin: Dashboard"],
+    summary="Get CV Screening Cache Statistics",
+    description="Returns how many CV screenings were served from the result cache (hits) instead of calling n8n (misses).",
+    responses={200: CVScreeningCacheStatsSerializer}
+)
+class CVScreeningCacheStatsAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        serializer = CVScreeningCacheStatsSerializer(instance=get_cache_stats())
+        return Response(serializer.data)
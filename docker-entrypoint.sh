@@ -0,0 +1,19 @@
+#!/bin/bash
+# Runs the web server and, unless CV_SCREENING_WORKER=0 (e.g. when the worker runs as its own
+# service from this image with `python manage.py process_cv_screening_jobs`), the CV screening job
+# worker next to it. The container stops as soon as either exits, so the platform restarts both.
+# Both shut down gracefully on TERM, which is passed on to them.
+pids=()
+gunicorn --bind 0.0.0.0:8001 --access-logfile - &
+pids+=($!)
+if [ "${CV_SCREENING_WORKER:-1}" != "0" ]; then
+    python manage.py process_cv_screening_jobs &
+    pids+=($!)
+fi
+
+trap 'kill -TERM "${pids[@]}" 2>/dev/null' TERM INT
+wait -n
+status=$?
+kill -TERM "${pids[@]}" 2>/dev/null
+wait
+exit $status
@@ -0,0 +1,47 @@
+"""
+Gunicorn configuration, picked up automatically from the working directory.
+
+The server mode is chosen with the SERVER_MODE environment variable (also read by Django settings):
+
+    SERVER_MODE=wsgi (default)  Sync workers running PlatformInterview.wsgi. Every request, including
+                                the n8n-bound ones, holds a worker until it finishes.
+    SERVER_MODE=asgi            Uvicorn workers running PlatformInterview.asgi. The n8n-bound endpoints
+                                (submit-screener, start-result, cv-screening, camera-analysis) are
+                                served by the async views in platform_app/async_views.py, so one worker
+                                can hold hundreds of in-flight n8n calls. Raise the N8N_*_POOL_SIZE and
+                                N8N_*_MAX_CONCURRENCY settings to match.
+
+The number of worker processes is set with WEB_CONCURRENCY (gunicorn's default is 1).
+
+Prometheus metrics are written by every worker to PROMETHEUS_MULTIPROC_DIR and added up by /metrics.
+The directory is emptied when gunicorn starts, and the samples of a worker that exits are retired.
+"""
+import os
+import shutil
+import sys
+
+if os.getenv('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'PlatformInterview.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'PlatformInterview.wsgi:application'
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus-multiproc')
+
+
+def on_starting(server):
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    # Sends the camera frames still buffered in the worker before it goes away (e.g. when recycled).
+    camera = sys.modules.get('platform_app.camera')
+    if camera is not None:
+        camera.frame_buffer.shutdown()
@@ -0,0 +1,251 @@
+"""
+Native async versions of the n8n-bound endpoints, used instead of the sync views in `views.py`
+when the app runs under ASGI (`SERVER_MODE=asgi`, see gunicorn.conf.py). While a request waits
+on n8n it only holds a coroutine, so a single worker process can keep hundreds of n8n calls in
+flight instead of one per sync worker.
+
+DRF's APIView is sync-only, so `async_api_view` provides the parts of `@api_view` these views
+rely on: token authentication, DRF-style error bodies and CSRF exemption.
+
+`result_events_api` is only served under ASGI: it keeps a connection open until an interview's
+result is ready, which would pin a whole sync worker under WSGI.
+
+Sync views that stream their response wrap the iterator in `iterate_in_thread` under ASGI, since
+Django would otherwise consume a sync iterator completely before sending anything.
+"""
+import asyncio
+import functools
+import json
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, ParseError
+
+from .authentication import ActivityTokenAuthentication
+from .availability import confirm_reservation, hold_slot, release_reservation
+from .cv_screening import ascreen_cv
+from .idempotency import idempotent
+from .models import Interviews, UserProfiles
+from .results import claim_result_generation, get_interview_owner, is_result_ready, release_result_generation, \
+    wait_for_result
+from .screener import build_screener_payload, format_screener_response
+from .serializers import CVScreeningReportSerializer
+from . import camera, n8n
+
+
+def async_api_view(http_method_names):
+    def decorator(view):
+        @csrf_exempt
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in http_method_names:
+                return JsonResponse({"detail": f'Method "{request.method}" not allowed.'},
+                                    status=status.HTTP_405_METHOD_NOT_ALLOWED)
+            try:
+                user_auth_tuple = await sync_to_async(ActivityTokenAuthentication().authenticate)(request)
+                if user_auth_tuple is None:
+                    raise NotAuthenticated()
+                request.user, request.auth = user_auth_tuple
+                return await view(request, *args, **kwargs)
+            except APIException as exc:
+                response = JsonResponse({"detail": exc.detail}, status=exc.status_code)
+                if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                    response['WWW-Authenticate'] = 'Token'
+                if getattr(exc, 'wait', None):
+                    response['Retry-After'] = '%d' % exc.wait
+                return response
+        return wrapper
+    return decorator
+
+
+async def iterate_in_thread(iterator):
+    """Async iterator over a sync one, taking every item in a thread (so it may use the database)."""
+    done = object()
+    while (item := await sync_to_async(next)(iterator, done)) is not done:
+        yield item
+
+
+async def load_form(request):
+    """
+    Parses a multipart/form body off the event loop, since uploads may be spooled to disk.
+    Returns `(data, files)`; JSON bodies are decoded into `data`.
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError as e:
+            raise ParseError(f'JSON parse error - {e}')
+        if not isinstance(data, dict):
+            raise ParseError('JSON parse error - the body must be an object.')
+        return data, {}
+
+    def parse():
+        return request.POST, request.FILES
+
+    return await sync_to_async(parse, thread_sensitive=False)()
+
+
+@async_api_view(['POST'])
+@idempotent
+async def submit_screener_api(request):
+    try:
+        user_profile = await UserProfiles.objects.aget(user=request.user)
+    except UserProfiles.DoesNotExist:
+        return JsonResponse({"error": "User profile not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    data, files = await load_form(request)
+    n8n_data_payload = build_screener_payload(data, user_profile)
+    if n8n_data_payload is None:
+        return JsonResponse({"error": "Invalid data: Some required fields are missing or empty."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+    uploaded_file = files.get('cv')
+    if not uploaded_file:
+        return JsonResponse({"error": "CV file is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        reservation = await sync_to_async(hold_slot)(user_profile, n8n_data_payload['schedule_id'],
+                                                     n8n_data_payload['date'])
+    except ValueError:
+        return JsonResponse({"error": "Invalid schedule or date."}, status=status.HTTP_400_BAD_REQUEST)
+    if reservation is None:
+        return JsonResponse({"error": "This schedule is fully booked."}, status=status.HTTP_409_CONFLICT)
+
+    booked = False
+    try:
+        try:
+            n8n_response = await n8n.apost_multipart('screener', fields=n8n_data_payload, files={'cv': uploaded_file})
+            n8n_response.raise_for_status()
+            n8n_data = n8n_response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            return JsonResponse({"error": f"Failed to connect to screener service: {e}"},
+                                status=status.HTTP_502_BAD_GATEWAY)
+
+        response = format_screener_response(n8n_data)
+        if response is None:
+            return JsonResponse({"error": "Booking code not found."}, status=status.HTTP_400_BAD_REQUEST)
+        booked = True
+    finally:
+        # Shielded, so a client disconnect can't cancel the hold before it is confirmed or given back.
+        await asyncio.shield(sync_to_async(confirm_reservation if booked else release_reservation)(reservation))
+
+    return JsonResponse(response, status=status.HTTP_200_OK)
+
+
+@async_api_view(['POST'])
+async def start_result_api(request):
+    data, _ = await load_form(request)
+    interview_id = data.get('interview_id')
+    if not str(interview_id or '').isdigit():
+        return JsonResponse({"error": "Interview ID is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    if await sync_to_async(is_result_ready)(interview_id):
+        return JsonResponse({"message": "Result is already available."}, status=status.HTTP_200_OK)
+    if not await sync_to_async(claim_result_generation)(interview_id):
+        return JsonResponse({"message": "Result analysis is already in progress."}, status=status.HTTP_200_OK)
+
+    started = False
+    try:
+        try:
+            n8n_response = await n8n.apost('result', json={"interview_id": interview_id})
+            n8n_response.raise_for_status()
+            n8n_data = n8n_response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            return JsonResponse({"error": f"Failed to connect to result service: {e}"},
+                                status=status.HTTP_502_BAD_GATEWAY)
+
+        if n8n_data.get('status') != 200:
+            return JsonResponse({"error": "Failed to start result analysis."},
+                                status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        started = True
+    finally:
+        if not started:
+            await sync_to_async(release_result_generation)(interview_id)
+
+    return JsonResponse({
+        "message": "Result analysis started successfully."
+    }, status=status.HTTP_200_OK)
+
+
+@async_api_view(['POST'])
+@idempotent
+async def cv_screening_api(request):
+    _, files = await load_form(request)
+    cv_file = files.get('cv')
+    if not cv_file:
+        return JsonResponse({"error": "No CV file provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        report, errors = await ascreen_cv(request.user, cv_file, cv_file.name, cv_file.content_type)
+    except (httpx.HTTPStatusError, ValueError) as e:
+        return JsonResponse({"error": "Failed to get analysis from AI service.", "details": str(e)},
+                            status=status.HTTP_502_BAD_GATEWAY)
+    except httpx.HTTPError as e:
+        return JsonResponse({"error": "Network error while contacting AI service.", "details": str(e)},
+                            status=status.HTTP_504_GATEWAY_TIMEOUT)
+
+    if report is not None:
+        return JsonResponse(CVScreeningReportSerializer(report).data, status=status.HTTP_201_CREATED)
+    else:
+        return JsonResponse(errors, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_api_view(['POST'])
+async def camera_analysis_api(request):
+    data, files = await load_form(request)
+    images = files.getlist('image') + files.getlist('images')
+    if not images:
+        return JsonResponse({"error": "No image file provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+    interview_id = data.get('interview_id')
+    if not str(interview_id or '').isdigit():
+        return JsonResponse({"error": "Interview ID is required."}, status=status.HTTP_400_BAD_REQUEST)
+    if not await Interviews.objects.filter(pk=interview_id, user_profile__user=request.user).aexists():
+        return JsonResponse({"error": "Interview not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    if not camera.batching_enabled():
+        try:
+            for image in images:
+                await camera.asend_camera_frame(interview_id, image)
+        except httpx.HTTPError as e:
+            return JsonResponse({"error": f"Failed to connect to analysis service: {e}"},
+                                status=status.HTTP_502_BAD_GATEWAY)
+        return JsonResponse({"message": "Image uploaded for analysis."}, status=status.HTTP_200_OK)
+
+    await sync_to_async(camera.frame_buffer.add, thread_sensitive=False)(int(interview_id), images)
+
+    return JsonResponse({
+        "message": "Images uploaded for analysis."
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@async_api_view(['GET'])
+async def result_events_api(request, interview_id):
+    """
+    Server-sent events stream that sends a single `result` event once the interview's result is
+    ready, with comment lines as keep-alives. After `RESULT_EVENTS_TIMEOUT` seconds it sends a
+    `timeout` event and closes; clients simply reconnect.
+    """
+    if await sync_to_async(get_interview_owner)(interview_id) != request.user.pk:
+        return JsonResponse({"error": "Interview not found."}, status=status.HTTP_404_NOT_FOUND)
+    loop = asyncio.get_running_loop()
+
+    async def event_stream():
+        deadline = loop.time() + settings.RESULT_EVENTS_TIMEOUT
+        yield 'retry: 3000\n\n'
+        while (remaining := deadline - loop.time()) > 0:
+            if await wait_for_result(interview_id, min(settings.RESULT_EVENTS_KEEPALIVE, remaining)):
+                data = json.dumps({"interview_id": interview_id, "ready": True})
+                yield f'event: result\ndata: {data}\n\n'
+                return
+            yield ': keep-alive\n\n'
+        yield f'event: timeout\ndata: {json.dumps({"interview_id": interview_id, "ready": False})}\n\n'
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,12 @@
+from rest_framework.authentication import TokenAuthentication
+
+from .activity import record_activity
+
+
+class ActivityTokenAuthentication(TokenAuthentication):
+    """Token authentication that records the user as active today, for the DAU / WAU / MAU metrics."""
+
+    def authenticate_credentials(self, key):
+        user, token = super().authenticate_credentials(key)
+        record_activity(user.pk)
+        return user, token
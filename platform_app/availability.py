@@ -0,0 +1,300 @@
+"""
+Slot availability for the booking pages.
+
+`SlotAvailability` holds the number of interviews booked per schedule and date. Counters are
+never incremented blindly: `refresh_slot` recounts the slot from `interviews` while holding the
+slot row's lock, so concurrent bookings and cancellations can't make it drift from the true
+count. Interviews are written by n8n, not through the ORM, so the booking views refresh the slot
+once n8n has confirmed a booking, and the model signals cover changes made through Django.
+`rebuild_slot_availability` recounts whole dates after changes made anywhere else.
+
+Bookings hold a seat before n8n is called (`hold_slot`), so concurrent bookers can't overbook a
+slot: the hold is one conditional UPDATE of the slot row (`capacity > booked + held`), which only
+ever waits for that row's lock. Once n8n answers, the hold is confirmed and the slot recounted, or
+released. Holds nobody confirms or releases expire after `SLOT_HOLD_SECONDS`.
+
+Availability per date, and for calendar windows of dates, is served from a read-through cache.
+Reads never write: a schedule without a row for a date (nobody has booked it yet) is counted from
+`interviews` instead. Its row is created by the first booking, or by `rebuild_slot_availability`.
+"""
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from . import metrics
+from .models import Interviews, Schedules, SlotAvailability, SlotReservation
+from .serializers import AvailableScheduleSerializer, ScheduleSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def _booked_interviews():
+    return Interviews.objects.exclude(status=Interviews.StatusField.CANCELLED)
+
+
+def _as_date(date):
+    """Accepts dates as sent by clients ('YYYY-MM-DD'), so every caller uses the same cache keys."""
+    return datetime.strptime(date, '%Y-%m-%d').date() if isinstance(date, str) else date
+
+
+# The cached availability of a date is stored with the versions it was built under: the date's own,
+# replaced when a slot of that date is recounted, and a global one, replaced when a schedule changes.
+# Versions are read before the rows, so data read before a change is never served after it. They expire
+# with the data cached under them; a version that has expired reads as a miss.
+_GLOBAL_VERSION_KEY = 'slot_availability_version'
+
+
+def _date_version_key(date):
+    return f'slot_availability_version_{date}'
+
+
+def _data_key(date):
+    return f'slot_availability_{date}'
+
+
+def _new_version(key):
+    cache.set(key, uuid.uuid4().hex, timeout=settings.SLOT_AVAILABILITY_CACHE_TTL)
+
+
+def invalidate_availability(date):
+    _new_version(_date_version_key(_as_date(date)))
+
+
+def invalidate_all_availability():
+    _new_version(_GLOBAL_VERSION_KEY)
+
+
+def refresh_slot(schedule_id, date):
+    """Recounts one slot and drops the cached availability of its date once committed."""
+    date = _as_date(date)
+    with transaction.atomic():
+        slot, created = SlotAvailability.objects.select_for_update().get_or_create(schedule_id=schedule_id, date=date)
+        slot.booked = _booked_interviews().filter(schedule_id=schedule_id, date=date).count()
+        update_fields = ['booked']
+        if created:
+            slot.capacity = Schedules.objects.values_list('capacity', flat=True).get(pk=schedule_id)
+            update_fields.append('capacity')
+        slot.save(update_fields=update_fields)
+        transaction.on_commit(lambda: invalidate_availability(date))
+    return slot
+
+
+def _expire_holds(slot_id):
+    """Gives back the seats of the slot's overdue holds. Runs in the caller's transaction."""
+    expired = SlotReservation.objects.filter(
+        slot_id=slot_id, status=SlotReservation.Status.HELD, expires_at__lte=timezone.now(),
+    ).update(status=SlotReservation.Status.EXPIRED)
+    # Only the rows this UPDATE moved out of HELD are given back, so concurrent sweeps can't both count them.
+    if expired:
+        SlotAvailability.objects.filter(pk=slot_id).update(held=F('held') - expired)
+    return expired
+
+
+def expire_holds():
+    """Expires the overdue holds of every slot; returns how many were expired."""
+    slot_ids = SlotReservation.objects.filter(
+        status=SlotReservation.Status.HELD, expires_at__lte=timezone.now(),
+    ).values_list('slot', flat=True).distinct()
+    expired = 0
+    for slot_id, date in SlotAvailability.objects.filter(pk__in=list(slot_ids)).values_list('pk', 'date'):
+        with transaction.atomic():
+            expired += _expire_holds(slot_id)
+            transaction.on_commit(lambda date=date: invalidate_availability(date))
+    return expired
+
+
+def hold_slot(user_profile, schedule_id, date):
+    """
+    Holds a seat of a slot for `user_profile` for `SLOT_HOLD_SECONDS`. Returns the reservation,
+    or None when the slot is full. Raises ValueError for an unknown schedule or a malformed date.
+    """
+    date = _as_date(date)
+    slot = SlotAvailability.objects.filter(schedule_id=schedule_id, date=date).first()
+    if slot is None:
+        if not Schedules.objects.filter(pk=schedule_id).exists():
+            raise ValueError(f"Unknown schedule {schedule_id}.")
+        slot = refresh_slot(schedule_id, date)
+
+    # Most bookers of a slot that filled up lose; they are turned away without taking its row lock.
+    if slot.booked + slot.held >= slot.capacity and not SlotReservation.objects.filter(
+            slot=slot, status=SlotReservation.Status.HELD, expires_at__lte=timezone.now()).exists():
+        return None
+
+    with transaction.atomic():
+        _expire_holds(slot.pk)
+        claimed = SlotAvailability.objects.filter(pk=slot.pk, capacity__gt=F('booked') + F('held')) \
+            .update(held=F('held') + 1)
+        if not claimed:
+            return None
+        reservation = SlotReservation.objects.create(
+            slot=slot, user_profile=user_profile,
+            expires_at=timezone.now() + timedelta(seconds=settings.SLOT_HOLD_SECONDS),
+        )
+        transaction.on_commit(lambda: invalidate_availability(date))
+    return reservation
+
+
+def _end_hold(reservation, status):
+    """
+    Moves a held reservation to `status` and gives its seat back; returns False (and changes
+    nothing) when the hold is no longer held, e.g. it expired.
+    """
+    ended = SlotReservation.objects.filter(pk=reservation.pk, status=SlotReservation.Status.HELD) \
+        .update(status=status)
+    if ended:
+        SlotAvailability.objects.filter(pk=reservation.slot_id).update(held=F('held') - 1)
+        reservation.status = status
+    return bool(ended)
+
+
+def confirm_reservation(reservation):
+    """
+    Turns the hold of a booking n8n has just confirmed into a booked seat by recounting the slot.
+    The booking went through either way, so a failure is reported here instead of failing the
+    request; the hold then expires and the next rebuild corrects the slot.
+    """
+    slot = reservation.slot
+    try:
+        with transaction.atomic():
+            if not _end_hold(reservation, SlotReservation.Status.CONFIRMED):
+                # The hold expired while n8n was booking, and its seat was given back; the booking is
+                # still counted by the recount below, so the reservation is recorded as confirmed too.
+                SlotReservation.objects.filter(pk=reservation.pk, status=SlotReservation.Status.EXPIRED) \
+                    .update(status=SlotReservation.Status.CONFIRMED)
+                reservation.status = SlotReservation.Status.CONFIRMED
+            refresh_slot(slot.schedule_id, slot.date)
+    except DatabaseError:
+        logger.exception("Could not confirm reservation %s of schedule %s on %s",
+                         reservation.pk, slot.schedule_id, slot.date)
+
+
+def release_reservation(reservation):
+    """Gives back the seat of a booking that n8n didn't make. Failures are reported; the hold then expires."""
+    date = reservation.slot.date
+    try:
+        with transaction.atomic():
+            _end_hold(reservation, SlotReservation.Status.RELEASED)
+            transaction.on_commit(lambda: invalidate_availability(date))
+    except DatabaseError:
+        logger.exception("Could not release reservation %s", reservation.pk)
+
+
+def refresh_date(date):
+    """
+    Recounts every slot of a date with one grouped query, creating missing rows. Held seats are
+    left alone; they are confirmed, released or expired on their own.
+    """
+    date = _as_date(date)
+    counts = dict(
+        _booked_interviews().filter(date=date, schedule__isnull=False).values('schedule')
+        .annotate(count=Count('id')).values_list('schedule', 'count')
+    )
+    with transaction.atomic():
+        SlotAvailability.objects.bulk_create(
+            [SlotAvailability(schedule_id=schedule_id, date=date, booked=counts.get(schedule_id, 0), capacity=capacity)
+             for schedule_id, capacity in Schedules.objects.values_list('id', 'capacity')],
+            update_conflicts=True, update_fields=['booked', 'capacity'],
+            # MySQL upserts on any unique key and doesn't accept naming it.
+            unique_fields=['date', 'schedule'] if connection.features.supports_update_conflicts_with_target else None,
+        )
+        transaction.on_commit(lambda: invalidate_availability(date))
+
+
+def _read_through(name, key, dates, build):
+    """
+    Returns the data cached under `key` if the global version and the versions of `dates` are
+    still the ones it was built under; otherwise builds, stores and returns `build()`.
+    """
+    version_keys = [_GLOBAL_VERSION_KEY, *(_date_version_key(date) for date in dates)]
+    cached = cache.get_many([*version_keys, key])
+    versions = [cached.get(version_key) for version_key in version_keys]
+    stored = cached.get(key)
+    hit = stored is not None and None not in versions and stored['versions'] == versions
+    metrics.record_cache_lookup(name, hit)
+    if hit:
+        return stored['data']
+
+    for i, version_key in enumerate(version_keys):
+        if versions[i] is None:
+            cache.add(version_key, uuid.uuid4().hex, timeout=settings.SLOT_AVAILABILITY_CACHE_TTL)
+            versions[i] = cache.get(version_key)
+    data = build()
+    cache.set(key, {'versions': versions, 'data': data}, timeout=settings.SLOT_AVAILABILITY_CACHE_TTL)
+    return data
+
+
+def get_availability(date):
+    """
+    The booking page data of a date: every schedule with its booked and remaining sessions. Seats
+    held by bookings in progress are not remaining, so the page doesn't offer them.
+    """
+    date = _as_date(date)
+
+    def build():
+        schedules = list(Schedules.objects.order_by('start_time'))
+        slots = {slot.schedule_id: slot for slot in SlotAvailability.objects.filter(date=date)}
+        missing = [schedule.id for schedule in schedules if schedule.id not in slots]
+        booked = {}
+        if missing:
+            booked = dict(
+                _booked_interviews().filter(date=date, schedule__in=missing).values('schedule')
+                .annotate(count=Count('id')).values_list('schedule', 'count')
+            )
+
+        for schedule in schedules:
+            slot = slots.get(schedule.id) or SlotAvailability(capacity=schedule.capacity,
+                                                              booked=booked.get(schedule.id, 0))
+            schedule.booked_sessions = slot.booked
+            schedule.remaining_capacity = slot.capacity - slot.booked - slot.held
+        return AvailableScheduleSerializer(schedules, many=True).data
+
+    return _read_through('slot_availability', _data_key(date), [date], build)
+
+
+def get_availability_calendar(start_date, end_date):
+    """
+    Availability of every date from `start_date` to `end_date` (inclusive) for a calendar view:
+    per date the total remaining capacity and each schedule with its booked and remaining sessions.
+    Counted from `interviews` with one grouped query over the window; capacity and held seats are
+    read from the slot rows, like `get_availability` does, and from the schedule for dates without rows.
+    """
+    dates = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+    def build():
+        schedules = list(Schedules.objects.order_by('start_time'))
+        serialized = ScheduleSerializer(schedules, many=True).data
+        booked = {
+            (date, schedule_id): count
+            for date, schedule_id, count in _booked_interviews()
+            .filter(date__range=(start_date, end_date), schedule__isnull=False)
+            .values('date', 'schedule').annotate(count=Count('id')).values_list('date', 'schedule', 'count')
+        }
+        rows = {
+            (date, schedule_id): (capacity, held)
+            for date, schedule_id, capacity, held in SlotAvailability.objects
+            .filter(date__range=(start_date, end_date)).values_list('date', 'schedule', 'capacity', 'held')
+        }
+
+        calendar = []
+        for date in dates:
+            slots = []
+            for schedule, schedule_data in zip(schedules, serialized):
+                booked_sessions = booked.get((date, schedule.id), 0)
+                capacity, held = rows.get((date, schedule.id), (schedule.capacity, 0))
+                remaining = capacity - booked_sessions - held
+                slots.append({**schedule_data, 'booked_sessions': booked_sessions, 'remaining_capacity': remaining})
+            calendar.append({
+                'date': date.isoformat(),
+                'remaining_capacity': sum(max(slot['remaining_capacity'], 0) for slot in slots),
+                'schedules': slots,
+            })
+        return calendar
+
+    return _read_through('slot_availability_calendar', f'slot_availability_calendar_{start_date}_{end_date}',
+                         dates, build)
@@ -0,0 +1,220 @@
+"""
+Camera frames sent during a live interview are not forwarded one by one. `CameraFrameBuffer`
+holds them per interview and sends them to the n8n camera-analysis batch workflow once
+`CAMERA_ANALYSIS_BATCH_SIZE` frames are waiting or the oldest has waited
+`CAMERA_ANALYSIS_BATCH_MAX_AGE` seconds. The analyses n8n returns (one per frame) are stored as
+`CameraAnalysis` rows.
+
+Batching only starts once `N8N_CAMERA_ANALYSIS_BATCH_URL` is configured. Until then every frame
+is forwarded to the single-frame workflow (`N8N_CAMERA_ANALYSIS_URL`) during the request, as
+before, and that workflow stores its analysis itself.
+
+The buffer lives in the worker process and frames are copied into spooled temporary files, so
+the request can return as soon as they are stored. A batch n8n doesn't take is requeued and sent
+again up to `CAMERA_ANALYSIS_MAX_ATTEMPTS` times. Frames still buffered when a worker exits
+(e.g. when gunicorn recycles it) are sent from the exiting thread, see gunicorn.conf.py.
+
+The buffer is not durable. Frames answered with 202 are lost if their worker is killed before
+sending them (SIGKILL, the OOM killer, a lost container), and so are batches waiting for a retry.
+That is at most `CAMERA_ANALYSIS_BATCH_MAX_AGE` seconds of frames, plus the retry backoff, per
+interview. The analyses only annotate the interview, so losing a few frames is accepted.
+"""
+import atexit
+import logging
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import metrics, n8n
+from .models import CameraAnalysis
+from .serializers import CameraAnalysisSerializer
+from .uploads import MultipartStream
+
+logger = logging.getLogger(__name__)
+
+
+def batching_enabled():
+    return bool(settings.N8N_ENDPOINTS['camera_analysis_batch']['url'])
+
+
+def send_camera_frame(interview_id, image):
+    """Forwards one frame to the single-frame workflow. Raises `requests.exceptions.RequestException`."""
+    response = n8n.post_multipart('camera_analysis', fields={"interview_id": interview_id}, files={'image': image})
+    response.raise_for_status()
+    return response
+
+
+async def asend_camera_frame(interview_id, image):
+    """Async counterpart of `send_camera_frame`; raises `httpx.HTTPError`."""
+    response = await n8n.apost_multipart('camera_analysis', fields={"interview_id": interview_id},
+                                         files={'image': image})
+    response.raise_for_status()
+    return response
+
+
+def send_camera_frames(interview_id, frames):
+    """
+    Sends `(file_name, fileobj, content_type)` frames of an interview to the batch workflow and
+    stores the list of analyses it answers with. Raises `requests.exceptions.RequestException` or
+    `N8NUnavailable` when the service doesn't take them.
+    """
+    response = n8n.post_multipart('camera_analysis_batch', fields={"interview_id": interview_id},
+                                  files={'images': frames})
+    response.raise_for_status()
+    try:
+        analyses = response.json()
+    except ValueError:
+        analyses = None
+    if not isinstance(analyses, list):
+        # The frames were taken; a workflow that stores its analyses itself needn't return them.
+        logger.warning("Camera analysis of interview %s returned no analyses for %d frames.",
+                       interview_id, len(frames))
+        return []
+
+    rows = []
+    for analysis in analyses:
+        # Invalid analyses are skipped rather than failing the frames that were analysed fine.
+        serializer = CameraAnalysisSerializer(data=analysis)
+        if serializer.is_valid():
+            rows.append(CameraAnalysis(interview_id=interview_id, **serializer.validated_data))
+        else:
+            logger.warning("Skipped an invalid camera analysis of interview %s: %s", interview_id, serializer.errors)
+    return CameraAnalysis.objects.bulk_create(rows)
+
+
+class CameraFrameBuffer:
+
+    def __init__(self, batch_size, max_age, workers, max_attempts=1):
+        if max_age <= 0:
+            # The flusher wakes up every `max_age / 2` seconds.
+            raise ValueError(f"max_age must be positive, got {max_age}.")
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.max_attempts = max_attempts
+        self._frames = {}
+        # Batches waiting to be sent again: `(due, interview_id, frames, attempt)`.
+        self._retries = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='camera-analysis')
+        self._flusher = None
+        self._closed = False
+
+    def add(self, interview_id, uploaded_files):
+        """Buffers uploaded frames for an interview; the upload files may be closed afterwards."""
+        frames = []
+        for uploaded_file in uploaded_files:
+            frame = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+            uploaded_file.seek(0)
+            shutil.copyfileobj(uploaded_file, frame, MultipartStream.chunk_size)
+            frames.append((uploaded_file.name, frame, uploaded_file.content_type))
+
+        with self._lock:
+            if not self._closed:
+                self._start_flusher()
+                _, buffered = self._frames.setdefault(interview_id, (time.monotonic(), []))
+                buffered.extend(frames)
+                if len(buffered) < self.batch_size:
+                    return
+                del self._frames[interview_id]
+                frames = buffered
+        self._submit(interview_id, frames)
+
+    def _take_due(self, max_age):
+        """Removes and returns the batches to send: buffered ones at least `max_age` old and due retries."""
+        now = time.monotonic()
+        with self._lock:
+            due = [interview_id for interview_id, (added_at, _) in self._frames.items()
+                   if now - added_at >= max_age]
+            batches = [(interview_id, self._frames.pop(interview_id)[1], 1) for interview_id in due]
+            retries, self._retries = self._retries, []
+            for retry in retries:
+                due_at, interview_id, frames, attempt = retry
+                if due_at <= now or not max_age:
+                    batches.append((interview_id, frames, attempt))
+                else:
+                    self._retries.append(retry)
+        return batches
+
+    def flush(self, max_age=0):
+        """Sends every batch whose oldest frame has waited at least `max_age` seconds, and the retries due."""
+        if self._closed:
+            return
+        for interview_id, frames, attempt in self._take_due(max_age):
+            self._submit(interview_id, frames, attempt)
+
+    def shutdown(self):
+        """
+        Sends what is still buffered or waiting for a retry, in this thread: at interpreter exit
+        the pool no longer takes work. Batches failing now are dropped, as the process is going away.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        # Batches failing in the pool meanwhile are requeued and sent once more below.
+        self._executor.shutdown(wait=True)
+        for interview_id, frames, _ in self._take_due(0):
+            self._send(interview_id, frames, self.max_attempts)
+
+    def _start_flusher(self):
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_periodically, name='camera-analysis-flusher',
+                                             daemon=True)
+            self._flusher.start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.max_age / 2)
+            self.flush(self.max_age)
+
+    def _submit(self, interview_id, frames, attempt=1):
+        try:
+            self._executor.submit(self._send, interview_id, frames, attempt)
+        except RuntimeError:
+            # Shut down: sent from this thread, for the last time.
+            self._send(interview_id, frames, self.max_attempts)
+
+    def _send(self, interview_id, frames, attempt):
+        requeued = False
+        # Worker threads outlive requests, so their connections are recycled here rather than by Django.
+        close_old_connections()
+        try:
+            send_camera_frames(interview_id, frames)
+            metrics.CAMERA_FRAMES.labels('analysed').inc(len(frames))
+        except (requests.exceptions.RequestException, n8n.N8NUnavailable) as e:
+            # Nobody is waiting on this thread, so the failure is reported here.
+            requeued = attempt < self.max_attempts
+            if requeued:
+                with self._lock:
+                    # Backs off a little more with every attempt.
+                    self._retries.append((time.monotonic() + self.max_age * attempt, interview_id, frames,
+                                          attempt + 1))
+                metrics.CAMERA_FRAMES.labels('requeued').inc(len(frames))
+                logger.warning("Requeued %d camera frames of interview %s after attempt %d: %s",
+                               len(frames), interview_id, attempt, e)
+            else:
+                metrics.CAMERA_FRAMES.labels('dropped').inc(len(frames))
+                logger.error("Dropped %d camera frames of interview %s after %d attempts: %s",
+                             len(frames), interview_id, attempt, e)
+        except Exception:
+            metrics.CAMERA_FRAMES.labels('dropped').inc(len(frames))
+            logger.exception("Dropped %d camera frames of interview %s", len(frames), interview_id)
+        finally:
+            if not requeued:
+                for _, frame, _ in frames:
+                    frame.close()
+
+
+frame_buffer = CameraFrameBuffer(
+    batch_size=settings.CAMERA_ANALYSIS_BATCH_SIZE,
+    max_age=settings.CAMERA_ANALYSIS_BATCH_MAX_AGE,
+    workers=settings.CAMERA_ANALYSIS_FLUSH_WORKERS,
+    max_attempts=settings.CAMERA_ANALYSIS_MAX_ATTEMPTS,
+)
+atexit.register(frame_buffer.shutdown)
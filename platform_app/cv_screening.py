@@ -0,0 +1,407 @@
+import copy
+import hashlib
+import random
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import metrics, n8n
+from .models import CVScreeningJob, CVScreeningReport
+from .serializers import CVScreeningReportSerializer
+
+
+def generate_report_id():
+    current_time = datetime.now().strftime('%Y%m%d%H%M%S')
+    random_suffix = str(random.randint(100, 999))
+    return f"{current_time}{random_suffix}"
+
+
+def generate_screening_request_id():
+    current_time = datetime.now().strftime('%Y%m%d%H%M%S')
+    random_suffix = str(random.randint(100, 999))
+    return f"CVR-{current_time}-{random_suffix}"
+
+
+def request_cv_screening(cv_file, file_name, content_type):
+    """
+    Streams a CV file object to the n8n CV screener and returns the decoded analysis.
+    Raises `requests.exceptions.RequestException` when the service fails.
+    """
+    response = n8n.post_multipart('cv_screener', fields={"id": generate_screening_request_id()},
+                                  files={'cv': (file_name, cv_file, content_type)})
+    response.raise_for_status()  # Raises an exception for 4xx/5xx errors
+    return response.json()
+
+
+async def arequest_cv_screening(cv_file, file_name, content_type):
+    """Async counterpart of `request_cv_screening`; raises `httpx.HTTPError` when the service fails."""
+    response = await n8n.apost_multipart('cv_screener', fields={"id": generate_screening_request_id()},
+                                         files={'cv': (file_name, cv_file, content_type)})
+    response.raise_for_status()
+    return response.json()
+
+
+def save_cv_screening_report(user, n8n_data):
+    """
+    Validates the n8n analysis and stores it as a report for the user.
+    Returns the serializer so callers can inspect `errors` when it is invalid.
+    """
+    serializer = CVScreeningReportSerializer(data=n8n_data)
+    if serializer.is_valid():
+        serializer.save(user=user, id=generate_report_id())
+    return serializer
+
+
+def screen_cv(user, cv_file, file_name, content_type):
+    """
+    Produces a new report for the user, reusing the analysis of an identical upload when one
+    is cached. Returns `(report, errors)`; `report` is None when n8n returned invalid data.
+    Raises `requests.exceptions.RequestException` when the service fails.
+    """
+    content_hash = hash_cv(cv_file)
+    cached_report = get_cached_report(content_hash)
+    if cached_report is not None:
+        return clone_report(cached_report, user), None
+
+    n8n_data = request_cv_screening(cv_file, file_name, content_type)
+    serializer = save_cv_screening_report(user, n8n_data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+
+    cache_report(content_hash, serializer.instance)
+    return serializer.instance, None
+
+
+async def ascreen_cv(user, cv_file, file_name, content_type):
+    """Async counterpart of `screen_cv`; raises `httpx.HTTPError` when the service fails."""
+    # Hashing reads the whole upload (possibly spooled to disk), so neither it nor the cache writes run on the loop.
+    content_hash = await sync_to_async(hash_cv, thread_sensitive=False)(cv_file)
+    cached_report = await sync_to_async(get_cached_report)(content_hash)
+    if cached_report is not None:
+        return await sync_to_async(clone_report)(cached_report, user), None
+
+    n8n_data = await arequest_cv_screening(cv_file, file_name, content_type)
+    serializer = await sync_to_async(save_cv_screening_report)(user, n8n_data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+
+    await sync_to_async(cache_report, thread_sensitive=False)(content_hash, serializer.instance)
+    return serializer.instance, None
+
+
+"""
+========================================================================================================
+                                         RESULT CACHE
+========================================================================================================
+"""
+
+CACHE_HITS_KEY = 'cv_screening_cache_hits'
+CACHE_MISSES_KEY = 'cv_screening_cache_misses'
+
+
+def hash_cv(cv_file):
+    """
+    Content address of an upload. The workflow version is part of the hash, so bumping
+    `CV_SCREENING_WORKFLOW_VERSION` invalidates every cached analysis at once.
+    """
+    digest = hashlib.sha256(f"{settings.CV_SCREENING_WORKFLOW_VERSION}\0".encode())
+    for chunk in cv_file.chunks():
+        digest.update(chunk)
+    cv_file.seek(0)
+    return digest.hexdigest()
+
+
+def _count(key):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The counter was evicted between add() and incr().
+        cache.set(key, 1, timeout=None)
+
+
+def get_cached_report(content_hash, count_miss=True):
+    """
+    Returns the cached report for an upload, or None. Pass `count_miss=False` when a miss
+    will be looked up again later (e.g. by the job worker) so it is only counted once.
+    """
+    if not settings.CV_SCREENING_CACHE_TTL:
+        return None
+
+    report_id = cache.get(f'cv_screening_report_{content_hash}')
+    report = None
+    if report_id is not None:
+        report = CVScreeningReport.objects.filter(pk=report_id).first()
+
+    if report is not None:
+        _count(CACHE_HITS_KEY)
+    elif count_miss:
+        _count(CACHE_MISSES_KEY)
+    if report is not None or count_miss:
+        metrics.record_cache_lookup('cv_screening', report is not None)
+    return report
+
+
+def cache_report(content_hash, report):
+    if settings.CV_SCREENING_CACHE_TTL:
+        cache.set(f'cv_screening_report_{content_hash}', report.pk, timeout=settings.CV_SCREENING_CACHE_TTL)
+
+
+def copy_report(report, user):
+    """Returns an unsaved copy of a report for another user; the caller assigns the id."""
+    report = copy.copy(report)
+    report.pk = None
+    report.user = user
+    report._state.adding = True
+    return report
+
+
+def clone_report(report, user):
+    report = copy_report(report, user)
+    # Inserted under an id no stored report has, drawing new ones if a concurrent insert takes it.
+    _save_batch_reports([report], set())
+    return report
+
+
+def get_cache_stats():
+    hits = cache.get(CACHE_HITS_KEY, 0)
+    misses = cache.get(CACHE_MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+    }
+
+
+"""
+========================================================================================================
+                                         JOB QUEUE
+========================================================================================================
+"""
+
+
+def claim_next_cv_screening_job():
+    """
+    Locks the oldest pending job (or one abandoned by a crashed worker) and marks it as processing.
+    Rows locked by other workers are skipped, so any number of workers can poll the same table.
+    An abandoned job that already had `CV_SCREENING_JOB_MAX_ATTEMPTS` attempts is failed instead,
+    so a job that takes its worker down every time isn't retried forever.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.CV_SCREENING_JOB_STALE_SECONDS)
+    while True:
+        with transaction.atomic():
+            job = CVScreeningJob.objects.select_for_update(skip_locked=True).filter(
+                Q(status=CVScreeningJob.Status.PENDING) |
+                Q(status=CVScreeningJob.Status.PROCESSING, updated_at__lt=stale_before)
+            ).order_by('created_at').first()
+            if job is None:
+                return None
+
+            abandoned = job.status == CVScreeningJob.Status.PROCESSING
+            if abandoned and job.attempts >= settings.CV_SCREENING_JOB_MAX_ATTEMPTS:
+                job.status = CVScreeningJob.Status.FAILED
+                job.error = f"The job was abandoned by its worker on each of its {job.attempts} attempts."
+                job.save(update_fields=['status', 'error', 'updated_at'])
+                continue
+
+            job.status = CVScreeningJob.Status.PROCESSING
+            job.attempts += 1
+            job.save(update_fields=['status', 'attempts', 'updated_at'])
+        return job
+
+
+def process_cv_screening_job(job):
+    try:
+        with job.cv.open('rb') as cv_file:
+            report, errors = screen_cv(job.user, cv_file, job.file_name, job.content_type)
+    except n8n.N8NUnavailable:
+        # n8n was never called, so this attempt doesn't count towards the job's limit.
+        job.status = CVScreeningJob.Status.PENDING
+        job.attempts -= 1
+        job.save(update_fields=['status', 'attempts', 'updated_at'])
+        raise
+    except (requests.exceptions.RequestException, ValueError) as e:
+        if job.attempts < settings.CV_SCREENING_JOB_MAX_ATTEMPTS:
+            job.status = CVScreeningJob.Status.PENDING
+        else:
+            job.status = CVScreeningJob.Status.FAILED
+        job.error = f"Failed to get analysis from AI service: {e}"
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        return job
+
+    if report is not None:
+        job.status = CVScreeningJob.Status.COMPLETED
+        job.report = report
+        job.error = None
+        # The report holds everything we need, so the stored upload can go.
+        job.cv.storage.delete(job.cv.name)
+        job.cv = ''
+    else:
+        job.status = CVScreeningJob.Status.FAILED
+        job.error = str(errors)
+    job.save(update_fields=['status', 'report', 'error', 'cv', 'updated_at'])
+    return job
+
+
+def process_next_cv_screening_job():
+    """
+    Processes a single queued job. Returns False when the queue is empty or n8n is unavailable,
+    so the worker backs off before trying again.
+    """
+    job = claim_next_cv_screening_job()
+    if job is None:
+        return False
+    try:
+        process_cv_screening_job(job)
+    except n8n.N8NUnavailable:
+        return False
+    return True
+
+
+"""
+========================================================================================================
+                                         BATCH SCREENING
+========================================================================================================
+"""
+
+
+def generate_report_ids(count, taken):
+    """
+    `count` new report ids that are neither in `taken` nor used by a stored report; `taken` is
+    updated with them. `generate_report_id` alone easily repeats itself when many reports are
+    created within the same second.
+    """
+    report_ids = set()
+    while len(report_ids) < count:
+        candidates = {generate_report_id() for _ in range(count - len(report_ids))} - taken - report_ids
+        stored = {str(pk) for pk in CVScreeningReport.objects.filter(pk__in=candidates).values_list('pk', flat=True)}
+        taken.update(stored)
+        report_ids.update(candidates - stored)
+    taken.update(report_ids)
+    return list(report_ids)
+
+
+# Another request may insert one of the ids between the check and the insert; the batch then gets new ids.
+_SAVE_ATTEMPTS = 3
+
+
+def _save_batch_reports(reports, taken_ids):
+    """Assigns ids and writes the reports with a single insert. Raises IntegrityError if every attempt collides."""
+    for attempt in range(_SAVE_ATTEMPTS):
+        for report, report_id in zip(reports, generate_report_ids(len(reports), taken_ids)):
+            report.id = report_id
+        try:
+            with transaction.atomic():
+                CVScreeningReport.objects.bulk_create(reports)
+            return
+        except IntegrityError:
+            if attempt == _SAVE_ATTEMPTS - 1:
+                raise
+
+
+def _completed_event(file_name, report, cached):
+    return {
+        "file": file_name,
+        "status": "completed",
+        "cached": cached,
+        "report": CVScreeningReportSerializer(report).data,
+    }
+
+
+def _failed_event(file_name, error, **details):
+    return {"file": file_name, "status": "failed", "error": error, **details}
+
+
+def screen_cv_batch(user, cv_files, concurrency=None):
+    """
+    Screens `(file_name, cv_file, content_type)` entries for the user and yields one event per file
+    as it finishes. Identical files are screened once and cached analyses are reused; the rest go
+    to n8n with at most `concurrency` (default `CV_SCREENING_BATCH_CONCURRENCY`) calls in flight.
+
+    Only the n8n calls run in the pool: hashing, cache lookups and the database writes stay in the
+    calling thread, and the reports of the files that finish together are inserted in bulk.
+    """
+    groups = {}
+    for file_name, cv_file, content_type in cv_files:
+        content_hash = hash_cv(cv_file)
+        if content_hash in groups:
+            groups[content_hash][1].append(file_name)
+        else:
+            groups[content_hash] = ((file_name, cv_file, content_type), [file_name])
+
+    cached, to_screen = [], {}
+    for content_hash, (entry, file_names) in groups.items():
+        cached_report = get_cached_report(content_hash)
+        if cached_report is not None:
+            cached.extend((file_name, copy_report(cached_report, user)) for file_name in file_names)
+        else:
+            to_screen[content_hash] = (entry, file_names)
+
+    taken_ids = set()
+    if cached:
+        try:
+            _save_batch_reports([report for _, report in cached], taken_ids)
+        except IntegrityError as e:
+            for file_name, _ in cached:
+                yield _failed_event(file_name, "Could not save the report.", details=str(e))
+        else:
+            for file_name, report in cached:
+                yield _completed_event(file_name, report, cached=True)
+
+    if not to_screen:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=concurrency or settings.CV_SCREENING_BATCH_CONCURRENCY,
+                                  thread_name_prefix='cv-screening-batch')
+    try:
+        pending = {
+            executor.submit(request_cv_screening, cv_file, file_name, content_type): (content_hash, file_names)
+            for content_hash, ((file_name, cv_file, content_type), file_names) in to_screen.items()
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            finished, events = [], []
+            for future in done:
+                content_hash, file_names = pending.pop(future)
+                try:
+                    n8n_data = future.result()
+                except n8n.N8NUnavailable as e:
+                    events.extend(_failed_event(file_name, str(e.detail), retry_after=e.wait)
+                                  for file_name in file_names)
+                    continue
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    events.extend(_failed_event(file_name, "Failed to get analysis from AI service.", details=str(e))
+                                  for file_name in file_names)
+                    continue
+
+                serializer = CVScreeningReportSerializer(data=n8n_data)
+                if not serializer.is_valid():
+                    events.extend(_failed_event(file_name, "Invalid analysis from AI service.",
+                                                details=serializer.errors) for file_name in file_names)
+                    continue
+                finished.append((content_hash, [
+                    (file_name, CVScreeningReport(user=user, **serializer.validated_data))
+                    for file_name in file_names
+                ]))
+
+            try:
+                _save_batch_reports([report for _, reports in finished for _, report in reports], taken_ids)
+            except IntegrityError as e:
+                events.extend(_failed_event(file_name, "Could not save the report.", details=str(e))
+                              for _, reports in finished for file_name, _ in reports)
+            else:
+                for content_hash, reports in finished:
+                    cache_report(content_hash, reports[0][1])
+                    events.extend(_completed_event(file_name, report, cached=False) for file_name, report in reports)
+            yield from events
+    finally:
+        # Stops queued files from being sent when the client goes away mid-batch.
+        executor.shutdown(wait=False, cancel_futures=True)
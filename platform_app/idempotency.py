@@ -0,0 +1,219 @@
+"""
+`Idempotency-Key` support for POSTs that book slots or call n8n.
+
+The first response for a key (per user and endpoint) is cached for `IDEMPOTENCY_TTL` seconds
+and replayed for repeats, marked with an `Idempotent-Replayed` header. Responses are stored with
+a digest of the request's fields and files, and a key reused for a different request is refused
+with a 422. A duplicate that arrives while the first request is still running waits for it,
+polling for the stored response for up to `IDEMPOTENCY_WAIT_SECONDS`, and gets it replayed; if the
+first request is still running by then, the duplicate gets a 409 with Retry-After. Server errors
+are not stored, so a retry after one (or a duplicate waiting on one) runs the view again.
+"""
+import asyncio
+import functools
+import hashlib
+import json
+import time
+from collections.abc import Mapping
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import metrics
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+IN_PROGRESS_ERROR = f"A request with this {IDEMPOTENCY_HEADER} is still being processed. Retry it later."
+MISMATCH_ERROR = f"This {IDEMPOTENCY_HEADER} was already used for a different request."
+
+
+def _update_fingerprint(digest, value):
+    if hasattr(value, 'chunks'):
+        value.seek(0)
+        for chunk in value.chunks():
+            digest.update(chunk)
+        value.seek(0)
+    else:
+        digest.update(json.dumps(value, sort_keys=True, cls=JSONEncoder).encode())
+    digest.update(b'\0')
+
+
+def request_fingerprint(*sources):
+    """
+    Digest of a request's parsed data: JSON values, form fields (`QueryDict`) and uploaded files,
+    which are read in chunks. Field order doesn't matter.
+    """
+    digest = hashlib.sha256()
+    for source in sources:
+        if not isinstance(source, Mapping):
+            _update_fingerprint(digest, source)
+            continue
+        items = source.lists() if hasattr(source, 'lists') else ((name, [value]) for name, value in source.items())
+        for name, values in sorted(items, key=lambda item: item[0]):
+            digest.update(f'{name}\0'.encode())
+            for value in values:
+                _update_fingerprint(digest, value)
+    return digest.hexdigest()
+
+
+class _IdempotentRequest:
+
+    def __init__(self, request, idempotency_key):
+        digest = hashlib.sha256(f'{request.user.pk}\0{request.path}\0{idempotency_key}'.encode()).hexdigest()
+        self.response_key = f'idempotency_response_{digest}'
+        self.lock_key = f'idempotency_lock_{digest}'
+
+    def stored_response(self):
+        return cache.get(self.response_key)
+
+    def acquire(self):
+        return cache.add(self.lock_key, True, timeout=settings.IDEMPOTENCY_LOCK_SECONDS)
+
+    def release(self):
+        cache.delete(self.lock_key)
+
+    def store(self, status_code, data, fingerprint):
+        if status_code < 500:
+            cache.set(self.response_key, {'status': status_code, 'data': data, 'fingerprint': fingerprint},
+                      timeout=settings.IDEMPOTENCY_TTL)
+
+    def try_claim(self):
+        """
+        Returns the stored response to replay, None once this request holds the key and may run
+        the view, or False while another request with the same key is running.
+        """
+        stored = self.stored_response()
+        if stored is not None:
+            return stored
+        if not self.acquire():
+            return False
+        # The other request may have finished between the two checks.
+        stored = self.stored_response()
+        if stored is not None:
+            self.release()
+        return stored
+
+    def wait_for_claim(self):
+        """`try_claim`, polled while another request with the key runs, for up to `IDEMPOTENCY_WAIT_SECONDS`."""
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        stored = self.try_claim()
+        while stored is False and time.monotonic() < deadline:
+            time.sleep(settings.IDEMPOTENCY_POLL_SECONDS)
+            stored = self.try_claim()
+        return stored
+
+    async def await_claim(self):
+        """Async counterpart of `wait_for_claim`, which doesn't hold a thread while it waits."""
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        stored = await sync_to_async(self.try_claim, thread_sensitive=False)()
+        while stored is False and time.monotonic() < deadline:
+            await asyncio.sleep(settings.IDEMPOTENCY_POLL_SECONDS)
+            stored = await sync_to_async(self.try_claim, thread_sensitive=False)()
+        return stored
+
+
+def _refusal(stored, fingerprint):
+    """`(status, body, headers)` of the answer to a request whose key is taken, or None if it may proceed."""
+    if stored is False:
+        return (status.HTTP_409_CONFLICT, {"error": IN_PROGRESS_ERROR},
+                {'Retry-After': str(settings.IDEMPOTENCY_RETRY_AFTER)})
+    if stored is not None and stored['fingerprint'] != fingerprint:
+        return status.HTTP_422_UNPROCESSABLE_ENTITY, {"error": MISMATCH_ERROR}, {}
+    return None
+
+
+def _get_key(request):
+    idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= 255:
+        raise ValueError(f"{IDEMPOTENCY_HEADER} must be between 1 and 255 characters.")
+    return idempotency_key
+
+
+def idempotent(view):
+    """
+    Makes a view honour the `Idempotency-Key` header. Works on DRF function views and APIView
+    methods (innermost, below `@api_view`) and on `async_api_view` views (below that decorator),
+    as it needs the authenticated user. Requests without the header are not affected.
+    """
+    if asyncio.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            try:
+                idempotency_key = _get_key(request)
+            except ValueError as e:
+                return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            if idempotency_key is None:
+                return await view(request, *args, **kwargs)
+
+            def fingerprint_request():
+                if request.content_type == 'application/json':
+                    try:
+                        fingerprint = request_fingerprint(json.loads(request.body or b'{}'))
+                    except ValueError:
+                        fingerprint = request_fingerprint(request.body)
+                else:
+                    fingerprint = request_fingerprint(request.POST, request.FILES)
+                return fingerprint
+
+            idempotent_request = _IdempotentRequest(request, idempotency_key)
+            # Parses the form off the event loop, as `load_form` does; the view then reuses the parsed data.
+            fingerprint = await sync_to_async(fingerprint_request, thread_sensitive=False)()
+            stored = await idempotent_request.await_claim()
+            metrics.record_cache_lookup('idempotency', bool(stored))
+            refusal = _refusal(stored, fingerprint)
+            if refusal is not None:
+                status_code, data, headers = refusal
+                return JsonResponse(data, status=status_code, headers=headers)
+            if stored is not None:
+                response = JsonResponse(stored['data'], status=stored['status'], safe=False)
+                response[REPLAYED_HEADER] = 'true'
+                return response
+
+            try:
+                response = await view(request, *args, **kwargs)
+                await sync_to_async(idempotent_request.store)(response.status_code, json.loads(response.content),
+                                                              fingerprint)
+            finally:
+                await sync_to_async(idempotent_request.release)()
+            return response
+
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        request = next(arg for arg in args if isinstance(arg, Request))
+        try:
+            idempotency_key = _get_key(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if idempotency_key is None:
+            return view(*args, **kwargs)
+
+        idempotent_request = _IdempotentRequest(request, idempotency_key)
+        # DRF's `request.data` includes the uploaded files.
+        fingerprint = request_fingerprint(request.data)
+        stored = idempotent_request.wait_for_claim()
+        metrics.record_cache_lookup('idempotency', bool(stored))
+        refusal = _refusal(stored, fingerprint)
+        if refusal is not None:
+            status_code, data, headers = refusal
+            return Response(data, status=status_code, headers=headers)
+        if stored is not None:
+            return Response(stored['data'], status=stored['status'], headers={REPLAYED_HEADER: 'true'})
+
+        try:
+            response = view(*args, **kwargs)
+            idempotent_request.store(response.status_code, json.loads(json.dumps(response.data, cls=JSONEncoder)),
+                                     fingerprint)
+        finally:
+            idempotent_request.release()
+        return response
+
+    return wrapper
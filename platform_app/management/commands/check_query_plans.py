@@ -0,0 +1,173 @@
+import json
+import re
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from admin_app.models import Packages, Subscriptions, Transactions
+from platform_app.models import Answers, CVScreeningReport, Interviews, Questions, Results, Schedules, UserProfiles
+
+# Tables that grow with usage; a full scan of any other table (e.g. schedules) is not reported.
+HOT_TABLES = {model._meta.db_table for model in (
+    Interviews, Questions, Answers, Results, CVScreeningReport, Transactions, Subscriptions,
+)}
+
+
+class Command(BaseCommand):
+    help = ("Calls the read endpoints that query the hot tables, runs EXPLAIN on every query they make and "
+            "fails when one of them does a full table scan. Runs in a transaction that is rolled back, "
+            "so the seeded rows are never kept.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=5000,
+                            help='Interviews to seed (with related rows) before checking; 0 uses the existing data.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        with transaction.atomic():
+            if options['seed']:
+                self.seed(options['seed'])
+            try:
+                failures = self.check_endpoints()
+            finally:
+                transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError("Full table scans found:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("No full scans of hot tables."))
+
+    def endpoints(self):
+        """
+        `(path, user, tables)` for the endpoints to check, using ids taken from the data. `tables` may
+        be scanned by that endpoint, because it returns most of their rows anyway.
+        """
+        interview = Interviews.objects.filter(user_profile__isnull=False, results__isnull=False) \
+            .select_related('user_profile__user').first()
+        if interview is None:
+            raise CommandError("No interview with a result to check against; run with --seed.")
+        user = interview.user_profile.user
+        admin = User.objects.filter(is_staff=True).first() or User.objects.create(username='query-plan-check',
+                                                                                  is_staff=True)
+        date = interview.date or timezone.localdate()
+        return [
+            ('/api/interviews/', user, set()),
+            ('/api/v2/interviews/', user, set()),
+            (f'/api/v2/interviews/{interview.pk}', user, set()),
+            (f'/api/get-available-schedules/?date={date:%Y-%m-%d}', user, set()),
+            (f'/api/get-result/{interview.pk}', user, set()),
+            (f'/api/result-document/{interview.pk}', user, set()),
+            (f'/api/result-status/{interview.pk}', user, set()),
+            ('/api/get-average-result/', user, set()),
+            ('/api/cv-screening/report/', user, set()),
+            ('/api/admin/dashboard/metrics/', admin, set()),
+            ('/api/admin/dashboard/package-distribution/', admin, set()),
+            ('/api/admin/transactions/', admin, set()),
+            ('/api/admin/transactions/?status=Success', admin, set()),
+            ('/api/admin/transactions/?package__name=query-plan-1', admin, set()),
+            ('/api/admin/subscriptions/', admin, set()),
+            ('/api/admin/subscriptions/?is_active=true', admin, set()),
+            ('/api/admin/subscriptions/?package__name=query-plan-1', admin, set()),
+        ]
+
+    def check_endpoints(self):
+        factory = APIRequestFactory()
+        failures = []
+        for path, user, allowed_scans in self.endpoints():
+            request = factory.get(path)
+            force_authenticate(request, user=user)
+            match = resolve(path.split('?')[0])
+            with CaptureQueriesContext(connection) as captured:
+                match.func(request, *match.args, **match.kwargs)
+
+            self.stdout.write(f"{path}: {len(captured)} queries")
+            for query in captured:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                plan, scanned = explain(sql)
+                if self.verbosity > 1:
+                    self.stdout.write(f"  {sql}\n    " + plan.replace('\n', '\n    '))
+                for table in sorted((scanned & HOT_TABLES) - allowed_scans):
+                    failures.append(f"{path}: full scan of {table} in: {sql}")
+        return failures
+
+    def seed(self, count):
+        """Bulk-inserts `count` interviews for `count // 10` users, with questions, answers and results."""
+        now = timezone.now()
+        users = User.objects.bulk_create(
+            User(username=f'query-plan-{i}', is_staff=i == 0) for i in range(max(count // 10, 1))
+        )
+        profiles = UserProfiles.objects.bulk_create(UserProfiles(user=user) for user in users)
+        schedules = list(Schedules.objects.all()[:3]) or Schedules.objects.bulk_create(Schedules() for _ in range(3))
+        packages = Packages.objects.bulk_create([Packages(name=f'query-plan-{i}') for i in range(3)])
+
+        interviews = Interviews.objects.bulk_create(
+            Interviews(user_profile=profiles[i % len(profiles)], schedule=schedules[i % len(schedules)],
+                       date=(now - timedelta(days=i % 365)).date())
+            for i in range(count)
+        )
+        questions = Questions.objects.bulk_create(
+            Questions(interview=interview, created_at=now) for interview in interviews for _ in range(3)
+        )
+        Answers.objects.bulk_create(Answers(question=question, submitted_at=now) for question in questions)
+        Results.objects.bulk_create(
+            Results(interview=interview, final_score=50, generated_at=now) for interview in interviews[::2]
+        )
+        Transactions.objects.bulk_create(
+            Transactions(user_profile=profiles[i % len(profiles)], package=packages[i % 3], amount=10,
+                         status=Transactions.Status.values[i % 3], transaction_id=f'query-plan-{i}')
+            for i in range(count)
+        )
+        Subscriptions.objects.bulk_create(
+            Subscriptions(user_profile=profile, package=packages[i % 3], is_active=i % 4 != 0)
+            for i, profile in enumerate(profiles)
+        )
+        CVScreeningReport.objects.bulk_create(
+            CVScreeningReport(
+                id=i + 1, user=users[i % len(users)], full_name='', position='', score=0,
+                format_and_structure_score=0, suitability_score=0, experiences_score=0, profile_summary_score=0,
+                work_experience_score=0, education_score=0, skills_score=0, certifications_score=0,
+                projects_score=0, achievements_score=0, strengths=[], weaknesses=[], opportunities=[],
+                threats=[], revisions=[],
+            )
+            for i in range(count // 2)
+        )
+        self.stdout.write(f"Seeded {count} interviews for {len(users)} users.")
+
+
+def explain(sql):
+    """Returns the query plan as text and the set of tables it reads with a full table scan."""
+    # Plans name subquery tables by their alias (`"interviews" U0`).
+    aliases = dict((alias, table) for table, alias in re.findall(r'[`"](\w+)[`"] (U\d+)\b', sql))
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(f'EXPLAIN FORMAT=JSON {sql}')
+            plan = cursor.fetchone()[0]
+            scanned = {table['table_name'] for table in _json_tables(json.loads(plan))
+                       if table.get('access_type') == 'ALL'}
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = '\n'.join(row[-1] for row in cursor.fetchall())
+            scanned = set(re.findall(r'^SCAN (\w+)$', plan, re.MULTILINE))
+        else:
+            cursor.execute(f'EXPLAIN {sql}')
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+            scanned = set(re.findall(r'Seq Scan on (\w+)', plan))
+    return plan, {aliases.get(table, table) for table in scanned}
+
+
+def _json_tables(node):
+    if isinstance(node, dict):
+        if 'table_name' in node:
+            yield node
+        for value in node.values():
+            yield from _json_tables(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _json_tables(value)
@@ -0,0 +1,53 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from platform_app.cv_screening import process_next_cv_screening_job
+
+
+class Command(BaseCommand):
+    help = "Runs a pool of worker threads that send queued CV screening jobs to n8n."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.CV_SCREENING_WORKERS,
+                            help='Number of jobs processed concurrently.')
+        parser.add_argument('--poll-interval', type=float, default=settings.CV_SCREENING_JOB_POLL_SECONDS,
+                            help='Seconds an idle worker waits before checking the queue again.')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the queue and exit instead of polling forever.')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+
+        def shut_down(signum, frame):
+            self.stdout.write("Stopping after the jobs in progress finish...")
+            stop.set()
+
+        # TERM is how containers are stopped, INT is Ctrl-C; either lets the jobs in progress finish.
+        signal.signal(signal.SIGTERM, shut_down)
+        signal.signal(signal.SIGINT, shut_down)
+
+        def work():
+            try:
+                while not stop.is_set():
+                    close_old_connections()
+                    if not process_next_cv_screening_job():
+                        if options['once']:
+                            return
+                        stop.wait(options['poll_interval'])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work, name=f'cv-screening-{i}', daemon=True)
+                   for i in range(options['workers'])]
+        for thread in threads:
+            thread.start()
+
+        self.stdout.write(f"Processing CV screening jobs with {len(threads)} workers.")
+        # Joined with a timeout, so the signal handlers get to run in this thread meanwhile.
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=1)
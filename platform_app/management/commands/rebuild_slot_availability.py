@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from platform_app.availability import expire_holds, refresh_date
+from platform_app.models import Interviews, SlotAvailability
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}, expected YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = ("Recounts the slot availability counters from the interviews table, e.g. after interviews "
+            "were booked or cancelled outside the app, and gives back the seats of expired holds. Run it "
+            "periodically to correct any drift.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='from_date', type=parse_date,
+                            help='First date to rebuild (YYYY-MM-DD); defaults to today.')
+        parser.add_argument('--to', dest='to_date', type=parse_date,
+                            help='Last date to rebuild (YYYY-MM-DD); defaults to the last booked date.')
+
+    def handle(self, *args, **options):
+        expired = expire_holds()
+        from_date = options['from_date'] or timezone.localdate()
+        dates = set(Interviews.objects.filter(date__gte=from_date).values_list('date', flat=True).distinct())
+        # Dates with counters but no interviews any more must be reset as well.
+        dates |= set(SlotAvailability.objects.filter(date__gte=from_date).values_list('date', flat=True).distinct())
+        if options['to_date']:
+            dates = {date for date in dates if date <= options['to_date']}
+
+        for date in sorted(dates):
+            refresh_date(date)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt slot availability for {len(dates)} dates and expired {expired} holds."))
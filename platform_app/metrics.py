@@ -0,0 +1,180 @@
+"""
+Prometheus metrics, served at `/metrics`.
+
+Under gunicorn every worker process writes its samples to `PROMETHEUS_MULTIPROC_DIR` (set up in
+gunicorn.conf.py) and `/metrics` adds them up across workers; without it the process's own
+registry is served, e.g. with `runserver`.
+
+`MetricsMiddleware` records latency, in-flight requests and database queries per view. Queries
+are counted by a database execute wrapper that is installed on every connection and only does
+work while a request is being measured, including queries run from `sync_to_async` threads.
+"""
+import hmac
+import os
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+REQUEST_LATENCY = Histogram(
+    'django_http_request_duration_seconds', 'Time until the view returned a response.',
+    ['view', 'method', 'status'], buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'django_http_requests_in_progress', 'Requests currently being handled.',
+    multiprocess_mode='livesum',
+)
+DB_QUERIES = Histogram(
+    'django_db_queries_per_request', 'Database queries run while handling a request.',
+    ['view'], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+DB_QUERY_TIME = Histogram(
+    'django_db_query_duration_seconds_per_request', 'Time spent in database queries while handling a request.',
+    ['view'], buckets=LATENCY_BUCKETS,
+)
+N8N_LATENCY = Histogram(
+    'n8n_request_duration_seconds', 'Duration of n8n webhook calls by endpoint and HTTP status '
+    '("error" when no response was received).',
+    ['endpoint', 'status'], buckets=LATENCY_BUCKETS,
+)
+N8N_IN_PROGRESS = Gauge(
+    'n8n_requests_in_progress', 'n8n webhook calls currently in flight.',
+    ['endpoint'], multiprocess_mode='livesum',
+)
+N8N_REJECTED = Counter(
+    'n8n_requests_rejected', 'n8n calls refused by the circuit breaker or concurrency cap.',
+    ['endpoint'],
+)
+CAMERA_FRAMES = Counter(
+    'camera_frames', 'Buffered camera frames by outcome (analysed, requeued or dropped).',
+    ['outcome'],
+)
+CACHE_LOOKUPS = Counter(
+    'app_cache_lookups', 'Application cache lookups by cache and result (hit or miss).',
+    ['cache', 'result'],
+)
+
+
+def record_cache_lookup(name, hit):
+    CACHE_LOOKUPS.labels(name, 'hit' if hit else 'miss').inc()
+
+
+class _QueryStats:
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+_query_stats = ContextVar('query_stats', default=None)
+
+
+def _count_queries(execute, sql, params, many, context):
+    stats = _query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.count += 1
+        stats.duration += time.perf_counter() - start
+
+
+def _install_query_counter(sender, connection, **kwargs):
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+connection_created.connect(_install_query_counter)
+
+
+class MetricsMiddleware:
+    """First middleware in `MIDDLEWARE`, so it sees the full time spent in Django."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start, stats, token = self._start()
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            self._finish(request, response, start, stats, token)
+        return response
+
+    async def __acall__(self, request):
+        start, stats, token = self._start()
+        response = None
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._finish(request, response, start, stats, token)
+        return response
+
+    @staticmethod
+    def _start():
+        REQUESTS_IN_PROGRESS.inc()
+        stats = _QueryStats()
+        return time.perf_counter(), stats, _query_stats.set(stats)
+
+    @staticmethod
+    def _finish(request, response, start, stats, token):
+        duration = time.perf_counter() - start
+        _query_stats.reset(token)
+        REQUESTS_IN_PROGRESS.dec()
+
+        match = request.resolver_match
+        # Unrouted requests share one label so scanners can't create a series per path.
+        view = match.view_name if match else '<unmatched>'
+        status = response.status_code if response is not None else 500
+        REQUEST_LATENCY.labels(view, request.method, status).observe(duration)
+        DB_QUERIES.labels(view).observe(stats.count)
+        DB_QUERY_TIME.labels(view).observe(stats.duration)
+
+
+def _is_staff(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            user, _ = TokenAuthentication().authenticate(request) or (None, None)
+        except AuthenticationFailed:
+            return False
+    return user is not None and user.is_staff
+
+
+def metrics_view(request):
+    """
+    Scrapers authenticate with `METRICS_TOKEN`. Without a token configured the metrics are only
+    served to staff users (session or API token), never to anonymous requests.
+    """
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(authorization.encode(), f'Bearer {settings.METRICS_TOKEN}'.encode()):
+            return HttpResponseForbidden()
+    elif not _is_staff(request):
+        return HttpResponseForbidden()
+
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
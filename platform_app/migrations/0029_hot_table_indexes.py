@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('platform_app', '0028_cvscreeningjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cvscreeningreport',
+            index=models.Index(fields=['user', '-created_at'], name='cv_report_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interviews',
+            index=models.Index(fields=['user_profile', 'date'], name='interview_profile_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interviews',
+            index=models.Index(fields=['date', 'schedule'], name='interview_date_schedule_idx'),
+        ),
+    ]
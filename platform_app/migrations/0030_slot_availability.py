@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('platform_app', '0029_hot_table_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedules',
+            name='capacity',
+            field=models.PositiveSmallIntegerField(default=3, help_text='Interviews that can be booked per date'),
+        ),
+        migrations.CreateModel(
+            name='SlotAvailability',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('booked', models.PositiveIntegerField(default=0)),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='platform_app.schedules')),
+            ],
+            options={
+                'db_table': 'slot_availability',
+                'constraints': [models.UniqueConstraint(fields=('date', 'schedule'), name='slot_availability_date_schedule_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_schedule_capacity(apps, schema_editor):
+    Schedules = apps.get_model('platform_app', 'Schedules')
+    SlotAvailability = apps.get_model('platform_app', 'SlotAvailability')
+    SlotAvailability.objects.update(
+        capacity=models.Subquery(Schedules.objects.filter(pk=models.OuterRef('schedule')).values('capacity')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('platform_app', '0030_slot_availability'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='slotavailability',
+            name='capacity',
+            field=models.PositiveSmallIntegerField(default=3),
+        ),
+        migrations.AddField(
+            model_name='slotavailability',
+            name='held',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(copy_schedule_capacity, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='SlotReservation',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('Held', 'Held'), ('Confirmed', 'Confirmed'), ('Released', 'Released'), ('Expired', 'Expired')], default='Held', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('slot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='platform_app.slotavailability')),
+                ('user_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='platform_app.userprofiles')),
+            ],
+            options={
+                'db_table': 'slot_reservations',
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='slot_reservation_expiry_idx')],
+            },
+        ),
+    ]
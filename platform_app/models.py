@@ -25,6 +25,7 @@ class Schedules(models.Model):
     id = models.BigAutoField(primary_key=True)
     start_time = models.TimeField(blank=True, null=True)
     end_time = models.TimeField(blank=True, null=True)
+    capacity = models.PositiveSmallIntegerField(default=3, help_text="Interviews that can be booked per date")
 
     class Meta:
         db_table = 'schedules'
@@ -84,6 +85,51 @@ class Interviews(models.Model):
 
     class Meta:
         db_table = 'interviews'
+        indexes = [
+            models.Index(fields=['user_profile', 'date'], name='interview_profile_date_idx'),
+            models.Index(fields=['date', 'schedule'], name='interview_date_schedule_idx'),
+        ]
+
+
+class SlotAvailability(models.Model):
+    """
+    Interviews booked per schedule and date (cancelled ones excluded) and seats held by bookings in
+    progress, see `platform_app.availability`. `capacity` is copied from the schedule.
+    """
+    id = models.BigAutoField(primary_key=True)
+    schedule = models.ForeignKey(Schedules, on_delete=models.CASCADE)
+    date = models.DateField()
+    booked = models.PositiveIntegerField(default=0)
+    held = models.PositiveIntegerField(default=0)
+    capacity = models.PositiveSmallIntegerField(default=3)
+
+    class Meta:
+        db_table = 'slot_availability'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'schedule'], name='slot_availability_date_schedule_uniq'),
+        ]
+
+
+class SlotReservation(models.Model):
+    """A seat of a slot held for a user while n8n books their interview."""
+    id = models.BigAutoField(primary_key=True)
+    slot = models.ForeignKey(SlotAvailability, on_delete=models.CASCADE)
+    user_profile = models.ForeignKey(UserProfiles, on_delete=models.CASCADE)
+
+    class Status(models.TextChoices):
+        HELD = 'Held', 'Held'
+        CONFIRMED = 'Confirmed', 'Confirmed'
+        RELEASED = 'Released', 'Released'
+        EXPIRED = 'Expired', 'Expired'
+    status = models.CharField(max_length=10, choices=Status, default=Status.HELD)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'slot_reservations'
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='slot_reservation_expiry_idx'),
+        ]
 
 
 class Questions(models.Model):
@@ -195,4 +241,34 @@ class CVScreeningReport(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        db_table = 'cv_screening_reports'
\ No newline at end of file
+        db_table = 'cv_screening_reports'
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='cv_report_user_created_idx'),
+        ]
+
+
+class CVScreeningJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'Pending', 'Pending'
+        PROCESSING = 'Processing', 'Processing'
+        COMPLETED = 'Completed', 'Completed'
+        FAILED = 'Failed', 'Failed'
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    cv = models.FileField(upload_to='cv_screening_jobs/', blank=True)
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True, null=True)
+    status = models.CharField(max_length=10, choices=Status, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    report = models.ForeignKey(CVScreeningReport, on_delete=models.SET_NULL, blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'cv_screening_jobs'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='cv_job_status_created_idx'),
+        ]
@@ -0,0 +1,242 @@
+"""
+Shared HTTP client for the n8n webhooks.
+
+Each endpoint in `settings.N8N_ENDPOINTS` gets one `requests.Session` per process, so
+connections (and their TLS handshakes) are reused across requests instead of being
+opened for every call.
+
+Async views use the `apost*` variants instead, which share one `httpx.AsyncClient` per endpoint
+and event loop.
+
+Every call is also guarded by a circuit breaker and a concurrency cap (bulkhead) per endpoint,
+both kept in the cache so they are shared by all workers. When n8n keeps failing or is already
+handling `max_concurrency` calls from us, requests fail fast with `N8NUnavailable` (503 with
+Retry-After) instead of tying up another worker.
+"""
+import asyncio
+import math
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import metrics
+from .uploads import MultipartStream
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(endpoint):
+    session = _sessions.get(endpoint)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(endpoint)
+            if session is None:
+                config = settings.N8N_ENDPOINTS[endpoint]
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config['pool_size'])
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _sessions[endpoint] = session
+    return session
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client(endpoint):
+    """Returns the endpoint's `httpx.AsyncClient` for the running event loop."""
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(endpoint)
+    if client is None:
+        config = settings.N8N_ENDPOINTS[endpoint]
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(config['read_timeout'], connect=config['connect_timeout']),
+            limits=httpx.Limits(max_connections=config['pool_size'],
+                                max_keepalive_connections=config['pool_size']),
+        )
+        clients[endpoint] = client
+    return client
+
+
+def get_timeout(endpoint):
+    config = settings.N8N_ENDPOINTS[endpoint]
+    return config['connect_timeout'], config['read_timeout']
+
+
+class N8NUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The AI service is temporarily unavailable. Please try again later.'
+    default_code = 'service_unavailable'
+
+    def __init__(self, retry_after, detail=None):
+        super().__init__(detail)
+        # DRF's exception handler turns `wait` into a Retry-After header.
+        self.wait = retry_after
+
+
+def _incr(key, timeout):
+    cache.add(key, 0, timeout=timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The key expired between add() and incr().
+        cache.set(key, 1, timeout=timeout)
+        return 1
+
+
+class GuardedCall:
+    """
+    Context manager around a single n8n call. Entering it checks the endpoint's circuit breaker
+    and takes a concurrency slot, raising `N8NUnavailable` if either says no. An exception inside
+    the block, or a 5xx passed to `record()`, counts as a failure; `N8N_BREAKER_FAILURE_THRESHOLD`
+    failures within `N8N_BREAKER_WINDOW_SECONDS` open the breaker for `N8N_BREAKER_RESET_SECONDS`,
+    after which a single probe call decides whether it closes again.
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.config = settings.N8N_ENDPOINTS[endpoint]
+        self.probing = False
+        self.failed = False
+        self.status_code = None
+
+    def _key(self, name):
+        return f'n8n_{self.endpoint}_{name}'
+
+    def __enter__(self):
+        try:
+            self._check_breaker()
+            self._acquire_slot()
+        except N8NUnavailable:
+            if self.probing:
+                cache.delete(self._key('probe'))
+            metrics.N8N_REJECTED.labels(self.endpoint).inc()
+            raise
+        metrics.N8N_IN_PROGRESS.labels(self.endpoint).inc()
+        self.started_at = time.perf_counter()
+        return self
+
+    # The breaker and the slot counter are cache round-trips; async callers run them in a worker thread
+    # so they don't block the event loop (and not on the shared sync thread, so calls don't queue there).
+    async def __aenter__(self):
+        return await sync_to_async(self.__enter__, thread_sensitive=False)()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await sync_to_async(self.__exit__, thread_sensitive=False)(exc_type, exc, tb)
+
+    def record(self, status_code):
+        self.status_code = status_code
+        self.failed = status_code >= 500
+
+    def __exit__(self, exc_type, exc, tb):
+        metrics.N8N_IN_PROGRESS.labels(self.endpoint).dec()
+        metrics.N8N_LATENCY.labels(self.endpoint, self.status_code or 'error').observe(
+            time.perf_counter() - self.started_at)
+        self._release_slot()
+        if exc_type is not None or self.failed:
+            self._record_failure()
+        elif self.probing:
+            cache.delete_many([self._key('open_until'), self._key('failures'), self._key('probe')])
+        return False
+
+    def _check_breaker(self):
+        open_until = cache.get(self._key('open_until'))
+        if open_until is None:
+            return
+
+        remaining = open_until - time.time()
+        if remaining > 0:
+            raise N8NUnavailable(math.ceil(remaining))
+
+        # Half-open: let one request through to find out whether n8n has recovered.
+        probe_timeout = self.config['connect_timeout'] + self.config['read_timeout']
+        if not cache.add(self._key('probe'), 1, timeout=probe_timeout):
+            raise N8NUnavailable(settings.N8N_BREAKER_RESET_SECONDS)
+        self.probing = True
+
+    def _record_failure(self):
+        failures = _incr(self._key('failures'), timeout=settings.N8N_BREAKER_WINDOW_SECONDS)
+        if self.probing or failures >= settings.N8N_BREAKER_FAILURE_THRESHOLD:
+            cache.set(self._key('open_until'), time.time() + settings.N8N_BREAKER_RESET_SECONDS, timeout=None)
+            cache.delete_many([self._key('failures'), self._key('probe')])
+
+    def _acquire_slot(self):
+        # Every acquire pushes the counter's expiry to twice the longest call from now, so it can't expire
+        # while a call is in flight, yet slots leaked by a killed worker are freed once the endpoint is idle.
+        slot_timeout = 2 * (self.config['connect_timeout'] + self.config['read_timeout'])
+        in_flight = _incr(self._key('in_flight'), timeout=slot_timeout)
+        cache.touch(self._key('in_flight'), slot_timeout)
+        if in_flight > self.config['max_concurrency']:
+            self._release_slot()
+            raise N8NUnavailable(1, 'The AI service is busy. Please try again shortly.')
+
+    def _release_slot(self):
+        try:
+            in_flight = cache.decr(self._key('in_flight'))
+        except ValueError:
+            # The counter expired (the endpoint was idle for longer than a call can take): nothing to free.
+            return
+        if in_flight < 0:
+            # Clamp at zero without losing slots taken or freed concurrently.
+            cache.incr(self._key('in_flight'), -in_flight)
+
+
+def post(endpoint, **kwargs):
+    """
+    POSTs to the configured n8n webhook using the endpoint's pooled session and timeouts.
+    Accepts the same keyword arguments as `requests.post`, and raises `N8NUnavailable`
+    without calling n8n when the endpoint's breaker is open or its concurrency cap is reached.
+    """
+    kwargs.setdefault('timeout', get_timeout(endpoint))
+    with GuardedCall(endpoint) as call:
+        response = get_session(endpoint).post(settings.N8N_ENDPOINTS[endpoint]['url'], **kwargs)
+        call.record(response.status_code)
+    return response
+
+
+def post_multipart(endpoint, fields=None, files=None, **kwargs):
+    """
+    POSTs form fields and files as multipart/form-data. The body is streamed from the
+    files in chunks instead of being encoded into memory first (see `MultipartStream`).
+    """
+    body = MultipartStream(fields, files)
+    headers = {**kwargs.pop('headers', {}), 'Content-Type': body.content_type}
+    return post(endpoint, data=body, headers=headers, **kwargs)
+
+
+async def apost(endpoint, **kwargs):
+    """Async counterpart of `post`. Accepts the same keyword arguments as `httpx.AsyncClient.post`."""
+    async with GuardedCall(endpoint) as call:
+        response = await get_async_client(endpoint).post(settings.N8N_ENDPOINTS[endpoint]['url'], **kwargs)
+        call.record(response.status_code)
+    return response
+
+
+async def apost_multipart(endpoint, fields=None, files=None, **kwargs):
+    """
+    Async counterpart of `post_multipart`, streaming the same `MultipartStream` body. Its chunks are
+    read from the files in a worker thread, since uploads may be spooled to disk.
+    """
+    body = MultipartStream(fields, files)
+
+    async def content():
+        chunks, done = body.iter_chunks(), object()
+        while (chunk := await sync_to_async(next, thread_sensitive=False)(chunks, done)) is not done:
+            yield chunk
+
+    headers = {
+        **kwargs.pop('headers', {}),
+        'Content-Type': body.content_type,
+        'Content-Length': str(len(body)),
+    }
+    return await apost(endpoint, content=content(), headers=headers, **kwargs)
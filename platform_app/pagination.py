@@ -0,0 +1,82 @@
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class InterviewHistoryPagination(CursorPagination):
+    """
+    Latest interview date first, and the latest booking first within a date; interviews without a
+    date come last. Cursors stay stable while interviews are added and skip the COUNT query.
+
+    The queryset is ordered on the `date` and `id` columns themselves, so `interview_profile_date_idx`
+    serves the ordering. DRF's cursor only keeps the position of the first ordering field, which
+    can't be NULL, so the cursor here keeps the whole `(date, id)` key of the row a page ends at and
+    the next page starts right after it. This relies on MySQL and SQLite sorting NULLs first in
+    ascending and last in descending order.
+    """
+    ordering = ('-date', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        key = self._decode_key(self.cursor.position) if self.cursor is not None else None
+
+        # Backwards, the rows before the key, nearest first.
+        queryset = queryset.order_by(*(('date', 'id') if reverse else self.ordering))
+        if key is not None:
+            queryset = queryset.filter(self._before(*key) if reverse else self._after(*key))
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+
+        self.has_next = bool(self.page) and (key is not None if reverse else has_more)
+        self.has_previous = bool(self.page) and (has_more if reverse else key is not None)
+        self.display_page_controls = self.template is not None and (self.has_next or self.has_previous)
+        return self.page
+
+    @staticmethod
+    def _after(day, pk):
+        """The rows after `(day, pk)` in the page order."""
+        if day is None:
+            return Q(date__isnull=True, id__lt=pk)
+        return Q(date__lt=day) | Q(date=day, id__lt=pk) | Q(date__isnull=True)
+
+    @staticmethod
+    def _before(day, pk):
+        """The rows before `(day, pk)` in the page order."""
+        if day is None:
+            return Q(date__isnull=False) | Q(date__isnull=True, id__gt=pk)
+        return Q(date__gt=day) | Q(date=day, id__gt=pk)
+
+    @staticmethod
+    def _encode_key(interview):
+        return f"{interview.date.isoformat() if interview.date else ''}|{interview.pk}"
+
+    def _decode_key(self, position):
+        if position is None:
+            return None
+        try:
+            day, pk = position.split('|')
+            return (date.fromisoformat(day) if day else None), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._encode_key(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self._encode_key(self.page[0])))
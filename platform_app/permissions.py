@@ -0,0 +1,17 @@
+import hmac
+
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+
+class HasN8NWebhookSecret(BasePermission):
+    """
+    Allows requests from n8n that carry the shared `N8N_WEBHOOK_SECRET` in the X-N8N-Secret header.
+    Everything is rejected while the secret is not configured.
+    """
+    message = 'Invalid webhook secret.'
+
+    def has_permission(self, request, view):
+        secret = settings.N8N_WEBHOOK_SECRET
+        provided = request.headers.get('X-N8N-Secret', '')
+        return bool(secret) and hmac.compare_digest(provided.encode(), secret.encode())
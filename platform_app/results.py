@@ -0,0 +1,211 @@
+"""
+Result readiness signal. Set when n8n delivers a result through the webhook, so clients can
+wait on a cheap cache lookup instead of repeatedly fetching the full result.
+
+Starting the result workflow is single-flight per interview: `claim_result_generation` lets
+only one trigger through while a run is in progress.
+
+Once an interview has a result, its get-result payload is kept in the cache as a gzipped JSON
+snapshot with a digest for the ETag, so repeat views read one aggregate row instead of the whole
+result and skip serialization. Snapshots are versioned: `invalidate_result_snapshot` (called from
+the model signals and the result webhook) gives the interview a new version, so a snapshot built
+from data read before the change is never served. n8n writes its rows directly, which sends no
+signals, so each snapshot also records a stamp of the rows as stored (the result's
+`generated_at`, the interview's status, and the count and latest timestamp of its questions and
+answers) and is only served while the database still gives the same stamp.
+"""
+import asyncio
+import gzip
+import hashlib
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from rest_framework.renderers import JSONRenderer
+
+from . import metrics
+from .models import Answers, Interviews, Questions, Results
+from .serializers import AnswerSerializer, InterviewSerializer, QuestionSerializer, ResultSerializer
+
+RESULT_READY_TIMEOUT = 24 * 60 * 60
+# Results written to the database by n8n directly are picked up after at most this many seconds.
+RESULT_PENDING_TIMEOUT = 5
+
+
+def _ready_key(interview_id):
+    return f'interview_result_ready_{interview_id}'
+
+
+def mark_result_ready(interview_id):
+    cache.set(_ready_key(interview_id), True, timeout=RESULT_READY_TIMEOUT)
+
+
+def is_result_ready(interview_id):
+    ready = cache.get(_ready_key(interview_id))
+    metrics.record_cache_lookup('result_ready', ready is not None)
+    if ready is None:
+        ready = Results.objects.filter(interview_id=interview_id).exists()
+        cache.set(_ready_key(interview_id), ready,
+                  timeout=RESULT_READY_TIMEOUT if ready else RESULT_PENDING_TIMEOUT)
+    return ready
+
+
+def _owner_key(interview_id):
+    return f'interview_owner_{interview_id}'
+
+
+def get_interview_owner(interview_id):
+    """
+    The id of the user the interview belongs to, or None for unknown interviews. Cached, as owners
+    don't change and result polling checks it on every request.
+    """
+    owner = cache.get(_owner_key(interview_id))
+    metrics.record_cache_lookup('interview_owner', owner is not None)
+    if owner is None:
+        owner = Interviews.objects.filter(pk=interview_id).values_list('user_profile__user', flat=True).first()
+        if owner is not None:
+            cache.set(_owner_key(interview_id), owner, timeout=RESULT_READY_TIMEOUT)
+    return owner
+
+
+def _generation_key(interview_id):
+    return f'interview_result_generating_{interview_id}'
+
+
+def claim_result_generation(interview_id):
+    """
+    Returns True for the one caller that should start the interview's result workflow, and False
+    while another run was started less than `RESULT_GENERATION_LOCK_SECONDS` ago.
+    """
+    return cache.add(_generation_key(interview_id), True, timeout=settings.RESULT_GENERATION_LOCK_SECONDS)
+
+
+def release_result_generation(interview_id):
+    """Lets the next trigger start the workflow again, e.g. after it failed to start."""
+    cache.delete(_generation_key(interview_id))
+
+
+def get_result_data(interview_id):
+    """The get-result payload of an interview. Raises `Interviews.DoesNotExist`."""
+    interview = Interviews.objects.select_related('results').get(id=interview_id)
+    questions = Questions.objects.filter(interview_id=interview_id)
+    answers = Answers.objects.filter(question__interview_id=interview_id)
+    try:
+        result_data = ResultSerializer(interview.results).data
+    except Results.DoesNotExist:
+        result_data = None
+    return {
+        "interview": InterviewSerializer(interview).data,
+        "result": result_data,
+        "questions": QuestionSerializer(questions, many=True).data,
+        "answers": AnswerSerializer(answers, many=True).data,
+    }
+
+
+def _snapshot_key(interview_id):
+    return f'interview_result_snapshot_{interview_id}'
+
+
+def _snapshot_version_key(interview_id):
+    return f'interview_result_snapshot_version_{interview_id}'
+
+
+def _stamp(interview_id):
+    """What the snapshot of an interview is built from, as stored; one aggregate query."""
+    stamp = Interviews.objects.filter(pk=interview_id).aggregate(
+        interview_status=Max('status'), generated_at=Max('results__generated_at'),
+        question_count=Count('questions', distinct=True), last_question=Max('questions__created_at'),
+        answer_count=Count('questions__answers'), last_answer=Max('questions__answers__submitted_at'),
+    )
+    return [stamp[field] for field in sorted(stamp)]
+
+
+def load_result(interview_id):
+    """
+    Returns `(snapshot, None)` for an interview with a result, building the snapshot if needed,
+    and `(None, data)` while it has none. A snapshot is a dict with the gzipped JSON `body` and
+    the `digest` of the uncompressed JSON. Raises `Interviews.DoesNotExist`.
+    """
+    snapshot_key, version_key = _snapshot_key(interview_id), _snapshot_version_key(interview_id)
+    cached = cache.get_many([snapshot_key, version_key])
+    version = cached.get(version_key)
+    snapshot = cached.get(snapshot_key)
+    stamp = _stamp(interview_id)
+    hit = snapshot is not None and version is not None and snapshot['version'] == version \
+        and snapshot['stamp'] == stamp
+    metrics.record_cache_lookup('result_snapshot', hit)
+    if hit:
+        return snapshot, None
+
+    if version is None:
+        cache.add(version_key, uuid.uuid4().hex, timeout=settings.RESULT_SNAPSHOT_TTL)
+        version = cache.get(version_key)
+    # Read after the version and the stamp, so data changed meanwhile is stored under ones already replaced.
+    data = get_result_data(interview_id)
+    if data['result'] is None:
+        return None, data
+
+    content = JSONRenderer().render(data)
+    snapshot = {
+        'version': version,
+        'stamp': stamp,
+        'digest': hashlib.sha256(content).hexdigest(),
+        'body': gzip.compress(content),
+    }
+    cache.set(snapshot_key, snapshot, timeout=settings.RESULT_SNAPSHOT_TTL)
+    return snapshot, None
+
+
+def invalidate_result_snapshot(interview_id):
+    cache.set(_snapshot_version_key(interview_id), uuid.uuid4().hex, timeout=settings.RESULT_SNAPSHOT_TTL)
+    cache.delete(_snapshot_key(interview_id))
+
+
+class _ResultWatch:
+    """
+    Polls the readiness flag for one interview on behalf of every client in this process that
+    waits for it, and stops once the result is ready or nobody is waiting any more.
+    """
+
+    def __init__(self, interview_id):
+        self.interview_id = interview_id
+        self.ready = asyncio.Event()
+        self.waiters = 0
+        self.task = asyncio.create_task(self._poll())
+
+    async def _poll(self):
+        try:
+            # Not on the shared sync thread: every watch of the process polls, and they'd queue behind each other.
+            while not await sync_to_async(is_result_ready, thread_sensitive=False)(self.interview_id):
+                await asyncio.sleep(settings.RESULT_EVENTS_POLL_SECONDS)
+            self.ready.set()
+        finally:
+            if _watches.get(self.interview_id) is self:
+                del _watches[self.interview_id]
+
+
+_watches = {}
+
+
+async def wait_for_result(interview_id, timeout):
+    """Waits up to `timeout` seconds for the interview's result. Returns whether it is ready."""
+    watch = _watches.get(interview_id)
+    if watch is None:
+        watch = _watches[interview_id] = _ResultWatch(interview_id)
+
+    watch.waiters += 1
+    try:
+        await asyncio.wait_for(watch.ready.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return watch.ready.is_set()
+    finally:
+        watch.waiters -= 1
+        if not watch.waiters and not watch.ready.is_set():
+            # Unregistered right away: the cancelled task only ends later, and a client arriving
+            # meanwhile must start a new watch rather than wait on this one.
+            if _watches.get(interview_id) is watch:
+                del _watches[interview_id]
+            watch.task.cancel()
@@ -1,9 +1,22 @@
 # schemas.py
-from drf_spectacular.utils import OpenApiExample, OpenApiResponse, inline_serializer
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiExample, OpenApiParameter, OpenApiResponse, inline_serializer
 from rest_framework import serializers
 
 from platform_app.serializers import InterviewSerializer, ResultSerializer, QuestionSerializer, AnswerSerializer, \
-    ScheduleSerializer, AvailableScheduleSerializer, UserProfileSerializer, CVScreeningReportSerializer
+    ScheduleSerializer, AvailableScheduleSerializer, UserProfileSerializer, CVScreeningReportSerializer, \
+    CVScreeningJobSerializer, ResultWebhookSerializer, ResultDocumentSerializer
+
+IdempotencyKeyParameter = OpenApiParameter(
+    name='Idempotency-Key',
+    location=OpenApiParameter.HEADER,
+    required=False,
+    description="Unique key for this submission. Retries with the same key replay the first response "
+                "(marked with `Idempotent-Replayed: true`) instead of being processed again. A retry sent "
+                "while the first request is still running waits a few seconds for its response; if it is still "
+                "running by then, the retry gets a 409 with Retry-After. Reusing the key for a different request "
+                "gets a 422.",
+)
 
 """
 # ===================================================================
@@ -103,7 +116,9 @@ RegisterSchema = {
 SubmitScreenerSchema = {
     "tags": ["User: Interview Scheduling"],
     "summary": "Submit screener and schedule an interview",
-    "description": "Submits interview details and a CV file to schedule an interview.",
+    "description": "Submits interview details and a CV file to schedule an interview. A seat of the chosen "
+                   "schedule is held while the booking is made, so a full schedule is refused with 409.",
+    "parameters": [IdempotencyKeyParameter],
     "request": {
         'multipart/form-data': {
             'type': 'object',
@@ -120,13 +135,16 @@ SubmitScreenerSchema = {
         200: OpenApiResponse(description="Interview successfully scheduled."),
         400: OpenApiResponse(description="Invalid or missing data."),
         404: OpenApiResponse(description="User profile not found."),
+        409: OpenApiResponse(description="The schedule is fully booked on that date."),
+        503: OpenApiResponse(description="The screener service is unavailable; retry after the Retry-After header."),
     }
 }
 
 GetAvailableScheduleSchema = {
     "tags": ["User: Interview Scheduling"],
     "summary": "Get available interview schedules",
-    "description": "Retrieves available interview slots for a given date.",
+    "description": "Retrieves available interview slots for a given date. Booked sessions exclude cancelled "
+                   "interviews; the remaining capacity is the schedule's capacity minus the booked sessions.",
     "responses": {
         200: AvailableScheduleSerializer,
         400: OpenApiResponse(description="Date field is required or invalid."),
@@ -134,6 +152,30 @@ GetAvailableScheduleSchema = {
     }
 }
 
+GetAvailableCalendarSchema = {
+    "tags": ["User: Interview Scheduling"],
+    "summary": "Get available interview schedules for a range of dates",
+    "description": "Retrieves the slots of every date from `start_date` to `end_date` (inclusive, 30 days by "
+                   "default, at most `AVAILABILITY_CALENDAR_MAX_DAYS`) with their booked sessions and remaining "
+                   "capacity, plus the total remaining capacity per date for a calendar view.",
+    "parameters": [
+        OpenApiParameter(name='start_date', type=OpenApiTypes.DATE, required=True, description="First date."),
+        OpenApiParameter(name='end_date', type=OpenApiTypes.DATE, description="Last date."),
+    ],
+    "responses": {
+        200: inline_serializer(
+            name='AvailabilityCalendarDate',
+            many=True,
+            fields={
+                'date': serializers.DateField(),
+                'remaining_capacity': serializers.IntegerField(),
+                'schedules': AvailableScheduleSerializer(many=True),
+            }
+        ),
+        400: OpenApiResponse(description="Dates are missing, invalid or too far apart."),
+    }
+}
+
 """
 # ===================================================================
 # 🎙️ User: Interview Management
@@ -165,18 +207,22 @@ InterviewsSchema = {
 StartResultSchema = {
     "tags": ["User: Results & Statistics"],
     "summary": "Start Final Result Analysis",
-    "description": "Triggers the final analysis process for a completed interview.",
+    "description": "Triggers the final analysis process for a completed interview. Repeated calls are safe: while "
+                   "an analysis is running, or once the result is available, no new analysis is started.",
     "request": inline_serializer(name='StartResultRequest', fields={'interview_id': serializers.IntegerField()}),
     "responses": {
-        200: OpenApiResponse(description="Result analysis started."),
+        200: OpenApiResponse(description="Result analysis started, already in progress, or the result is already available."),
         400: OpenApiResponse(description="Interview ID is required."),
+        503: OpenApiResponse(description="The result service is unavailable; retry after the Retry-After header."),
     }
 }
 
 GetResultSchema = {
     "tags": ["User: Results & Statistics"],
     "summary": "Get Complete Interview Result",
-    "description": "Retrieves the full results for a specific interview.",
+    "description": "Retrieves the full results for a specific interview. Once the result is available the "
+                   "response carries a strong `ETag`; send it back in `If-None-Match` to get a 304 while "
+                   "the result is unchanged.",
     "responses": {
         200: OpenApiResponse(
             response=inline_serializer(
@@ -189,10 +235,60 @@ GetResultSchema = {
                 }
             )
         ),
+        304: OpenApiResponse(description="The result matches the ETag sent in If-None-Match."),
+        404: OpenApiResponse(description="Interview not found."),
+    }
+}
+
+ResultDocumentSchema = {
+    "tags": ["User: Results & Statistics"],
+    "summary": "Get Interview Result Document",
+    "description": "Retrieves one of the user's interviews with its result and its questions in order, each "
+                   "with its answers nested. Loaded with a fixed number of queries however many questions "
+                   "the interview has.",
+    "responses": {
+        200: ResultDocumentSerializer,
+        404: OpenApiResponse(description="Interview not found."),
+    }
+}
+
+ResultStatusSchema = {
+    "tags": ["User: Results & Statistics"],
+    "summary": "Check Whether an Interview Result Is Ready",
+    "description": "Cheap readiness check to wait on after starting result analysis. Fetch the full result from "
+                   "`/api/get-result/{interview_id}` once `ready` is true.",
+    "responses": {
+        200: OpenApiResponse(
+            response=inline_serializer(
+                name='ResultStatusResponse',
+                fields={'interview_id': serializers.IntegerField(), 'ready': serializers.BooleanField()}
+            )
+        ),
         404: OpenApiResponse(description="Interview not found."),
     }
 }
 
+"""
+# ===================================================================
+# 🔗 n8n Webhooks
+# ===================================================================
+"""
+
+ResultWebhookSchema = {
+    "tags": ["n8n Webhooks"],
+    "summary": "Deliver a Generated Interview Result",
+    "description": "Called by the n8n result workflow when a result is ready. Creates or updates the interview's "
+                   "result and marks the interview as completed. Requires the shared secret in the "
+                   "`X-N8N-Secret` header.",
+    "request": ResultWebhookSerializer,
+    "responses": {
+        200: ResultSerializer,
+        201: ResultSerializer,
+        400: OpenApiResponse(description="Invalid result data or unknown interview."),
+        403: OpenApiResponse(description="Missing or invalid webhook secret."),
+    }
+}
+
 """
 # ===================================================================
 # ⚠️ Deprecated
@@ -260,19 +356,27 @@ GetAverageScoreSchema = {
 
 CameraAnalysisSchema = {
     # "tags": ["User: Live Interview Actions"],
-    "summary": "Upload Image for Camera Analysis",
-    "description": "Uploads an image during an interview for real-time analysis.",
+    "summary": "Upload Images for Camera Analysis",
+    "description": "Uploads one or more camera frames taken during an interview. Frames are buffered and analysed "
+                   "in batches; the results are stored with the interview. Until the batch workflow is "
+                   "configured, frames are forwarded one by one during the request and the response is a 200.",
     "request": {
         'multipart/form-data': {
             'type': 'object',
-            'properties': {'image': {'type': 'string', 'format': 'binary'}, 'interview_id': {'type': 'integer'}},
-            'required': ['image', 'interview_id']
+            'properties': {
+                'image': {'type': 'string', 'format': 'binary'},
+                'images': {'type': 'array', 'items': {'type': 'string', 'format': 'binary'}},
+                'interview_id': {'type': 'integer'}
+            },
+            'required': ['interview_id']
         }
     },
     "responses": {
-        200: OpenApiResponse(description="Image received for analysis."),
-        400: OpenApiResponse(description="No image file provided."),
-        502: OpenApiResponse(description="Analysis service could not be reached."),
+        200: OpenApiResponse(description="Images forwarded for analysis (single-frame workflow)."),
+        202: OpenApiResponse(description="Images received for analysis."),
+        400: OpenApiResponse(description="No image file or interview ID provided."),
+        404: OpenApiResponse(description="Interview not found."),
+        502: OpenApiResponse(description="The analysis service could not be reached (single-frame workflow)."),
     }
 }
 
@@ -296,6 +400,7 @@ CVScreeningSchema = {
     "tags": ["User: CV Screening"],
     "summary": "Submit CV for Screening",
     "description": "Uploads a CV file for AI analysis. The system processes it synchronously and returns a detailed screening report.",
+    "parameters": [IdempotencyKeyParameter],
     "request": {
         'multipart/form-data': {
             'type': 'object',
@@ -310,6 +415,51 @@ CVScreeningSchema = {
         400: OpenApiResponse(description="No CV file was provided."),
         502: OpenApiResponse(description="Bad Gateway: The AI analysis service returned an error."),
         504: OpenApiResponse(description="Gateway Timeout: The AI analysis service could not be reached."),
+        503: OpenApiResponse(description="Service Unavailable: The AI analysis service is failing or busy; retry after the Retry-After header."),
         500: OpenApiResponse(description="Internal Server Error: The data returned by the AI service was invalid."),
     }
 }
+
+CVScreeningJobSchema = {
+    "tags": ["User: CV Screening"],
+    "summary": "Queue CV for Screening",
+    "description": "Stores the uploaded CV and queues it for AI analysis. Returns immediately with a job that can be "
+                   "polled at `/api/cv-screening/jobs/{id}`; once completed the job contains the screening report.",
+    "parameters": [IdempotencyKeyParameter],
+    "request": {
+        'multipart/form-data': {
+            'type': 'object',
+            'properties': {
+                'cv': {'type': 'string', 'format': 'binary'}
+            },
+            'required': ['cv']
+        }
+    },
+    "responses": {
+        202: CVScreeningJobSerializer,
+        400: OpenApiResponse(description="No CV file was provided."),
+    }
+}
+
+CVScreeningBatchSchema = {
+    "tags": ["User: CV Screening"],
+    "summary": "Screen a Batch of CVs",
+    "description": "Screens several CVs at once, uploaded as multiple `cvs` files and/or a zip `archive`. The response "
+                   "is streamed as newline-delimited JSON: one line per file as soon as it is screened, with "
+                   "`status` `completed` (and the new `report`) or `failed` (and an `error`), followed by a final "
+                   "line with `status` `done` and the totals.",
+    "request": {
+        'multipart/form-data': {
+            'type': 'object',
+            'properties': {
+                'cvs': {'type': 'array', 'items': {'type': 'string', 'format': 'binary'}},
+                'archive': {'type': 'string', 'format': 'binary', 'description': 'A zip file of CVs.'}
+            }
+        }
+    },
+    "responses": {
+        (200, 'application/x-ndjson'): OpenApiResponse(description="Per-file progress, one JSON object per line."),
+        400: OpenApiResponse(description="No CV files were provided, too many files, or the archive is not a zip file."),
+        413: OpenApiResponse(description="The upload, the archive or one of its files is too large."),
+    }
+}
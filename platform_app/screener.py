@@ -0,0 +1,39 @@
+"""
+Helpers shared by the sync and async interview booking (screener) views.
+"""
+
+SCREENER_FIELDS = ['schedule_id', 'date', 'posisi', 'industri', 'nama_perusahaan', 'tingkatan',
+                   'jenis_wawancara', 'detail_pekerjaan', 'package']
+OPTIONAL_SCREENER_FIELDS = ['nama_perusahaan']
+
+
+def build_screener_payload(data, user_profile):
+    """
+    Builds the form fields sent to the n8n screener from the request data.
+    Returns None when a required field is missing or empty.
+    """
+    n8n_data_payload = {'user_profile_id': user_profile.id}
+    n8n_data_payload.update({field: data.get(field) for field in SCREENER_FIELDS})
+
+    if any(value is None or value == '' for key, value in n8n_data_payload.items()
+           if key not in OPTIONAL_SCREENER_FIELDS):
+        return None
+    return n8n_data_payload
+
+
+def format_screener_response(n8n_data):
+    """Shapes the n8n booking confirmation for the client. Returns None without a booking code."""
+    booking_code = n8n_data.get('booking_code')
+    if not booking_code:
+        return None
+
+    return {
+        "status": n8n_data['status'],
+        "message": n8n_data['message'],
+        "date": n8n_data.get('date'),
+        "start_time": n8n_data.get('start_time')[:8],
+        "end_time": n8n_data.get('end_time')[:8],
+        "posisi": n8n_data.get('posisi'),
+        "jenis_wawancara": n8n_data.get('jenis_wawancara'),
+        "booking_code": booking_code
+    }
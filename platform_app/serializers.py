@@ -1,8 +1,10 @@
 from allauth.socialaccount.models import SocialAccount
 from django.contrib.auth.models import User
-from platform_app.models import Interviews, Schedules, UserProfiles, Results, Questions, Answers, CVScreeningReport
+from platform_app.models import Interviews, Schedules, UserProfiles, Results, Questions, Answers, CVScreeningReport, \
+    CVScreeningJob, CameraAnalysis
 from rest_framework import serializers, validators
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from dj_rest_auth.models import TokenModel
 
 
@@ -47,6 +49,16 @@ class InterviewSerializer(serializers.ModelSerializer):
 
 
 
+class InterviewListSerializer(serializers.ModelSerializer):
+    """Interview history entry; the long free-text fields are only on the detail view."""
+    final_score = serializers.IntegerField(source='results.final_score', read_only=True, allow_null=True)
+
+    class Meta:
+        model = Interviews
+        fields = ['id', 'date', 'schedule', 'booking_code', 'package', 'status', 'tingkatan', 'jenis_wawancara',
+                  'posisi', 'industri', 'nama_perusahaan', 'skor_keseluruhan', 'final_score']
+
+
 # Add this new serializer at the bottom
 class ScheduleSerializer(serializers.ModelSerializer):
     class Meta:
@@ -108,6 +120,20 @@ class ResultSerializer(serializers.ModelSerializer):
         model = Results
         fields = '__all__'
 
+class ResultWebhookSerializer(serializers.ModelSerializer):
+    interview_id = serializers.IntegerField()
+    generated_at = serializers.DateTimeField(default=timezone.now)
+
+    class Meta:
+        model = Results
+        exclude = ['interview']
+
+    def validate_interview_id(self, value):
+        if not Interviews.objects.filter(pk=value).exists():
+            raise serializers.ValidationError("Interview not found.")
+        return value
+
+
 class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Questions
@@ -119,6 +145,24 @@ class AnswerSerializer(serializers.ModelSerializer):
         fields = ['id', 'question_id', 'answer']
 
 
+class ResultDocumentQuestionSerializer(serializers.ModelSerializer):
+    answers = AnswerSerializer(source='answers_set', many=True, read_only=True)
+
+    class Meta:
+        model = Questions
+        fields = ['id', 'n8n_id', 'question', 'created_at', 'answers']
+
+
+class ResultDocumentSerializer(serializers.Serializer):
+    """
+    An interview with its result and questions, each question with its answers. Expects an
+    interview loaded with `results` and prefetched `questions_set__answers_set`.
+    """
+    interview = InterviewSerializer(source='*', read_only=True)
+    result = ResultSerializer(source='results', read_only=True, allow_null=True)
+    questions = ResultDocumentQuestionSerializer(source='questions_set', many=True, read_only=True)
+
+
 class UserProfilesSerializer(serializers.ModelSerializer):
     user = serializers.IntegerField(source='user.id', read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
@@ -150,3 +194,16 @@ class CVScreeningReportSerializer(serializers.ModelSerializer):
         # Exclude fields that are handled automatically
         exclude = ('user', 'created_at')
 
+
+class CameraAnalysisSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CameraAnalysis
+        exclude = ('interview', 'created_at')
+
+
+class CVScreeningJobSerializer(serializers.ModelSerializer):
+    report = CVScreeningReportSerializer(read_only=True)
+
+    class Meta:
+        model = CVScreeningJob
+        fields = ['id', 'status', 'file_name', 'attempts', 'report', 'error', 'created_at', 'updated_at']
@@ -0,0 +1,70 @@
+"""
+Keeps cached data derived from the models in step with them. Handlers only run for saves and
+deletes through the ORM; `QuerySet.update()` and `bulk_create()` don't send these signals.
+"""
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .activity import record_activity
+from .availability import invalidate_all_availability, refresh_slot
+from .models import Answers, Interviews, Questions, Results, Schedules, SlotAvailability
+from .results import invalidate_result_snapshot
+
+
+def _invalidate_result_snapshot_on_commit(interview_id):
+    # After commit, so a snapshot rebuilt in between can't be built from the old rows.
+    transaction.on_commit(lambda: invalidate_result_snapshot(interview_id))
+
+
+@receiver([post_save, post_delete], sender=Interviews)
+def interview_changed(sender, instance, **kwargs):
+    _invalidate_result_snapshot_on_commit(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Results)
+@receiver([post_save, post_delete], sender=Questions)
+def result_or_question_changed(sender, instance, **kwargs):
+    _invalidate_result_snapshot_on_commit(instance.interview_id)
+
+
+@receiver([post_save, post_delete], sender=Answers)
+def answer_changed(sender, instance, **kwargs):
+    interview_id = Questions.objects.filter(pk=instance.question_id).values_list('interview_id', flat=True).first()
+    if interview_id is not None:
+        _invalidate_result_snapshot_on_commit(interview_id)
+
+
+@receiver(pre_save, sender=Interviews)
+def remember_interview_slot(sender, instance, **kwargs):
+    # The slot an interview is moved out of needs recounting as well.
+    instance._previous_slot = None
+    if instance.pk is not None:
+        instance._previous_slot = Interviews.objects.filter(pk=instance.pk).values_list('schedule_id', 'date').first()
+
+
+@receiver([post_save, post_delete], sender=Interviews)
+def interview_slot_changed(sender, instance, **kwargs):
+    slots = {(instance.schedule_id, instance.date), getattr(instance, '_previous_slot', None)}
+    for schedule_id, date in filter(None, slots):
+        if schedule_id is not None and date is not None:
+            transaction.on_commit(lambda schedule_id=schedule_id, date=date: refresh_slot(schedule_id, date))
+
+
+@receiver([post_save, post_delete], sender=Schedules)
+def schedule_changed(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_all_availability)
+
+
+@receiver(post_save, sender=Schedules)
+def schedule_capacity_changed(sender, instance, **kwargs):
+    # Holds are claimed against the slot rows' own copy of the capacity.
+    SlotAvailability.objects.filter(schedule=instance).exclude(capacity=instance.capacity) \
+        .update(capacity=instance.capacity)
+
+
+@receiver(user_logged_in)
+def user_logged_in_activity(sender, request, user, **kwargs):
+    # Logins count as activity too, e.g. on the admin site, which doesn't use tokens.
+    record_activity(user.pk)
@@ -0,0 +1,345 @@
+"""
+Benchmarks of the slow paths: the n8n-bound ones against fake, slow n8n workflows, and the
+aggregates over large tables. They are left out of the test run (the module name doesn't match
+`test*.py`); run them on their own with
+
+    python manage.py test platform_app.tests.benchmarks
+
+Each prints its figures and checks the property it is about, with generous margins.
+"""
+import io
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import date, time as clock, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+import requests
+
+from admin_app import growth
+from platform_app import availability, cv_screening, n8n
+from platform_app.models import CVScreeningJob, Interviews, Schedules, UserProfiles
+from platform_app.tests.test_cv_screening import ANALYSIS
+from platform_app.tests.test_n8n import StubServer, endpoint_config
+
+N8N_LATENCY = 0.5
+
+
+def percentiles(samples):
+    """`(p50, p99)` of the samples, in milliseconds."""
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return cuts[49] * 1000, cuts[98] * 1000
+
+
+def report(title, rows):
+    print(f"\n{title}")
+    for label, samples in rows:
+        p50, p99 = percentiles(samples)
+        print(f"  {label:<40} p50 {p50:8.1f} ms   p99 {p99:8.1f} ms   ({len(samples)} calls)")
+
+
+def timed(call, count):
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def timed_concurrently(call, threads, count):
+    """Runs `timed(call, count)` in each of `threads` threads at once; returns all samples."""
+    samples = []
+    errors = []
+    barrier = threading.Barrier(threads)
+
+    def run():
+        try:
+            barrier.wait()
+            samples.extend(timed(call, count))
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if errors:
+        raise errors[0]
+    return samples
+
+
+class N8NClientBenchmark(SimpleTestCase):
+    """Per-call latency of a fresh connection per call against the pooled n8n sessions."""
+    threads = 8
+    calls = 50
+
+    def setUp(self):
+        cache.clear()
+        # A workflow answering within a few milliseconds behind a 20 ms handshake, so setup is what differs.
+        self.server = StubServer(latency=0.005, handshake=0.02)
+        self.addCleanup(self.server.close)
+
+    def test_pooled_sessions_save_the_connection_setup(self):
+        config = endpoint_config(self.server.url, pool_size=self.threads, max_concurrency=self.threads)
+        with override_settings(N8N_ENDPOINTS={'benchmark': config}), mock.patch.dict(n8n._sessions, clear=True):
+            fresh = timed_concurrently(lambda: requests.post(self.server.url, json={}, timeout=(1, 5)),
+                                       self.threads, self.calls)
+            connections = len(self.server.connections)
+            pooled = timed_concurrently(lambda: n8n.post('benchmark', json={}), self.threads, self.calls)
+
+        report(f"n8n calls from {self.threads} threads, {self.server.handshake * 1000:.0f} ms per new connection", [
+            (f'fresh connection per call ({connections} opened)', fresh),
+            (f'pooled session ({len(self.server.connections) - connections} opened)', pooled),
+        ])
+        self.assertLessEqual(len(self.server.connections) - connections, self.threads)
+        # Fresh connections pay the handshake on every call, pooled ones once per connection.
+        self.assertLess(percentiles(pooled)[0], percentiles(fresh)[0] - self.server.handshake * 1000 / 2)
+
+
+class AvailabilityCalendarBenchmark(TransactionTestCase):
+    """A 60-day calendar built in one go against 60 single-date availability lookups, with a cold cache."""
+    days = 60
+    schedules = 8
+    rounds = 10
+
+    def setUp(self):
+        cache.clear()
+        schedules = Schedules.objects.bulk_create(
+            Schedules(start_time=clock(8 + hour), end_time=clock(9 + hour), capacity=5) for hour in range(self.schedules))
+        profile = UserProfiles.objects.create(user=User.objects.create_user('candidate'))
+        self.start = date(2026, 6, 1)
+        self.dates = [self.start + timedelta(days=offset) for offset in range(self.days)]
+        random.seed(1)
+        Interviews.objects.bulk_create(
+            Interviews(user_profile=profile, schedule=random.choice(schedules), date=random.choice(self.dates),
+                       status=Interviews.StatusField.SCHEDULED)
+            for _ in range(2_000))
+        # Both read the slot rows, which exist once each date has been booked or rebuilt.
+        for day in self.dates:
+            availability.refresh_date(day)
+
+    def cold(self, call):
+        cache.clear()
+        call()
+
+    def test_calendar_window_against_single_dates(self):
+        end = self.dates[-1]
+
+        def calendar():
+            availability.get_availability_calendar(self.start, end)
+
+        def single_dates():
+            for day in self.dates:
+                availability.get_availability(day)
+
+        with CaptureQueriesContext(connection) as calendar_queries:
+            self.cold(calendar)
+        with CaptureQueriesContext(connection) as single_date_queries:
+            self.cold(single_dates)
+        calendar_samples = timed(lambda: self.cold(calendar), self.rounds)
+        single_date_samples = timed(lambda: self.cold(single_dates), self.rounds)
+
+        report(f"Availability of {self.days} dates, {self.schedules} schedules, cold cache", [
+            (f'calendar ({len(calendar_queries)} queries)', calendar_samples),
+            (f'{self.days} single dates ({len(single_date_queries)} queries)', single_date_samples),
+        ])
+        self.assertLess(len(calendar_queries), 5)
+        self.assertLess(percentiles(calendar_samples)[0] * 5, percentiles(single_date_samples)[0])
+
+
+class UserGrowthBenchmark(TransactionTestCase):
+    """The monthly user growth series of a million users joined over five years."""
+    users = 1_000_000
+    days = 5 * 365
+
+    def setUp(self):
+        cache.clear()
+        random.seed(1)
+        now = timezone.now()
+        for first in range(0, self.users, 50_000):
+            User.objects.bulk_create(
+                User(username=f'user{i}', date_joined=now - timedelta(seconds=random.randrange(self.days * 24 * 60 * 60)))
+                for i in range(first, min(first + 50_000, self.users)))
+
+    def test_series_from_rollups_against_grouping_the_users(self):
+        def cold():
+            cache.clear()
+            return growth.get_user_growth('monthly')
+
+        # What every request grouped before the series was cached, and what a cold cache still did before rollups.
+        live = timed(lambda: growth._count_periods('monthly'), 3)
+        backfill = timed(lambda: call_command('rollup_daily_metrics', stdout=io.StringIO()), 1)
+        with CaptureQueriesContext(connection) as cold_queries:
+            series = cold()
+        cold_samples = timed(cold, 10)
+        warm_samples = timed(lambda: growth.get_user_growth('monthly'), 50)
+
+        report(f"Monthly user growth of {self.users:,} users over {self.days} days", [
+            ('grouping auth_user', live),
+            (f'cold cache, from the rollups ({len(cold_queries)} queries)', cold_samples),
+            ('warm cache', warm_samples),
+        ])
+        print(f"  backfilled by the first rollup_daily_metrics run in {backfill[0]:.1f} s")
+        self.assertEqual(sum(point['new_users'] for point in series), self.users)
+        self.assertLess(len(cold_queries), 5)
+        self.assertLess(percentiles(cold_samples)[0] * 20, percentiles(live)[0])
+        self.assertLess(percentiles(warm_samples)[0], percentiles(cold_samples)[0])
+
+
+class ServerModeBenchmark(TransactionTestCase):
+    """
+    Throughput of the CV screening endpoint under gunicorn in each SERVER_MODE, with n8n slow to answer.
+    The servers are started against the test database.
+    """
+    workers = 2
+    clients = 16
+
+    def setUp(self):
+        user = User.objects.create_user('candidate', password='secret')
+        self.token = Token.objects.create(user=user).key
+        self.n8n = StubServer(latency=N8N_LATENCY, body=json.dumps(ANALYSIS).encode())
+        self.addCleanup(self.n8n.close)
+
+    def serve(self, mode):
+        """Starts gunicorn in `mode`; returns its base URL once it accepts connections."""
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        metrics_dir = tempfile.mkdtemp()
+        server = subprocess.Popen(['gunicorn', '--bind', f'127.0.0.1:{port}'], cwd=settings.BASE_DIR, env={
+            **os.environ, 'SERVER_MODE': mode, 'WEB_CONCURRENCY': str(self.workers),
+            'PROMETHEUS_MULTIPROC_DIR': metrics_dir, 'DATABASE_NAME': connection.settings_dict['NAME'],
+            'N8N_CV_SCREENER_URL': self.n8n.url, 'N8N_CV_SCREENER_POOL_SIZE': str(self.clients),
+            'N8N_CV_SCREENER_MAX_CONCURRENCY': str(self.clients),
+        }, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.addCleanup(server.wait)
+        self.addCleanup(server.terminate)
+
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                requests.get(f'http://127.0.0.1:{port}/api/cv-screening/', timeout=5)
+                return f'http://127.0.0.1:{port}'
+            except requests.RequestException:
+                self.assertIsNone(server.poll(), f"gunicorn ({mode}) exited")
+                self.assertLess(time.monotonic(), deadline, f"gunicorn ({mode}) didn't start")
+                time.sleep(0.2)
+
+    def burst(self, base_url):
+        """Posts `clients` different CVs at once; returns the latencies and the time until the last answer."""
+        uploads = iter(range(self.clients))
+
+        def screen():
+            cv = b'%PDF-' + str(next(uploads)).encode() + os.urandom(8)
+            response = requests.post(f'{base_url}/api/cv-screening/', files={'cv': ('cv.pdf', cv, 'application/pdf')},
+                                     headers={'Authorization': f'Token {self.token}'}, timeout=60)
+            self.assertEqual(response.status_code, 201, response.content[:200])
+
+        started = time.perf_counter()
+        samples = timed_concurrently(screen, self.clients, 1)
+        return samples, time.perf_counter() - started
+
+    def test_asgi_workers_hold_many_n8n_calls(self):
+        results = {}
+        for mode in ('wsgi', 'asgi'):
+            url = self.serve(mode)
+            # The first burst warms the workers up (imports, connections, the n8n client pools).
+            self.burst(url)
+            results[mode] = self.burst(url)
+
+        report(f"{self.clients} CV screenings at once, n8n taking {N8N_LATENCY}s, {self.workers} gunicorn workers", [
+            (f'{mode} (all answered in {elapsed:.1f}s)', samples) for mode, (samples, elapsed) in results.items()
+        ])
+        # Sync workers answer `workers` screenings per n8n round trip; async ones all of them in about one.
+        self.assertGreater(results['wsgi'][1], N8N_LATENCY * self.clients / self.workers * 0.9)
+        self.assertLess(results['asgi'][1], results['wsgi'][1] / 3)
+
+
+@override_settings(STORAGES={**settings.STORAGES, 'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'}})
+class CVScreeningQueueBenchmark(TransactionTestCase):
+    """API latency while the CV screening workers are saturated by a slow n8n."""
+    workers = 4
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('candidate', password='secret'))
+        self.uploads = 0
+
+    def slow_n8n(self, cv_file, file_name, content_type):
+        time.sleep(N8N_LATENCY)
+        return ANALYSIS
+
+    def upload(self):
+        # Every upload differs, so none is answered from the result cache.
+        self.uploads += 1
+        return SimpleUploadedFile('cv.pdf', b'%PDF-' + str(self.uploads).encode(), content_type='application/pdf')
+
+    def test_api_latency_stays_flat_while_screening_is_saturated(self):
+        job_id = self.client.post('/api/cv-screening/jobs/', {'cv': self.upload()}).json()['id']
+
+        def poll():
+            self.assertEqual(self.client.get(f'/api/cv-screening/jobs/{job_id}').status_code, 200)
+
+        def enqueue():
+            self.assertEqual(self.client.post('/api/cv-screening/jobs/', {'cv': self.upload()}).status_code, 202)
+
+        idle_polls = timed(poll, 200)
+        idle_enqueues = timed(enqueue, 50)
+
+        stop = threading.Event()
+
+        def work():
+            try:
+                while not stop.is_set():
+                    if not cv_screening.process_next_cv_screening_job():
+                        stop.wait(0.05)
+            finally:
+                connection.close()
+
+        with mock.patch.object(cv_screening, 'request_cv_screening', self.slow_n8n):
+            threads = [threading.Thread(target=work) for _ in range(self.workers)]
+            for thread in threads:
+                thread.start()
+            try:
+                # The queue holds more jobs than the workers get through meanwhile, so they stay busy.
+                busy_polls = timed(poll, 200)
+                busy_enqueues = timed(enqueue, 50)
+            finally:
+                stop.set()
+                for thread in threads:
+                    thread.join()
+            self.assertTrue(CVScreeningJob.objects.filter(status=CVScreeningJob.Status.PENDING).exists(),
+                            "The workers weren't saturated.")
+            blocking = timed(lambda: self.client.post('/api/cv-screening/', {'cv': self.upload()}), 5)
+
+        report(f"CV screening with n8n taking {N8N_LATENCY}s, {self.workers} workers", [
+            ('job status, queue idle', idle_polls),
+            ('job status, workers saturated', busy_polls),
+            ('enqueue job, queue idle', idle_enqueues),
+            ('enqueue job, workers saturated', busy_enqueues),
+            ('blocking screening (before jobs)', blocking),
+        ])
+        for idle, busy in ((idle_polls, busy_polls), (idle_enqueues, busy_enqueues)):
+            # Flat: the API never waits on n8n, only on the database the workers share.
+            self.assertLess(percentiles(busy)[1], percentiles(idle)[1] * 3 + 50)
+            self.assertLess(percentiles(busy)[1], N8N_LATENCY * 1000 / 5)
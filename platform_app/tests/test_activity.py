@@ -0,0 +1,179 @@
+import os
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from platform_app import activity
+
+# Three standard errors of a sketch of 2**14 registers (1.04 / sqrt(2**14), about 0.81%).
+ERROR_BOUND = 3 * 1.04 / 2 ** (activity._PRECISION / 2)
+DAY = date(2026, 6, 1)
+
+
+class FakeRedis:
+    """The HyperLogLog commands of a Redis client, counting exactly."""
+
+    def __init__(self):
+        self.sets = {}
+        self.expiry = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def pfadd(self, key, *values):
+        members = self.sets.setdefault(key, set())
+        size = len(members)
+        members.update(str(value) for value in values)
+        return int(len(members) > size)
+
+    def pfcount(self, *keys):
+        return len(set().union(*(self.sets.get(key, set()) for key in keys)))
+
+    def expire(self, key, seconds):
+        self.expiry[key] = seconds
+
+
+class FakePipeline:
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((getattr(self.client, name), args))
+
+    def execute(self):
+        return [command(*args) for command, args in self.commands]
+
+
+class ActivityTestCase(SimpleTestCase):
+    users_per_day = {DAY: range(5_000), DAY + timedelta(days=1): range(2_500, 9_000)}
+
+    def setUp(self):
+        cache.clear()
+        # Each process records a user once per day; every test starts as a fresh process.
+        for name, value in (('_recorded_day', None), ('_recorded_users', set())):
+            patcher = mock.patch.object(activity, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def record(self, users_per_day):
+        """Records `{day: user ids}`, each day as today."""
+        for day, users in users_per_day.items():
+            with mock.patch.object(activity.timezone, 'localdate', return_value=day):
+                for user_id in users:
+                    activity.record_activity(user_id)
+
+    def counts(self):
+        return [activity.count_active_users(DAY, DAY), activity.count_active_users(DAY, DAY + timedelta(days=1))]
+
+    def assertWithinBound(self, estimate, cardinality):
+        self.assertLessEqual(abs(estimate - cardinality), ERROR_BOUND * cardinality,
+                             f"estimated {estimate} users for {cardinality}")
+
+
+class SketchAccuracyTests(ActivityTestCase):
+
+    def test_estimate_within_error_bound(self):
+        # Linear counting below 2.5 * 2**14 users, the HyperLogLog estimate above.
+        for cardinality in (100, 1_000, 10_000, 50_000, 200_000):
+            with self.subTest(cardinality=cardinality):
+                registers = bytearray(activity._REGISTERS)
+                for user_id in range(cardinality):
+                    activity._add(registers, user_id)
+                self.assertWithinBound(activity._estimate(registers), cardinality)
+
+    def test_window_counts_the_union_of_days(self):
+        # 3,000 users a day over three days, overlapping by a third: 7,000 distinct.
+        self.record({DAY + timedelta(days=offset): range(offset * 2_000, offset * 2_000 + 3_000)
+                     for offset in range(3)})
+
+        self.assertWithinBound(activity.count_active_users(DAY, DAY), 3_000)
+        self.assertWithinBound(activity.count_active_users(DAY, DAY + timedelta(days=2)), 7_000)
+        self.assertEqual(activity.count_active_users(DAY - timedelta(days=2), DAY - timedelta(days=1)), 0)
+
+
+class SketchBackendTests(ActivityTestCase):
+
+    def test_cache_fallback_agrees_with_redis(self):
+        self.record(self.users_per_day)
+        fallback = self.counts()
+
+        redis = FakeRedis()
+        cache.clear()
+        with mock.patch.object(activity, '_redis_client', return_value=redis), \
+                mock.patch.object(activity, '_recorded_users', set()):
+            self.record(self.users_per_day)
+            exact = self.counts()
+
+        self.assertEqual(exact, [5_000, 9_000])
+        for estimate, cardinality in zip(fallback, exact):
+            self.assertWithinBound(estimate, cardinality)
+        key = cache.make_key(activity._key(DAY))
+        self.assertEqual(redis.expiry[key], settings.USER_ACTIVITY_RETENTION_DAYS * 24 * 60 * 60)
+
+    def test_failures_are_logged_and_retried(self):
+        redis = FakeRedis()
+        with mock.patch.object(activity, '_redis_client', return_value=redis), \
+                mock.patch.object(redis, 'pfadd', side_effect=ConnectionError('Redis is down')), \
+                self.assertLogs('platform_app.activity', 'ERROR') as logs:
+            activity.record_activity(7)
+        self.assertIn('Could not record activity of user 7', logs.output[0])
+
+        with mock.patch.object(activity, '_redis_client', return_value=redis):
+            activity.record_activity(7)
+        self.assertEqual(redis.pfcount(*redis.sets), 1)
+
+
+class RecordingTests(ActivityTestCase):
+
+    def test_day_rolling_over_during_a_write(self):
+        tomorrow = DAY + timedelta(days=1)
+        add_to_sketch = activity._add_to_sketch
+
+        def slow_add_to_sketch(day, user_id):
+            # A request of another thread is the first of the next day meanwhile.
+            if day == DAY:
+                self.record({tomorrow: [2]})
+            add_to_sketch(day, user_id)
+
+        with mock.patch.object(activity, '_add_to_sketch', side_effect=slow_add_to_sketch):
+            self.record({DAY: [1]})
+        self.record({tomorrow: [1]})
+
+        self.assertEqual(activity.count_active_users(DAY, DAY), 1)
+        self.assertEqual(activity.count_active_users(tomorrow, tomorrow), 2)
+
+
+@unittest.skipUnless(os.getenv('REDIS_TEST_URL'), 'Set REDIS_TEST_URL to a scratch Redis database to run.')
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': os.getenv('REDIS_TEST_URL'),
+    'KEY_PREFIX': 'test_activity',
+}})
+class RedisSketchTests(ActivityTestCase):
+    """The cache fallback against Redis's own HyperLogLogs, which hash users differently."""
+
+    def test_cache_fallback_agrees_with_redis(self):
+        self.record(self.users_per_day)
+        redis = self.counts()
+        self.addCleanup(cache.clear)
+
+        cache.clear()
+        with mock.patch.object(activity, '_redis_client', return_value=None), \
+                mock.patch.object(activity, '_recorded_users', set()):
+            self.record(self.users_per_day)
+            fallback = self.counts()
+
+        for redis_estimate, estimate, cardinality in zip(redis, fallback, (5_000, 9_000)):
+            self.assertWithinBound(redis_estimate, cardinality)
+            self.assertWithinBound(estimate, cardinality)
@@ -0,0 +1,54 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import path
+from rest_framework.authtoken.models import Token
+
+from platform_app import async_views
+from platform_app.models import Interviews, UserProfiles
+
+urlpatterns = [
+    path('start-result/', async_views.start_result_api),
+    path('result-events/<int:interview_id>', async_views.result_events_api),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class LoadFormTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.token = Token.objects.create(user=User.objects.create_user('candidate', password='secret'))
+
+    def post_json(self, body):
+        return self.client.post('/start-result/', body, content_type='application/json',
+                                HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_json_body_that_is_not_an_object_is_a_bad_request(self):
+        for body in ('[1, 2]', '"12"', '12', 'null'):
+            with self.subTest(body=body):
+                response = self.post_json(body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('must be an object', response.json()['detail'])
+
+    def test_malformed_json_is_a_bad_request(self):
+        self.assertEqual(self.post_json('{').status_code, 400)
+
+    def test_object_without_interview_id_is_rejected(self):
+        response = self.post_json('{}')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Interview ID is required."})
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class ResultEventsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner', password='secret')
+        cls.interview = Interviews.objects.create(user_profile=UserProfiles.objects.create(user=owner))
+        cls.other_token = Token.objects.create(user=User.objects.create_user('other', password='secret'))
+
+    def test_other_users_cannot_wait_on_an_interview(self):
+        response = self.client.get(f'/result-events/{self.interview.pk}',
+                                   HTTP_AUTHORIZATION=f'Token {self.other_token.key}')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,266 @@
+import threading
+import time
+from datetime import date, time as clock, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from platform_app import availability
+from platform_app.models import Interviews, Schedules, SlotAvailability, SlotReservation, UserProfiles
+
+DAY = date(2026, 6, 1)
+
+
+def run_concurrently(target, arguments):
+    """Calls `target` with each of `arguments` from its own thread, all released at once; returns the results."""
+    barrier = threading.Barrier(len(arguments))
+    results = [None] * len(arguments)
+    errors = []
+
+    def run(i, argument):
+        try:
+            barrier.wait()
+            results[i] = target(argument)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run, args=(i, argument)) for i, argument in enumerate(arguments)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+class SlotCounterTests(TransactionTestCase):
+
+    def setUp(self):
+        self.schedules = [Schedules.objects.create(capacity=50) for _ in range(2)]
+        self.profile = UserProfiles.objects.create(user=User.objects.create_user('booker'))
+
+    def assertCountersMatchInterviews(self):
+        for slot in SlotAvailability.objects.all():
+            booked = Interviews.objects.filter(schedule=slot.schedule, date=slot.date) \
+                .exclude(status=Interviews.StatusField.CANCELLED).count()
+            self.assertEqual(slot.booked, booked, f"slot of schedule {slot.schedule_id} on {slot.date}")
+
+    def test_concurrent_bookings_and_cancellations_do_not_drift(self):
+        slots = [(schedule, DAY + timedelta(days=offset)) for schedule in self.schedules for offset in range(2)]
+
+        def book(slot):
+            schedule, day = slot
+            return Interviews.objects.create(user_profile=self.profile, schedule=schedule, date=day,
+                                             status=Interviews.StatusField.SCHEDULED)
+
+        def change(action):
+            interview, kind = action
+            if kind == 'cancel':
+                interview.status = Interviews.StatusField.CANCELLED
+                interview.save()
+            elif kind == 'move':
+                interview.date += timedelta(days=1)
+                interview.save()
+            else:
+                interview.delete()
+
+        # Every round books each slot from several threads at once while the last round's bookings are
+        # cancelled, moved to the next date or deleted.
+        booked = []
+        for _ in range(4):
+            actions = [(book, slot) for slot in slots * 5]
+            actions += [(change, (interview, kind)) for interview, kind in zip(booked, ['cancel', 'move', 'delete'] * 7)]
+            booked = run_concurrently(lambda action: action[0](action[1]), actions)[:len(slots) * 5]
+            self.assertCountersMatchInterviews()
+
+        self.assertEqual(SlotAvailability.objects.count(), len(slots) + len(self.schedules))
+
+    def test_reads_count_dates_without_rows_and_write_nothing(self):
+        cache.clear()
+        # Booked elsewhere (e.g. by n8n), so no row was created for the date.
+        Interviews.objects.bulk_create(Interviews(user_profile=self.profile, schedule=self.schedules[0], date=DAY)
+                                       for _ in range(3))
+        with CaptureQueriesContext(connection) as captured, \
+                mock.patch.object(cache, 'set', wraps=cache.set) as cache_set, \
+                mock.patch.object(cache, 'add', wraps=cache.add) as cache_add:
+            schedules = availability.get_availability(DAY)
+            availability.invalidate_availability(DAY)
+            writes = cache_set.call_args_list + cache_add.call_args_list
+
+        self.assertEqual([(schedule['booked_sessions'], schedule['remaining_capacity']) for schedule in schedules],
+                         [(3, 47), (0, 50)])
+        self.assertFalse(SlotAvailability.objects.exists())
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in captured))
+        # Cached data and the versions it was built under all expire.
+        self.assertTrue(writes)
+        for call in writes:
+            self.assertEqual(call.kwargs['timeout'], settings.SLOT_AVAILABILITY_CACHE_TTL)
+
+
+class SlotTestCase(TransactionTestCase):
+    capacity = 3
+
+    def setUp(self):
+        self.schedule = Schedules.objects.create(capacity=self.capacity)
+        self.profiles = [UserProfiles.objects.create(user=User.objects.create_user(f'booker{i}')) for i in range(10)]
+
+    def hold(self, profile):
+        return availability.hold_slot(profile, self.schedule.pk, DAY)
+
+    def assertSlotMatchesReservations(self):
+        slot = SlotAvailability.objects.get(schedule=self.schedule, date=DAY)
+        reservations = SlotReservation.objects.filter(slot=slot)
+        self.assertEqual(slot.held, reservations.filter(status=SlotReservation.Status.HELD).count())
+        self.assertEqual(slot.booked, reservations.filter(status=SlotReservation.Status.CONFIRMED).count())
+        self.assertLessEqual(slot.booked + slot.held, slot.capacity)
+        return slot
+
+    def book(self, reservation):
+        # n8n writes the interview before the booking view confirms the hold.
+        Interviews.objects.create(user_profile=reservation.user_profile, schedule=self.schedule, date=DAY)
+        availability.confirm_reservation(reservation)
+
+
+class SlotHoldRaceTests(SlotTestCase):
+    bookers = 200
+
+    def test_only_capacity_holds_succeed(self):
+        users = User.objects.bulk_create(User(username=f'racer{i}') for i in range(self.bookers))
+        bookers = UserProfiles.objects.bulk_create(UserProfiles(user=user) for user in users)
+
+        holds = run_concurrently(self.hold, bookers)
+
+        self.assertEqual(sum(hold is not None for hold in holds), self.capacity)
+        slot = self.assertSlotMatchesReservations()
+        self.assertEqual(slot.held, self.capacity)
+
+        # Once the slot is full, the losers are answered while another transaction holds its row lock.
+        locked, release = threading.Event(), threading.Event()
+
+        def lock_slot():
+            try:
+                with transaction.atomic():
+                    SlotAvailability.objects.select_for_update().get(pk=slot.pk)
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=lock_slot)
+        holder.start()
+        try:
+            self.assertTrue(locked.wait(5))
+            started = time.monotonic()
+            holds = run_concurrently(self.hold, bookers)
+            elapsed = time.monotonic() - started
+        finally:
+            release.set()
+            holder.join()
+
+        self.assertEqual(holds, [None] * self.bookers)
+        self.assertLess(elapsed, 5)
+        self.assertEqual(self.assertSlotMatchesReservations().held, self.capacity)
+
+    def test_counters_match_reservations_after_confirm_release_and_expire(self):
+        confirmed, released, expired = [hold for hold in run_concurrently(self.hold, self.profiles) if hold]
+        self.book(confirmed)
+        availability.release_reservation(released)
+        SlotReservation.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(availability.expire_holds(), 1)
+        self.assertEqual(self.assertSlotMatchesReservations().booked, 1)
+
+        # The seats given back go to the next race, and the confirmed one stays taken.
+        holds = [hold for hold in run_concurrently(self.hold, self.profiles) if hold]
+        self.assertEqual(len(holds), self.capacity - 1)
+        run_concurrently(self.book, holds)
+        slot = self.assertSlotMatchesReservations()
+        self.assertEqual((slot.booked, slot.held), (self.capacity, 0))
+        self.assertIsNone(self.hold(self.profiles[0]))
+
+
+class ReservationTests(SlotTestCase):
+
+    def expire(self, reservations):
+        SlotReservation.objects.filter(pk__in=[reservation.pk for reservation in reservations]) \
+            .update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    def test_hold_expired_before_confirm(self):
+        reservation = self.hold(self.profiles[0])
+        self.expire([reservation])
+        self.assertEqual(availability.expire_holds(), 1)
+
+        self.book(reservation)
+
+        # The seat was given back once; the booking still counts.
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, SlotReservation.Status.CONFIRMED)
+        slot = self.assertSlotMatchesReservations()
+        self.assertEqual((slot.booked, slot.held), (1, 0))
+
+    def test_confirm_release_and_expire_contend(self):
+        holds = run_concurrently(self.hold, self.profiles[:self.capacity])
+        self.expire(holds)
+        confirmed, released, _ = holds
+        Interviews.objects.create(user_profile=confirmed.user_profile, schedule=self.schedule, date=DAY)
+
+        # Sweeps and new bookers race the booking views for the same overdue holds.
+        run_concurrently(lambda action: action(), [
+            lambda: availability.confirm_reservation(confirmed),
+            lambda: availability.release_reservation(released),
+            availability.expire_holds, availability.expire_holds,
+            lambda: self.hold(self.profiles[3]), lambda: self.hold(self.profiles[4]),
+        ])
+
+        slot = self.assertSlotMatchesReservations()
+        self.assertEqual(slot.booked, 1)
+        self.assertFalse(SlotReservation.objects.filter(pk__in=[hold.pk for hold in holds],
+                                                        status=SlotReservation.Status.HELD).exists())
+
+    def test_failed_confirmation_is_logged(self):
+        reservation = self.hold(self.profiles[0])
+        with mock.patch.object(availability, 'refresh_slot', side_effect=DatabaseError('deadlock')), \
+                self.assertLogs('platform_app.availability', 'ERROR') as logs:
+            availability.confirm_reservation(reservation)
+
+        self.assertIn(f'Could not confirm reservation {reservation.pk}', logs.output[0])
+        # The hold stays until it expires.
+        self.assertEqual(self.assertSlotMatchesReservations().held, 1)
+
+
+class CalendarTests(SlotTestCase):
+
+    def test_calendar_matches_availability_of_each_date(self):
+        Schedules.objects.filter(pk=self.schedule.pk).update(start_time=clock(9), end_time=clock(10))
+        afternoon = Schedules.objects.create(capacity=2, start_time=clock(14), end_time=clock(15))
+        profile = self.profiles[0]
+        for schedule, day, status in ((self.schedule, DAY, Interviews.StatusField.SCHEDULED),
+                                      (self.schedule, DAY, Interviews.StatusField.PENDING),
+                                      (afternoon, DAY + timedelta(days=1), Interviews.StatusField.SCHEDULED),
+                                      (afternoon, DAY + timedelta(days=2), Interviews.StatusField.CANCELLED)):
+            Interviews.objects.create(user_profile=profile, schedule=schedule, date=day, status=status)
+        self.hold(self.profiles[1])
+        # A date whose slot was given more seats than the schedule has.
+        availability.refresh_date(DAY + timedelta(days=3))
+        SlotAvailability.objects.filter(schedule=afternoon, date=DAY + timedelta(days=3)).update(capacity=5)
+
+        calendar = availability.get_availability_calendar(DAY - timedelta(days=1), DAY + timedelta(days=4))
+
+        self.assertEqual(len(calendar), 6)
+        for day in calendar:
+            with self.subTest(date=day['date']):
+                schedules = [dict(schedule) for schedule in availability.get_availability(day['date'])]
+                self.assertEqual(day['schedules'], schedules)
+                self.assertEqual(day['remaining_capacity'], sum(schedule['remaining_capacity'] for schedule in schedules))
+        remaining = {day['date']: [schedule['remaining_capacity'] for schedule in day['schedules']] for day in calendar}
+        self.assertEqual(remaining[DAY.isoformat()], [0, 2])
+        self.assertEqual(remaining[(DAY + timedelta(days=1)).isoformat()], [3, 1])
+        self.assertEqual(remaining[(DAY + timedelta(days=3)).isoformat()], [3, 5])
@@ -0,0 +1,161 @@
+import threading
+from unittest import mock
+
+import requests
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from platform_app import camera
+from platform_app.models import CameraAnalysis, Interviews, UserProfiles
+
+
+def frame(name='frame.jpg'):
+    return SimpleUploadedFile(name, b'\xff\xd8jpeg', content_type='image/jpeg')
+
+
+def json_response(body, status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    return response
+
+
+class FakeBatchWorkflow:
+    """Stands in for `send_camera_frames`: fails `failures` times, then takes the frames."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, interview_id, frames):
+        with self.lock:
+            # The frames must still be readable when a batch is sent again.
+            contents = []
+            for _, fileobj, _ in frames:
+                fileobj.seek(0)
+                contents.append(fileobj.read())
+            self.batches.append((interview_id, contents))
+            if self.failures:
+                self.failures -= 1
+                raise requests.exceptions.ConnectionError('n8n is down')
+
+
+class CameraFrameBufferTests(SimpleTestCase):
+
+    def make_buffer(self, **kwargs):
+        buffer = camera.CameraFrameBuffer(**{'batch_size': 2, 'max_age': 60, 'workers': 1, 'max_attempts': 3,
+                                             **kwargs})
+        self.addCleanup(buffer.shutdown)
+        return buffer
+
+    @staticmethod
+    def drain(buffer):
+        # With a single worker, this runs after every batch submitted before it.
+        buffer._executor.submit(lambda: None).result()
+
+    def test_max_age_must_be_positive(self):
+        with self.assertRaisesMessage(ValueError, 'max_age must be positive'):
+            camera.CameraFrameBuffer(batch_size=2, max_age=0, workers=1)
+
+    def test_failed_batch_is_requeued_and_sent_again(self):
+        buffer = self.make_buffer()
+        workflow = FakeBatchWorkflow(failures=1)
+        with mock.patch.object(camera, 'send_camera_frames', workflow), self.assertLogs('platform_app.camera', 'WARNING'):
+            buffer.add(7, [frame(), frame()])
+            self.drain(buffer)
+            self.assertEqual(len(buffer._retries), 1)
+
+            buffer.flush()
+            self.drain(buffer)
+        self.assertEqual(workflow.batches, [(7, [b'\xff\xd8jpeg'] * 2)] * 2)
+        self.assertEqual(buffer._retries, [])
+
+    def test_batch_is_dropped_and_logged_after_the_last_attempt(self):
+        buffer = self.make_buffer(max_attempts=2)
+        workflow = FakeBatchWorkflow(failures=5)
+        with mock.patch.object(camera, 'send_camera_frames', workflow), \
+                self.assertLogs('platform_app.camera', 'ERROR') as logs:
+            buffer.add(7, [frame(), frame()])
+            self.drain(buffer)
+            buffer.flush()
+            self.drain(buffer)
+        self.assertEqual(len(workflow.batches), 2)
+        self.assertEqual(buffer._retries, [])
+        self.assertIn('Dropped 2 camera frames of interview 7 after 2 attempts', logs.output[-1])
+
+    def test_shutdown_sends_buffered_frames_and_pending_retries(self):
+        buffer = self.make_buffer()
+        workflow = FakeBatchWorkflow(failures=1)
+        with mock.patch.object(camera, 'send_camera_frames', workflow), self.assertLogs('platform_app.camera'):
+            buffer.add(7, [frame(), frame()])
+            self.drain(buffer)
+            buffer.add(8, [frame()])
+            buffer.shutdown()
+            # Frames arriving after shutdown are sent right away.
+            buffer.add(9, [frame()])
+        self.assertEqual(sorted(interview_id for interview_id, _ in workflow.batches), [7, 7, 8, 9])
+
+
+@override_settings(N8N_ENDPOINTS={'camera_analysis_batch': {'url': 'http://n8n.test/batch'}})
+class SendCameraFramesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.interview = Interviews.objects.create()
+
+    def send(self, body):
+        frames = [('frame.jpg', frame(), 'image/jpeg')]
+        with mock.patch.object(camera.n8n, 'post_multipart', return_value=json_response(body)):
+            return camera.send_camera_frames(self.interview.pk, frames)
+
+    def test_analyses_are_stored(self):
+        self.send(b'[{"eye_contact": "Good"}, {"eye_contact": "Poor"}]')
+        self.assertEqual(sorted(CameraAnalysis.objects.values_list('eye_contact', flat=True)), ['Good', 'Poor'])
+
+    def test_answer_without_analyses_stores_nothing(self):
+        for body in (b'{"message": "Workflow was started"}', b'', b'OK'):
+            with self.subTest(body=body), self.assertLogs('platform_app.camera', 'WARNING'):
+                self.assertEqual(self.send(body), [])
+        self.assertFalse(CameraAnalysis.objects.exists())
+
+
+class CameraAnalysisFallbackTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('candidate', password='secret')
+        cls.interview = Interviews.objects.create(user_profile=UserProfiles.objects.create(user=cls.user))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, images):
+        return self.client.post('/api/camera-analysis/', {'interview_id': self.interview.pk, 'images': images},
+                                format='multipart')
+
+    def test_frames_go_to_the_single_frame_workflow_until_batching_is_configured(self):
+        with override_settings(N8N_ENDPOINTS={'camera_analysis_batch': {'url': None}}), \
+                mock.patch.object(camera, 'send_camera_frame') as send, \
+                mock.patch.object(camera.frame_buffer, 'add') as add:
+            response = self.post([frame('a.jpg'), frame('b.jpg')])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([call.args[1].name for call in send.call_args_list], ['a.jpg', 'b.jpg'])
+        add.assert_not_called()
+
+    def test_single_frame_workflow_failure_is_a_bad_gateway(self):
+        with override_settings(N8N_ENDPOINTS={'camera_analysis_batch': {'url': None}}), \
+                mock.patch.object(camera, 'send_camera_frame', side_effect=requests.exceptions.ConnectionError()):
+            self.assertEqual(self.post([frame()]).status_code, 502)
+
+    def test_frames_are_buffered_once_batching_is_configured(self):
+        with override_settings(N8N_ENDPOINTS={'camera_analysis_batch': {'url': 'http://n8n.test/batch'}}), \
+                mock.patch.object(camera, 'send_camera_frame') as send, \
+                mock.patch.object(camera.frame_buffer, 'add') as add:
+            response = self.post([frame()])
+        self.assertEqual(response.status_code, 202)
+        send.assert_not_called()
+        add.assert_called_once()
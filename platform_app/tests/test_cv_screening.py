@@ -0,0 +1,187 @@
+from datetime import timedelta
+from unittest import mock
+
+import requests
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from platform_app import cv_screening
+from platform_app.models import CVScreeningJob, CVScreeningReport
+
+SCORES = dict(score=70, format_and_structure_score=7, suitability_score=7, experiences_score=7,
+              profile_summary_score=7, work_experience_score=7, education_score=7, skills_score=7,
+              certifications_score=7, projects_score=7, achievements_score=7)
+
+
+ANALYSIS = dict(full_name='Candidate', position='Engineer', strengths=[], weaknesses=[], opportunities=[], threats=[],
+                revisions=[], **SCORES)
+
+
+def make_report(user, **fields):
+    return CVScreeningReport(user=user, **ANALYSIS, **fields)
+
+
+class ReportIdTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('candidate', password='secret')
+        cls.stored = make_report(cls.user, id=20261018120000100)
+        cls.stored.save()
+
+    def test_ids_of_stored_reports_are_not_handed_out(self):
+        ids = iter(['20261018120000100', '20261018120000101', '20261018120000100', '20261018120000102'])
+        with mock.patch.object(cv_screening, 'generate_report_id', lambda: next(ids)):
+            report_ids = cv_screening.generate_report_ids(2, set())
+        self.assertEqual(sorted(report_ids), ['20261018120000101', '20261018120000102'])
+
+    def test_batch_insert_colliding_with_a_concurrent_one_is_retried_with_new_ids(self):
+        # The first ids passed the check but another request stored one of them before the insert.
+        ids = iter([[str(self.stored.pk), '20261018120000201'], ['20261018120000202', '20261018120000203']])
+        reports = [make_report(self.user), make_report(self.user)]
+        with mock.patch.object(cv_screening, 'generate_report_ids', lambda count, taken: next(ids)):
+            cv_screening._save_batch_reports(reports, set())
+        self.assertEqual(sorted(report.pk for report in reports), ['20261018120000202', '20261018120000203'])
+        self.assertEqual(CVScreeningReport.objects.count(), 3)
+
+    def test_reports_that_cannot_be_saved_fail_their_files_without_ending_the_stream(self):
+        with mock.patch.object(cv_screening, 'get_cached_report', return_value=self.stored), \
+                mock.patch.object(cv_screening, 'generate_report_ids',
+                                  lambda count, taken: [str(self.stored.pk)] * count):
+            events = list(cv_screening.screen_cv_batch(self.user, [('cv.pdf', ContentFile(b'%PDF'), 'application/pdf')]))
+        self.assertEqual([(event['file'], event['status']) for event in events], [('cv.pdf', 'failed')])
+        self.assertEqual(CVScreeningReport.objects.count(), 1)
+
+
+class ResultCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(f'candidate{i}', password='secret') for i in range(3)]
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(cv_screening, 'request_cv_screening', return_value=ANALYSIS)
+        self.request_cv_screening = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def screen(self, user, content):
+        report, errors = cv_screening.screen_cv(user, ContentFile(content), 'cv.pdf', 'application/pdf')
+        self.assertIsNone(errors)
+        return report
+
+    def test_identical_upload_reuses_the_analysis(self):
+        first = self.screen(self.users[0], b'%PDF-1')
+        second = self.screen(self.users[1], b'%PDF-1')
+
+        self.assertEqual(self.request_cv_screening.call_count, 1)
+        self.assertNotEqual(second.pk, first.pk)
+        self.assertEqual((second.user, second.score, second.full_name), (self.users[1], first.score, first.full_name))
+        self.assertEqual(cv_screening.get_cache_stats(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_other_uploads_and_workflow_versions_miss(self):
+        self.screen(self.users[0], b'%PDF-1')
+        self.screen(self.users[1], b'%PDF-2')
+        with override_settings(CV_SCREENING_WORKFLOW_VERSION='2'):
+            self.screen(self.users[2], b'%PDF-1')
+
+        self.assertEqual(self.request_cv_screening.call_count, 3)
+        self.assertEqual(cv_screening.get_cache_stats(), {'hits': 0, 'misses': 3, 'hit_ratio': 0.0})
+
+    def test_deleted_report_misses(self):
+        self.screen(self.users[0], b'%PDF-1').delete()
+        self.screen(self.users[1], b'%PDF-1')
+
+        self.assertEqual(self.request_cv_screening.call_count, 2)
+        self.assertEqual(cv_screening.get_cache_stats()['misses'], 2)
+
+    def test_clone_colliding_with_a_stored_id_gets_another(self):
+        stored = self.screen(self.users[0], b'%PDF-1')
+        ids = iter([str(stored.pk), '20261018120000300'])
+        with mock.patch.object(cv_screening, 'generate_report_id', lambda: next(ids)):
+            clone = self.screen(self.users[1], b'%PDF-1')
+
+        self.assertEqual(clone.pk, '20261018120000300')
+        stored.refresh_from_db()
+        self.assertEqual(stored.user, self.users[0])
+
+
+@override_settings(STORAGES={**settings.STORAGES, 'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'}},
+                   CV_SCREENING_JOB_MAX_ATTEMPTS=2)
+class JobQueueTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('candidate', password='secret')
+
+    def setUp(self):
+        cache.clear()
+
+    def enqueue(self, content=b'%PDF'):
+        job = CVScreeningJob(user=self.user, file_name='cv.pdf', content_type='application/pdf')
+        job.cv.save('cv.pdf', ContentFile(content))
+        return job
+
+    def abandon(self, job, attempts):
+        """As a worker that died while processing the job, long enough ago for it to count as abandoned."""
+        abandoned_at = timezone.now() - timedelta(seconds=settings.CV_SCREENING_JOB_STALE_SECONDS + 1)
+        CVScreeningJob.objects.filter(pk=job.pk).update(status=CVScreeningJob.Status.PROCESSING, attempts=attempts,
+                                                        updated_at=abandoned_at)
+
+    def test_jobs_are_claimed_oldest_first_and_once(self):
+        first, second = self.enqueue(), self.enqueue()
+
+        claimed = [cv_screening.claim_next_cv_screening_job() for _ in range(3)]
+
+        self.assertEqual([job and job.pk for job in claimed], [first.pk, second.pk, None])
+        self.assertEqual(claimed[0].status, CVScreeningJob.Status.PROCESSING)
+        self.assertEqual(claimed[0].attempts, 1)
+
+    def test_abandoned_job_is_reclaimed(self):
+        abandoned, in_progress = self.enqueue(), self.enqueue()
+        self.abandon(abandoned, attempts=1)
+        CVScreeningJob.objects.filter(pk=in_progress.pk).update(status=CVScreeningJob.Status.PROCESSING, attempts=1)
+
+        job = cv_screening.claim_next_cv_screening_job()
+
+        self.assertEqual((job.pk, job.attempts), (abandoned.pk, 2))
+        self.assertIsNone(cv_screening.claim_next_cv_screening_job())
+
+    def test_abandoned_job_out_of_attempts_fails(self):
+        poison, pending = self.enqueue(), self.enqueue()
+        self.abandon(poison, attempts=2)
+
+        self.assertEqual(cv_screening.claim_next_cv_screening_job().pk, pending.pk)
+
+        poison.refresh_from_db()
+        self.assertEqual((poison.status, poison.attempts), (CVScreeningJob.Status.FAILED, 2))
+        self.assertIn('abandoned', poison.error)
+
+    def test_processed_job_completes_and_drops_the_upload(self):
+        job = self.enqueue()
+        with mock.patch.object(cv_screening, 'request_cv_screening', return_value=ANALYSIS):
+            self.assertTrue(cv_screening.process_next_cv_screening_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CVScreeningJob.Status.COMPLETED)
+        self.assertEqual(job.report.full_name, 'Candidate')
+        self.assertFalse(job.cv)
+        self.assertFalse(cv_screening.process_next_cv_screening_job())
+
+    def test_failed_attempts_are_retried_up_to_the_limit(self):
+        job = self.enqueue()
+        failure = requests.exceptions.ConnectionError('n8n is down')
+        with mock.patch.object(cv_screening, 'request_cv_screening', side_effect=failure):
+            statuses = []
+            for _ in range(3):
+                cv_screening.process_next_cv_screening_job()
+                job.refresh_from_db()
+                statuses.append(job.status)
+
+        self.assertEqual(statuses, [CVScreeningJob.Status.PENDING, CVScreeningJob.Status.FAILED,
+                                    CVScreeningJob.Status.FAILED])
+        self.assertEqual(job.attempts, 2)
@@ -0,0 +1,148 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import JsonResponse
+from django.test import TestCase, override_settings
+from django.urls import path
+from rest_framework.authtoken.models import Token
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from platform_app.async_views import async_api_view, load_form
+from platform_app.idempotency import _IdempotentRequest, idempotent, request_fingerprint
+
+calls = []
+
+
+@api_view(['POST'])
+@idempotent
+def sync_view(request):
+    calls.append(request.data.get('name'))
+    return Response({"call": len(calls)}, status=201)
+
+
+@async_api_view(['POST'])
+@idempotent
+async def async_view(request):
+    data, _ = await load_form(request)
+    calls.append(data.get('name'))
+    return JsonResponse({"call": len(calls)}, status=201)
+
+
+urlpatterns = [
+    path('sync/', sync_view),
+    path('async/', async_view),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__, IDEMPOTENCY_RETRY_AFTER=3, IDEMPOTENCY_WAIT_SECONDS=0.3,
+                   IDEMPOTENCY_POLL_SECONDS=0.02)
+class IdempotencyTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('candidate', password='secret')
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        calls.clear()
+
+    def post(self, url, data, key='key-1', **kwargs):
+        return self.client.post(url, data, HTTP_AUTHORIZATION=f'Token {self.token.key}', HTTP_IDEMPOTENCY_KEY=key,
+                                **kwargs)
+
+    def test_repeat_with_the_same_body_is_replayed(self):
+        for url in ('/sync/', '/async/'):
+            with self.subTest(url=url):
+                calls.clear()
+                first = self.post(url, {'name': 'a'}, content_type='application/json')
+                # Same JSON, other key order and spacing.
+                repeat = self.post(url, '{ "name": "a" }', content_type='application/json')
+                self.assertEqual((first.status_code, first.json()), (201, {"call": 1}))
+                self.assertEqual((repeat.status_code, repeat.json()), (201, {"call": 1}))
+                self.assertEqual(repeat['Idempotent-Replayed'], 'true')
+                self.assertEqual(calls, ['a'])
+
+    def test_key_reused_for_a_different_body_is_refused(self):
+        for url in ('/sync/', '/async/'):
+            with self.subTest(url=url):
+                calls.clear()
+                self.post(url, {'name': 'a'}, content_type='application/json')
+                response = self.post(url, {'name': 'b'}, content_type='application/json')
+                self.assertEqual(response.status_code, 422)
+                self.assertEqual(calls, ['a'])
+
+    def test_key_reused_for_a_different_file_is_refused(self):
+        def upload(content):
+            return {'name': 'a', 'cv': SimpleUploadedFile('cv.pdf', content)}
+
+        for url in ('/sync/', '/async/'):
+            with self.subTest(url=url):
+                calls.clear()
+                self.assertEqual(self.post(url, upload(b'%PDF-1')).status_code, 201)
+                self.assertEqual(self.post(url, upload(b'%PDF-1')).status_code, 201)
+                self.assertEqual(self.post(url, upload(b'%PDF-2')).status_code, 422)
+                self.assertEqual(calls, ['a'])
+
+    def hold_key(self, url):
+        """Takes the key for `url` as a first request still running would; returns its `_IdempotentRequest`."""
+        first = _IdempotentRequest(SimpleNamespace(user=self.user, path=url), 'key-1')
+        self.assertTrue(first.acquire())
+        return first
+
+    def finish_later(self, first, response=None):
+        """Finishes the first request shortly, storing `response` (`(status, data)`) unless it is None."""
+        def finish():
+            if response is not None:
+                first.store(*response, request_fingerprint({'name': 'a'}))
+            first.release()
+
+        timer = threading.Timer(0.1, finish)
+        timer.start()
+        self.addCleanup(timer.join)
+
+    def test_duplicate_while_the_first_is_running_waits_and_replays_its_response(self):
+        for url in ('/sync/', '/async/'):
+            with self.subTest(url=url):
+                self.finish_later(self.hold_key(url), (201, {"call": 7}))
+                response = self.post(url, {'name': 'a'}, content_type='application/json')
+                self.assertEqual((response.status_code, response.json()), (201, {"call": 7}))
+                self.assertEqual(response['Idempotent-Replayed'], 'true')
+                self.assertEqual(calls, [])
+                cache.clear()
+
+    def test_duplicate_waiting_on_a_failed_first_request_runs_the_view(self):
+        for url in ('/sync/', '/async/'):
+            with self.subTest(url=url):
+                calls.clear()
+                # Server errors aren't stored; the first request only gives the key back.
+                self.finish_later(self.hold_key(url))
+                response = self.post(url, {'name': 'a'}, content_type='application/json')
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(calls, ['a'])
+
+    def test_duplicate_gets_a_conflict_once_the_wait_is_over(self):
+        for url in ('/sync/', '/async/'):
+            with self.subTest(url=url):
+                first = self.hold_key(url)
+                started = time.monotonic()
+                response = self.post(url, {'name': 'a'}, content_type='application/json')
+                self.assertGreaterEqual(time.monotonic() - started, 0.3)
+                self.assertEqual(response.status_code, 409)
+                self.assertEqual(response['Retry-After'], '3')
+                self.assertEqual(calls, [])
+
+                # Once the first request is done, the retry runs.
+                first.release()
+                self.assertEqual(self.post(url, {'name': 'a'}, content_type='application/json').status_code, 201)
+                calls.clear()
+
+    def test_keys_are_scoped_per_endpoint(self):
+        self.post('/sync/', {'name': 'a'}, content_type='application/json')
+        self.assertEqual(self.post('/async/', {'name': 'b'}, content_type='application/json').status_code, 201)
+        self.assertEqual(calls, ['a', 'b'])
@@ -0,0 +1,94 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from platform_app.management.commands.check_query_plans import explain
+from platform_app.models import Interviews, Results, UserProfiles
+
+
+class InterviewHistoryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('candidate', password='secret')
+        cls.profile = UserProfiles.objects.create(user=cls.user)
+        other = UserProfiles.objects.create(user=User.objects.create_user('other', password='secret'))
+        Interviews.objects.create(user_profile=other, date=date(2026, 1, 1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_interviews(self, dates):
+        interviews = [Interviews.objects.create(user_profile=self.profile, date=day) for day in dates]
+        Results.objects.bulk_create(Results(interview=interview, final_score=70, generated_at=timezone.now())
+                                    for interview in interviews[::2])
+        return interviews
+
+    def fetch_all(self, page_size):
+        """The ids of every page, following the next links; then of every page again, following the previous links."""
+        pages, url = [], f'/api/v2/interviews/?page_size={page_size}'
+        while url:
+            page = self.client.get(url).json()
+            pages.append([interview['id'] for interview in page['results']])
+            url = page['next']
+        back, url = [], page['previous']
+        while url:
+            page = self.client.get(url).json()
+            back.insert(0, [interview['id'] for interview in page['results']])
+            url = page['previous']
+        return [id for ids in pages for id in ids], [id for ids in back + pages[-1:] for id in ids]
+
+    def booked_out_of_order(self):
+        # Several on the same date, and some without a date.
+        days = [date(2026, 3, 1) - timedelta(days=offset % 7) for offset in (3, 0, 5, 0, 2, 6, 0, 3, 1, 4)]
+        interviews = self.create_interviews(days[:5] + [None, None] + days[5:] + [None])
+        return sorted(interviews, key=lambda interview: (interview.date or date.min, interview.id), reverse=True)
+
+    def test_latest_interview_date_first_across_pages(self):
+        expected = [interview.id for interview in self.booked_out_of_order()]
+
+        for page_size in (1, 2, 3, 5, 20):
+            with self.subTest(page_size=page_size):
+                forward, backward = self.fetch_all(page_size)
+                self.assertEqual(forward, expected)
+                self.assertEqual(backward, expected)
+
+    def test_pages_are_read_in_index_order(self):
+        self.booked_out_of_order()
+        url = '/api/v2/interviews/?page_size=3'
+        for _ in range(4):
+            with CaptureQueriesContext(connection) as captured:
+                page = self.client.get(url).json()
+            plan, _ = explain(captured[0]['sql'])
+            self.assertIn('interview_profile_date_idx', plan)
+            # Neither SQLite nor MySQL sorts the rows itself.
+            self.assertNotIn('TEMP B-TREE', plan)
+            self.assertNotIn('filesort', plan)
+            url = page['next']
+
+    def test_malformed_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/v2/interviews/?cursor=cD0yMDI2LTEzLTAxJTdDMQ==').status_code, 404)
+
+    def test_list_and_detail_run_one_query_however_many_interviews(self):
+        for count in (3, 60):
+            Results.objects.filter(interview__user_profile=self.profile).delete()
+            Interviews.objects.filter(user_profile=self.profile).delete()
+            interviews = self.create_interviews([date(2026, 3, 1) - timedelta(days=i) for i in range(count)])
+            with self.subTest(interviews=count):
+                with self.assertNumQueries(1):
+                    response = self.client.get('/api/v2/interviews/?page_size=100')
+                self.assertEqual(len(response.json()['results']), count)
+                self.assertEqual(response.json()['results'][0]['final_score'], 70)
+                with self.assertNumQueries(1):
+                    self.client.get(f'/api/v2/interviews/{interviews[0].pk}')
+
+    def test_other_users_interviews_are_not_listed(self):
+        self.assertEqual(self.fetch_all(20), ([], []))
+        other = Interviews.objects.exclude(user_profile=self.profile).get()
+        self.assertEqual(self.client.get(f'/api/v2/interviews/{other.pk}').status_code, 404)
@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+
+class MetricsAccessTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='secret', is_staff=True)
+        cls.user = User.objects.create_user('candidate', password='secret')
+
+    @override_settings(METRICS_TOKEN='scrape-me')
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'django_http_requests_in_progress', response.content)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_without_a_token_only_staff_are_served(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Token invalid').status_code, 403)
+
+        user_token = Token.objects.create(user=self.user)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION=f'Token {user_token.key}').status_code, 403)
+        staff_token = Token.objects.create(user=self.staff)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION=f'Token {staff_token.key}').status_code, 200)
+
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
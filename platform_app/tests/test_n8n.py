@@ -0,0 +1,283 @@
+import io
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import httpx
+import requests
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from requests.adapters import HTTPAdapter
+
+from platform_app import n8n
+
+
+class HangingServer:
+    """Accepts connections and never answers, like an n8n workflow that hangs."""
+
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(50)
+        self.connections = []
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.sock.getsockname()[1]}/webhook'
+
+    def accept(self):
+        while True:
+            try:
+                self.connections.append(self.sock.accept()[0])
+            except OSError:
+                return
+
+    def close(self):
+        self.sock.close()
+        for connection in self.connections:
+            connection.close()
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Answers every POST with `body` (JSON) over keep-alive connections, after `latency` seconds. Each
+    new connection first waits `handshake` seconds, standing in for the TCP and TLS round trips to n8n.
+    The request bodies received are kept in `requests`.
+    """
+    daemon_threads = True
+    request_queue_size = 64
+
+    def __init__(self, latency=0, handshake=0, body=b'{"status": 200}'):
+        self.latency = latency
+        self.handshake = handshake
+        self.body = body
+        self.connections = set()
+        self.requests = []
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/webhook'
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; like n8n, don't hold the body back for an ACK.
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        time.sleep(self.server.handshake)
+
+    def do_POST(self):
+        self.server.connections.add(self.client_address)
+        self.server.requests.append(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        time.sleep(self.server.latency)
+        body = self.server.body
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def endpoint_config(url, **overrides):
+    return {'url': url, 'connect_timeout': 1.0, 'read_timeout': 0.5, 'pool_size': 10, 'max_concurrency': 2,
+            **overrides}
+
+
+class SessionTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.server = StubServer()
+        self.addCleanup(self.server.close)
+        # Sessions live as long as the process; each test starts without any.
+        patcher = mock.patch.dict(n8n._sessions, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_calls_reuse_one_pooled_connection_per_endpoint(self):
+        with override_settings(N8N_ENDPOINTS={'stub': endpoint_config(self.server.url, pool_size=4),
+                                              'other': endpoint_config(self.server.url)}):
+            for _ in range(5):
+                self.assertEqual(n8n.post('stub', json={}).json(), {'status': 200})
+            self.assertEqual(len(self.server.connections), 1)
+
+            session = n8n.get_session('stub')
+            self.assertIs(n8n.get_session('stub'), session)
+            adapter = session.get_adapter(self.server.url)
+            self.assertIs(session.get_adapter('https://n8n.test/'), adapter)
+            self.assertEqual(adapter._pool_maxsize, 4)
+
+            # Each endpoint has its own pool.
+            self.assertIsNot(n8n.get_session('other'), session)
+            n8n.post('other', json={})
+            self.assertEqual(len(self.server.connections), 2)
+
+    def test_calls_use_the_endpoint_timeouts(self):
+        sent = []
+        send = HTTPAdapter.send
+
+        def record_send(adapter, request, **kwargs):
+            sent.append(kwargs['timeout'])
+            return send(adapter, request, **kwargs)
+
+        with override_settings(N8N_ENDPOINTS={
+                'fast': endpoint_config(self.server.url, connect_timeout=2.0, read_timeout=3.0),
+                'slow': endpoint_config(self.server.url, connect_timeout=4.0, read_timeout=90.0)}), \
+                mock.patch.object(HTTPAdapter, 'send', record_send):
+            n8n.post('fast', json={})
+            n8n.post('slow', json={})
+            n8n.post_multipart('slow', fields={'id': '1'})
+            # Callers may still pass their own.
+            n8n.post('fast', json={}, timeout=1)
+
+        self.assertEqual(sent, [(2.0, 3.0), (4.0, 90.0), (4.0, 90.0), 1])
+
+    def test_async_multipart_reads_files_off_the_event_loop(self):
+        readers = set()
+
+        class RecordingFile(io.BytesIO):
+            def read(self, size=-1):
+                readers.add(threading.get_ident())
+                return super().read(size)
+
+        content = b'%PDF-' + b'x' * (n8n.MultipartStream.chunk_size * 2)
+
+        async def post():
+            response = await n8n.apost_multipart(
+                'stub', fields={'id': '1'}, files={'cv': ('cv.pdf', RecordingFile(content), 'application/pdf')})
+            return response, threading.get_ident()
+
+        with override_settings(N8N_ENDPOINTS={'stub': endpoint_config(self.server.url)}):
+            response, loop_thread = async_to_sync(post)()
+
+        self.assertEqual(response.json(), {'status': 200})
+        self.assertIn(content, self.server.requests[0])
+        self.assertTrue(readers)
+        self.assertNotIn(loop_thread, readers)
+
+
+class HangingN8NTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.server = HangingServer()
+        self.addCleanup(self.server.close)
+
+    def test_calls_beyond_the_cap_fail_fast_and_slots_are_freed(self):
+        outcomes = []
+        barrier = threading.Barrier(6)
+
+        def call():
+            barrier.wait()
+            started = time.perf_counter()
+            try:
+                n8n.post('hanging', json={})
+                outcome = 'answered'
+            except n8n.N8NUnavailable:
+                outcome = 'rejected'
+            except requests.exceptions.Timeout:
+                outcome = 'timed out'
+            outcomes.append((outcome, time.perf_counter() - started))
+
+        with override_settings(N8N_ENDPOINTS={'hanging': endpoint_config(self.server.url)},
+                               N8N_BREAKER_FAILURE_THRESHOLD=100):
+            threads = [threading.Thread(target=call) for _ in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(sorted(outcome for outcome, _ in outcomes), ['rejected'] * 4 + ['timed out'] * 2)
+            # Rejected calls don't wait for the hanging ones.
+            self.assertTrue(all(duration < 0.4 for outcome, duration in outcomes if outcome == 'rejected'))
+            self.assertEqual(cache.get('n8n_hanging_in_flight'), 0)
+
+    def test_breaker_opens_after_repeated_timeouts(self):
+        with override_settings(N8N_ENDPOINTS={'hanging': endpoint_config(self.server.url)},
+                               N8N_BREAKER_FAILURE_THRESHOLD=2):
+            for _ in range(2):
+                with self.assertRaises(requests.exceptions.Timeout):
+                    n8n.post('hanging', json={})
+            with self.assertRaises(n8n.N8NUnavailable):
+                n8n.post('hanging', json={})
+
+
+@override_settings(N8N_ENDPOINTS={'stub': endpoint_config('http://127.0.0.1:9/')})
+class SlotCounterTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counter_expiring_mid_call_does_not_drift(self):
+        first = n8n.GuardedCall('stub')
+        first._acquire_slot()
+        # The counter expires while the call is in flight and a new call starts from scratch.
+        cache.delete('n8n_stub_in_flight')
+        second = n8n.GuardedCall('stub')
+        second._acquire_slot()
+        first._release_slot()
+        second._release_slot()
+        self.assertEqual(cache.get('n8n_stub_in_flight'), 0)
+
+        # Both slots are usable again.
+        calls = [n8n.GuardedCall('stub'), n8n.GuardedCall('stub')]
+        for call in calls:
+            call._acquire_slot()
+        with self.assertRaises(n8n.N8NUnavailable):
+            n8n.GuardedCall('stub')._acquire_slot()
+
+    def test_every_acquire_extends_the_counter_expiry(self):
+        with override_settings(N8N_ENDPOINTS={'stub': endpoint_config('http://127.0.0.1:9/', connect_timeout=0.1,
+                                                                      read_timeout=0.1)}):
+            call = n8n.GuardedCall('stub')
+            call._acquire_slot()
+            time.sleep(0.3)
+            n8n.GuardedCall('stub')._acquire_slot()
+            time.sleep(0.3)
+            # 0.6s after the first acquire, but only 0.3s after the last one (expiry 0.4s).
+            self.assertEqual(cache.get('n8n_stub_in_flight'), 2)
+
+
+@override_settings(N8N_ENDPOINTS={'stub': endpoint_config('http://n8n.test/webhook')})
+class AsyncGuardedCallTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_breaker_and_slot_are_checked_off_the_event_loop(self):
+        threads = []
+        enter, exit_ = n8n.GuardedCall.__enter__, n8n.GuardedCall.__exit__
+
+        def record_enter(call):
+            threads.append(threading.get_ident())
+            return enter(call)
+
+        def record_exit(call, *exc_info):
+            threads.append(threading.get_ident())
+            return exit_(call, *exc_info)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={})))
+        with mock.patch.object(n8n.GuardedCall, '__enter__', record_enter), \
+                mock.patch.object(n8n.GuardedCall, '__exit__', record_exit), \
+                mock.patch.object(n8n, 'get_async_client', return_value=client):
+            response = await n8n.apost('stub', json={})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.get_ident(), threads)
+        self.assertEqual(cache.get('n8n_stub_in_flight'), 0)
@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from platform_app.models import Answers, Interviews, Questions, Results, UserProfiles
+from platform_app.tests.test_cv_screening import make_report
+
+
+class QueryCountTests(TestCase):
+    """The result and report endpoints run a fixed number of queries however much data a user has."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('candidate', password='secret')
+        profile = UserProfiles.objects.create(user=cls.user)
+        now = timezone.now()
+        cls.interviews = {}
+        for size in (5, 50):
+            interview = Interviews.objects.create(user_profile=profile, date=now.date())
+            Results.objects.create(interview=interview, final_score=size, generated_at=now)
+            questions = Questions.objects.bulk_create(
+                Questions(interview=interview, question=f'Question {i}', created_at=now) for i in range(size)
+            )
+            Answers.objects.bulk_create(
+                Answers(question=question, answer='Answer', submitted_at=now) for question in questions for _ in range(2)
+            )
+            cls.interviews[size] = interview
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(captured)
+
+    def test_result_document(self):
+        for size, interview in self.interviews.items():
+            with self.subTest(questions=size), self.assertNumQueries(3):
+                response = self.client.get(f'/api/result-document/{interview.pk}')
+            self.assertEqual(len(response.json()['questions']), size)
+            self.assertEqual(len(response.json()['questions'][0]['answers']), 2)
+
+    def test_get_result(self):
+        counts = [self.count_queries(f'/api/get-result/{interview.pk}') for interview in self.interviews.values()]
+        self.assertEqual(counts[0], counts[1])
+        # Repeat views are served from the snapshot once its stamp is checked.
+        with self.assertNumQueries(1):
+            self.client.get(f'/api/get-result/{self.interviews[50].pk}')
+
+    def test_result_status(self):
+        interview = self.interviews[50]
+        # The owner and the result are looked up once, then polls only read the cache.
+        with self.assertNumQueries(2):
+            self.client.get(f'/api/result-status/{interview.pk}')
+        with self.assertNumQueries(0):
+            self.client.get(f'/api/result-status/{interview.pk}')
+
+    def test_average_result(self):
+        with self.assertNumQueries(2):
+            self.client.get('/api/get-average-result/')
+
+    def test_cv_screening_reports(self):
+        first = self.count_queries('/api/cv-screening/report/')
+        for _ in range(20):
+            make_report(self.user, id=None).save()
+        self.assertEqual(self.count_queries('/api/cv-screening/report/'), first)
+
+
+class QueryPlanTests(TestCase):
+
+    def test_read_endpoints_do_not_scan_hot_tables(self):
+        cache.clear()
+        out = StringIO()
+        # Raises CommandError listing the queries that scan a hot table.
+        call_command('check_query_plans', seed=500, stdout=out)
+        self.assertIn("No full scans of hot tables.", out.getvalue())
+        # The seeded rows are rolled back.
+        self.assertFalse(Interviews.objects.exists())
@@ -0,0 +1,243 @@
+import asyncio
+import gzip
+import json
+import threading
+from unittest import mock
+
+import requests
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from platform_app import results, views
+from platform_app.models import Answers, Interviews, Questions, Results, UserProfiles
+
+
+def json_response(body):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body
+    return response
+
+
+class ResultOwnershipTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='secret')
+        cls.other = User.objects.create_user('other', password='secret')
+        cls.interview = Interviews.objects.create(user_profile=UserProfiles.objects.create(user=cls.owner))
+        UserProfiles.objects.create(user=cls.other)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, user, url):
+        self.client.force_authenticate(user)
+        return self.client.get(url)
+
+    def test_polling_only_answers_the_owner(self):
+        url = f'/api/result-status/{self.interview.pk}'
+        self.assertEqual(self.get(self.owner, url).json(), {"interview_id": self.interview.pk, "ready": False})
+        self.assertEqual(self.get(self.other, url).status_code, 404)
+
+        Results.objects.create(interview=self.interview, final_score=80, generated_at=timezone.now())
+        cache.clear()
+        self.assertEqual(self.get(self.owner, url).json(), {"interview_id": self.interview.pk, "ready": True})
+        self.assertEqual(self.get(self.other, url).status_code, 404)
+        # Repeat polls are answered from the cache.
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(self.owner, url).status_code, 200)
+
+    def test_unknown_interview_is_not_found(self):
+        self.assertEqual(self.get(self.owner, '/api/result-status/999999').status_code, 404)
+        self.assertEqual(self.get(self.owner, '/api/get-result/999999').status_code, 404)
+
+    def test_cached_result_is_only_served_to_the_owner(self):
+        Results.objects.create(interview=self.interview, final_score=80, generated_at=timezone.now())
+        url = f'/api/get-result/{self.interview.pk}'
+        response = self.get(self.owner, url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.assertEqual(self.get(self.other, url).status_code, 404)
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+@override_settings(N8N_WEBHOOK_SECRET='secret')
+class ResultSnapshotTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('candidate', password='secret')
+        cls.interview = Interviews.objects.create(user_profile=UserProfiles.objects.create(user=cls.user),
+                                                  status=Interviews.StatusField.COMPLETED)
+        Results.objects.create(interview=cls.interview, final_score=60, generated_at=timezone.now())
+        cls.url = f'/api/get-result/{cls.interview.pk}'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        if response.status_code == 200 and response.get('Content-Encoding') == 'gzip':
+            response.json_body = json.loads(gzip.decompress(response.content))
+        elif response.status_code == 200:
+            response.json_body = json.loads(response.content)
+        return response
+
+    def test_etag_revalidates_with_304(self):
+        plain = self.get()
+        zipped = self.get(Accept_Encoding='gzip, deflate')
+        self.assertEqual(zipped['Content-Encoding'], 'gzip')
+        self.assertEqual(zipped.json_body, plain.json_body)
+        self.assertEqual(zipped['ETag'], plain['ETag'][:-1] + '-gzip"')
+
+        # Either encoding's ETag revalidates the other.
+        for etag in (plain['ETag'], zipped['ETag']):
+            with self.subTest(etag=etag):
+                response = self.get(If_None_Match=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+        self.assertEqual(self.get(If_None_Match='"stale"').status_code, 200)
+
+    def test_rows_written_without_signals_replace_the_snapshot(self):
+        etag = self.get()['ETag']
+        # As n8n writes them: straight to the tables, so no model signal invalidates the snapshot.
+        question = Questions(interview=self.interview, question='Why?', created_at=timezone.now())
+        Questions.objects.bulk_create([question])
+        Answers.objects.bulk_create([Answers(question=Questions.objects.get(), answer='Because.',
+                                             submitted_at=timezone.now())])
+
+        response = self.get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([answer['answer'] for answer in response.json_body['answers']], ['Because.'])
+        self.assertNotEqual(response['ETag'], etag)
+
+        Results.objects.filter(pk=self.interview.pk).update(final_score=90, generated_at=timezone.now())
+        self.assertEqual(self.get().json_body['result']['final_score'], 90)
+
+    def test_completion_webhook_drops_the_snapshot(self):
+        etag = self.get()['ETag']
+        # n8n edits the result in place and keeps its timestamp, so only the webhook tells.
+        Results.objects.filter(pk=self.interview.pk).update(final_score=75)
+        self.assertEqual(self.get(If_None_Match=etag).status_code, 304)
+
+        generated_at = Results.objects.get().generated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post('/api/webhooks/n8n/result/', {
+                'interview_id': self.interview.pk, 'final_score': 80, 'generated_at': generated_at.isoformat(),
+            }, format='json', headers={'X-N8N-Secret': 'secret'})
+        self.assertEqual(response.status_code, 200)
+
+        # Rebuilt on commit, so the next view is a hit.
+        with self.assertNumQueries(1):
+            response = self.get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json_body['result']['final_score'], 80)
+        self.assertEqual(response.json_body['interview']['status'], Interviews.StatusField.COMPLETED)
+
+
+@override_settings(RESULT_EVENTS_POLL_SECONDS=0.01)
+class WaitForResultTests(SimpleTestCase):
+
+    def setUp(self):
+        self.ready = set()
+        self.polls = 0
+        patcher = mock.patch.object(results, 'is_result_ready', self.is_result_ready)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def is_result_ready(self, interview_id):
+        self.polls += 1
+        return interview_id in self.ready
+
+    async def test_many_concurrent_clients_share_one_watch(self):
+        waiting = [asyncio.create_task(results.wait_for_result(1, 5)) for _ in range(200)]
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(results._watches), 1)
+        polls_before = self.polls
+
+        self.ready.add(1)
+        self.assertEqual(await asyncio.gather(*waiting), [True] * 200)
+        # One poll per interval for all of them, not one per client.
+        self.assertLess(self.polls - polls_before, 20)
+        self.assertEqual(results._watches, {})
+
+    async def test_client_arriving_after_the_last_one_left_gets_a_live_watch(self):
+        self.assertFalse(await results.wait_for_result(2, 0.02))
+        # The abandoned watch is gone as soon as its last client is, not once its task has ended.
+        self.assertNotIn(2, results._watches)
+
+        self.ready.add(2)
+        self.assertTrue(await results.wait_for_result(2, 1))
+
+    async def test_clients_timing_out_do_not_stop_others_waiting(self):
+        short = [asyncio.create_task(results.wait_for_result(3, 0.02)) for _ in range(50)]
+        long = [asyncio.create_task(results.wait_for_result(3, 5)) for _ in range(50)]
+        self.assertEqual(await asyncio.gather(*short), [False] * 50)
+
+        self.ready.add(3)
+        self.assertEqual(await asyncio.gather(*long), [True] * 50)
+
+
+class StartResultTests(TransactionTestCase):
+    triggers = 50
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('candidate', password='secret')
+        self.n8n_called = threading.Event()
+        self.n8n_answer = threading.Event()
+        self.calls = []
+
+    def fake_post(self, endpoint, **kwargs):
+        self.calls.append(endpoint)
+        self.n8n_called.set()
+        self.n8n_answer.wait(5)
+        return json_response(b'{"status": 200}')
+
+    def start(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client.post('/api/start-result/', {'interview_id': 42}, format='json').json()
+
+    def test_concurrent_triggers_start_the_workflow_once(self):
+        responses = []
+        barrier = threading.Barrier(self.triggers)
+
+        def trigger():
+            barrier.wait()
+            responses.append(self.start())
+
+        with mock.patch.object(views.n8n, 'post', self.fake_post):
+            threads = [threading.Thread(target=trigger) for _ in range(self.triggers)]
+            for thread in threads:
+                thread.start()
+            self.assertTrue(self.n8n_called.wait(5))
+            # While the first trigger waits on n8n, the lock turns every other one away.
+            self.assertEqual(self.start(), {"message": "Result analysis is already in progress."})
+            self.n8n_answer.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(self.calls, ['result'])
+        self.assertEqual(sorted(response['message'] for response in responses),
+                         ["Result analysis is already in progress."] * (self.triggers - 1) +
+                         ["Result analysis started successfully."])
+
+    def test_failed_start_releases_the_lock(self):
+        self.n8n_answer.set()
+        with mock.patch.object(views.n8n, 'post', side_effect=requests.exceptions.ConnectionError('n8n is down')):
+            self.assertIn('error', self.start())
+        with mock.patch.object(views.n8n, 'post', self.fake_post):
+            self.assertEqual(self.start(), {"message": "Result analysis started successfully."})
+        self.assertEqual(self.calls, ['result'])
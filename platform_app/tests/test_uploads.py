@@ -0,0 +1,106 @@
+import asyncio
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import JsonResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import path
+from rest_framework.test import APIClient
+
+from platform_app.models import UserProfiles
+from platform_app.uploads import ASGIRequestSizeLimit
+
+
+def plain_upload_view(request):
+    return JsonResponse({"files": len(request.FILES)})
+
+
+urlpatterns = [
+    path('upload/', plain_upload_view),
+]
+
+
+@override_settings(UPLOAD_MAX_FILE_SIZES={'cv': 1024}, UPLOAD_MAX_REQUEST_SIZE=64 * 1024,
+                   UPLOAD_MAX_BATCH_REQUEST_SIZE=128 * 1024)
+class UploadSizeLimitTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user('uploader')
+        UserProfiles.objects.create(user=user)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_oversized_file_is_refused_with_413_by_drf_views(self):
+        response = self.client.post('/api/submit-screener/', {'cv': SimpleUploadedFile('cv.pdf', b'x' * 2048)},
+                                    format='multipart')
+        self.assertEqual(response.status_code, 413)
+        self.assertIn("'cv' exceeds", response.json()['detail'])
+
+    def test_oversized_request_is_refused_before_the_view_runs(self):
+        response = self.client.generic('POST', '/api/submit-screener/', b'', CONTENT_TYPE='multipart/form-data',
+                                       CONTENT_LENGTH=str(256 * 1024))
+        self.assertEqual(response.status_code, 413)
+
+    @override_settings(CORS_ALLOWED_ORIGINS=['https://app.test'])
+    def test_413_is_readable_cross_origin(self):
+        response = self.client.generic('POST', '/api/submit-screener/', b'', CONTENT_TYPE='multipart/form-data',
+                                       CONTENT_LENGTH=str(256 * 1024), HTTP_ORIGIN='https://app.test')
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response['Access-Control-Allow-Origin'], 'https://app.test')
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_plain_django_views_get_413_too(self):
+        response = self.client.post('/upload/', {'cv': SimpleUploadedFile('cv.pdf', b'x' * 2048)})
+        self.assertEqual(response.status_code, 413)
+
+        response = self.client.post('/upload/', {'cv': SimpleUploadedFile('cv.pdf', b'x' * 512)})
+        self.assertEqual(response.json(), {"files": 1})
+
+
+@override_settings(UPLOAD_MAX_BATCH_REQUEST_SIZE=1000)
+class ASGIRequestSizeLimitTests(SimpleTestCase):
+
+    def call(self, headers, chunks):
+        sent, app_calls = [], []
+        messages = [{'type': 'http.request', 'body': chunk, 'more_body': i < len(chunks) - 1}
+                    for i, chunk in enumerate(chunks)]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        async def application(scope, receive, send):
+            # Reads the body the way Django's ASGI handler does.
+            received = []
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    app_calls.append('aborted')
+                    return
+                received.append(message['body'])
+                if not message.get('more_body'):
+                    break
+            app_calls.append(b''.join(received))
+            await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+            await send({'type': 'http.response.body', 'body': b''})
+
+        scope = {'type': 'http', 'headers': headers}
+        asyncio.run(ASGIRequestSizeLimit(application)(scope, receive, send))
+        return sent[0]['status'] if sent else None, app_calls
+
+    def test_declared_oversized_body_is_refused_unread(self):
+        status_code, app_calls = self.call([(b'content-length', b'5000')], [b'x' * 5000])
+        self.assertEqual(status_code, 413)
+        self.assertEqual(app_calls, [])
+
+    def test_body_without_length_is_cut_off_once_over_the_limit(self):
+        status_code, app_calls = self.call([], [b'x' * 600, b'x' * 600, b'x' * 600])
+        self.assertEqual(status_code, 413)
+        self.assertEqual(app_calls, ['aborted'])
+
+    def test_bodies_within_the_limit_pass_through(self):
+        status_code, app_calls = self.call([(b'content-length', b'800')], [b'x' * 400, b'x' * 400])
+        self.assertEqual(status_code, 200)
+        self.assertEqual(app_calls, [b'x' * 800])
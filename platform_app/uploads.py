@@ -0,0 +1,305 @@
+"""
+Upload handling for files that are forwarded to n8n.
+
+`UploadSizeLimitHandler` rejects oversized uploads while they are still being received, and
+`MultipartStream` re-encodes the (disk-spooled) uploads into an outbound multipart body that is
+read in chunks, so a file never has to be held in memory as a whole. `unpack_zip` extracts the
+files of an uploaded archive into spooled temporary files the same way.
+
+Under ASGI, Django reads the whole request body (spooled to disk) before any upload handler runs,
+so there `ASGIRequestSizeLimit` turns away bodies above `UPLOAD_MAX_BATCH_REQUEST_SIZE` while they
+are received; the smaller per-endpoint and per-file limits only apply once the body is in.
+"""
+import mimetypes
+import os
+import shutil
+import tempfile
+import uuid
+import zipfile
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+from django.core.files import File
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http import JsonResponse
+from rest_framework import status
+
+
+class UploadTooLarge(RequestDataTooBig):
+    """
+    Raised while a request body is parsed, so it reaches views of any kind: `UploadSizeLimitMiddleware`
+    answers it with 413, and without the middleware Django still answers 400 instead of 500.
+    """
+
+
+def format_size(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def _too_large_detail(max_size):
+    return f"Request body exceeds {format_size(max_size)}."
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Answers `UploadTooLarge` with 413, and turns away requests that declare a body larger than any
+    endpoint accepts (`UPLOAD_MAX_BATCH_REQUEST_SIZE`) before the view runs.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.refuse(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.refuse(request) or await self.get_response(request)
+
+    @staticmethod
+    def refuse(request):
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > settings.UPLOAD_MAX_BATCH_REQUEST_SIZE:
+            return JsonResponse({"detail": _too_large_detail(settings.UPLOAD_MAX_BATCH_REQUEST_SIZE)},
+                                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        return None
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, UploadTooLarge):
+            return JsonResponse({"detail": str(exception)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        return None
+
+
+class ASGIRequestSizeLimit:
+    """
+    Wraps the ASGI application to refuse request bodies above `UPLOAD_MAX_BATCH_REQUEST_SIZE` with
+    413: up front from their Content-Length, or, for bodies sent without one, as soon as the received
+    chunks add up to more. Django is told the client disconnected, so it stops reading the body.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.application(scope, receive, send)
+
+        max_size = settings.UPLOAD_MAX_BATCH_REQUEST_SIZE
+        content_length = dict(scope['headers']).get(b'content-length', b'')
+        if content_length.isdigit() and int(content_length) > max_size:
+            return await self.reject(send, max_size)
+
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > max_size:
+                    rejected = True
+                    return {'type': 'http.disconnect'}
+            return message
+
+        await self.application(scope, limited_receive, send)
+        if rejected:
+            await self.reject(send, max_size)
+
+    @staticmethod
+    async def reject(send, max_size):
+        body = JsonResponse({"detail": _too_large_detail(max_size)}).content
+        await send({
+            'type': 'http.response.start',
+            'status': status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+class UploadSizeLimitHandler(FileUploadHandler):
+    """
+    First handler in `FILE_UPLOAD_HANDLERS`. It passes chunks through untouched and stops the
+    upload as soon as a limit is exceeded: the whole request up front from its Content-Length,
+    and every file against `UPLOAD_MAX_FILE_SIZES` (by form field) or `UPLOAD_MAX_FILE_SIZE`.
+    """
+
+    def get_max_request_size(self):
+        return settings.UPLOAD_MAX_REQUEST_SIZE
+
+    def get_max_file_size(self, field_name):
+        return settings.UPLOAD_MAX_FILE_SIZES.get(field_name, settings.UPLOAD_MAX_FILE_SIZE)
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        max_request_size = self.get_max_request_size()
+        if content_length > max_request_size:
+            raise UploadTooLarge(_too_large_detail(max_request_size))
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.max_size = self.get_max_file_size(field_name)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            raise UploadTooLarge(f"'{self.field_name}' exceeds the {format_size(self.max_size)} limit.")
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class BatchUploadSizeLimitHandler(UploadSizeLimitHandler):
+    """
+    Takes the place of `UploadSizeLimitHandler` on batch endpoints (see `use_batch_upload_limits`):
+    the request and a zip `archive` may be up to `UPLOAD_MAX_BATCH_REQUEST_SIZE`, other files keep
+    their own limits.
+    """
+
+    def get_max_request_size(self):
+        return settings.UPLOAD_MAX_BATCH_REQUEST_SIZE
+
+    def get_max_file_size(self, field_name):
+        if field_name == 'archive':
+            return settings.UPLOAD_MAX_BATCH_REQUEST_SIZE
+        return super().get_max_file_size(field_name)
+
+
+def use_batch_upload_limits(request):
+    """Switches a request to the batch upload limits. Must be called before its body is parsed."""
+    request = getattr(request, '_request', request)
+    request.upload_handlers = [
+        BatchUploadSizeLimitHandler(request) if isinstance(handler, UploadSizeLimitHandler) else handler
+        for handler in request.upload_handlers
+    ]
+
+
+def unpack_zip(archive, max_files, max_file_size):
+    """
+    Extracts the files of an uploaded zip archive, skipping directories and hidden/metadata
+    entries. Returns `(file_name, file, content_type)` tuples; each file is a spooled temporary
+    file, so large entries go to disk. Sizes are checked against the archive's directory before
+    anything is extracted. Raises `zipfile.BadZipFile` for archives that can't be read.
+    """
+    with zipfile.ZipFile(archive) as zf:
+        infos = [
+            info for info in zf.infolist()
+            if not info.is_dir() and not any(part.startswith(('.', '__MACOSX')) for part in info.filename.split('/'))
+        ]
+        if len(infos) > max_files:
+            raise UploadTooLarge(f"The archive contains more than {max_files} files.")
+        for info in infos:
+            if info.file_size > max_file_size:
+                raise UploadTooLarge(f"'{info.filename}' exceeds the {format_size(max_file_size)} limit.")
+
+        entries = []
+        for info in infos:
+            spooled = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+            with zf.open(info) as member:
+                shutil.copyfileobj(member, spooled, MultipartStream.chunk_size)
+            spooled.seek(0)
+            file_name = os.path.basename(info.filename)
+            entries.append((file_name, File(spooled, name=file_name), mimetypes.guess_type(file_name)[0]))
+    return entries
+
+
+def get_file_size(fileobj):
+    size = getattr(fileobj, 'size', None)
+    if size is not None:
+        return size
+    position = fileobj.tell()
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(position)
+    return size
+
+
+class MultipartStream:
+    """
+    A read-only file-like multipart/form-data body with a known length.
+
+    `fields` maps names to plain values (None is skipped, like requests does). `files` maps names to
+    an uploaded file or a `(file_name, fileobj, content_type)` tuple; a list of those sends several
+    files under the same name. Files are read `chunk_size` bytes at a time while the body is sent.
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(self, fields=None, files=None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+        self._parts = []
+
+        for name, value in (fields or {}).items():
+            if value is None:
+                continue
+            self._parts.append(
+                self._part_header(name) + b'\r\n' + str(value).encode('utf-8') + b'\r\n'
+            )
+
+        for name, value in (files or {}).items():
+            for file_name, fileobj, content_type in self._normalize_files(value):
+                header = self._part_header(name, file_name) + \
+                    f'Content-Type: {content_type or "application/octet-stream"}\r\n\r\n'.encode('utf-8')
+                self._parts.extend([header, fileobj, b'\r\n'])
+
+        self._parts.append(f'--{self.boundary}--\r\n'.encode('ascii'))
+        self.length = sum(map(self._part_length, self._parts))
+        self._chunks = self.iter_chunks()
+        self._buffer = bytearray()
+
+    @staticmethod
+    def _normalize_files(value):
+        for item in value if isinstance(value, list) else [value]:
+            if isinstance(item, tuple):
+                yield item
+            else:
+                yield os.path.basename(item.name), item, getattr(item, 'content_type', None)
+
+    def _part_header(self, name, file_name=None):
+        disposition = f'form-data; name="{self._quote(name)}"'
+        if file_name is not None:
+            disposition += f'; filename="{self._quote(file_name)}"'
+        return f'--{self.boundary}\r\nContent-Disposition: {disposition}\r\n'.encode('utf-8')
+
+    @staticmethod
+    def _quote(value):
+        return str(value).replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+
+    @staticmethod
+    def _part_length(part):
+        return len(part) if isinstance(part, bytes) else get_file_size(part)
+
+    def iter_chunks(self):
+        for part in self._parts:
+            if isinstance(part, bytes):
+                yield part
+                continue
+            part.seek(0)
+            while chunk := part.read(self.chunk_size):
+                yield chunk
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
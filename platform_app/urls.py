@@ -3,7 +3,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from PlatformInterview import settings
-from . import views
+from . import views, async_views
 from platform_app.views import GoogleLogin, CustomAuthToken
 from rest_framework.authtoken.views import obtain_auth_token
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
@@ -16,33 +16,59 @@ def serve_openapi_schema(request):
         data = yaml.safe_load(f)
     return JsonResponse(data)
 
+# Under ASGI the n8n-bound endpoints are served by their native async versions,
+# and clients can wait for results over server-sent events.
+asgi_urlpatterns = []
+if settings.SERVER_MODE == 'asgi':
+    submit_screener_view = async_views.submit_screener_api
+    start_result_view = async_views.start_result_api
+    camera_analysis_view = async_views.camera_analysis_api
+    cv_screening_view = async_views.cv_screening_api
+    asgi_urlpatterns = [
+        path('result-events/<int:interview_id>', async_views.result_events_api, name='result-events-api'),
+    ]
+else:
+    submit_screener_view = views.submit_screener_api
+    start_result_view = views.start_result_api
+    camera_analysis_view = views.camera_analysis_api
+    cv_screening_view = views.CVScreeningAPIView.as_view()
+
 urlpatterns = [
     path ('admin/', include('admin_app.urls')),
     path('auth/google/', GoogleLogin.as_view(), name='google_login'),
     path('register/', views.register_api, name='register-api'),
     path('login/', CustomAuthToken.as_view(), name='login-api'),
-    path('submit-screener/', views.submit_screener_api, name='submit-screener-api'),
+    path('submit-screener/', submit_screener_view, name='submit-screener-api'),
     path('dashboard-data/', views.dashboard_data_api, name='dashboard-data-api'),
     path('user-profile/', views.user_profile_api, name='user-profile-api'),
     path('update-profile/', views.update_profile_api, name='update-profile-api'),
     path('interviews/', views.interviews_api, name='interviews-api'),
+    path('v2/interviews/', views.InterviewHistoryListView.as_view(), name='interview-history-api'),
+    path('v2/interviews/<int:pk>', views.InterviewHistoryDetailView.as_view(), name='interview-history-detail-api'),
     path('get-schedules/', views.get_schedules_api, name='get-schedules-api'),
     path('get-available-schedules/', views.get_available_schedules_api, name='get-available-schedules-api'),
-    path('camera-analysis/', views.camera_analysis_api, name='camera-analysis-api'),
-    path('start-result/', views.start_result_api, name='start-result-api'),
+    path('get-available-calendar/', views.get_available_calendar_api, name='get-available-calendar-api'),
+    path('camera-analysis/', camera_analysis_view, name='camera-analysis-api'),
+    path('start-result/', start_result_view, name='start-result-api'),
     path('get-result/<int:interview_id>', views.get_result_api, name='get-result-api'),
+    path('result-document/<int:interview_id>', views.result_document_api, name='result-document-api'),
+    path('result-status/<int:interview_id>', views.result_status_api, name='result-status-api'),
+    path('webhooks/n8n/result/', views.result_webhook_api, name='n8n-result-webhook'),
     path('get-average-result/', views.get_average_score_api, name='get-average-result-api'),
     path('analyze-video/', views.analyze_video_api, name='analyze-video-api'),
     ##SCHEMA
     path('schema/', SpectacularAPIView.as_view(), name='schema'),
     path('profile/', views.UserProfileAPIView.as_view(), name='profile-api'),
 
-    path('cv-screening/', views.CVScreeningAPIView.as_view(), name='cv-screening-api'),
+    path('cv-screening/', cv_screening_view, name='cv-screening-api'),
     path('cv-screening/report/', views.CVScreeningReportListView.as_view(), name='cv-screening-report-api'),
     path('cv-screening/report/<int:pk>', views.CVScreeningReportDetailView.as_view(), name='cv-screening-report-detail-api'),
+    path('cv-screening/batch/', views.CVScreeningBatchAPIView.as_view(), name='cv-screening-batch-api'),
+    path('cv-screening/jobs/', views.CVScreeningJobAPIView.as_view(), name='cv-screening-job-api'),
+    path('cv-screening/jobs/<int:pk>', views.CVScreeningJobDetailView.as_view(), name='cv-screening-job-detail-api'),
 
     # Optional UI:
     path('schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
 
-]
+] + asgi_urlpatterns
@@ -1,14 +1,23 @@
+import gzip
+import json
+import logging
 import os
 import random
+import re
+import zipfile
 
 import requests
-from datetime import datetime
-from django.db.models import Count, F, Q, Avg
-from django.http import Http404
+from datetime import datetime, timedelta
+from django.db import transaction
+from django.db.models import Avg, Prefetch
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from google.genai import types
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.decorators import api_view, permission_classes, parser_classes, authentication_classes
 from rest_framework.response import Response
 from rest_framework import status, serializers, generics
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -20,15 +29,33 @@ from drf_spectacular.utils import extend_schema, OpenApiResponse, inline_seriali
 from rest_framework.views import APIView
 from .schemas import GoogleLoginSchema, RegisterSchema, SubmitScreenerSchema, UserProfileSchema, UpdateProfileSchema, \
     InterviewsSchema, GetAvailableScheduleSchema, CameraAnalysisSchema, StartResultSchema, GetResultSchema, \
-    GetAverageScoreSchema, DashboardDataSchema, GetSchedulesSchema, AnalyzeVideoSchema, CVScreeningSchema
+    GetAverageScoreSchema, DashboardDataSchema, GetSchedulesSchema, AnalyzeVideoSchema, CVScreeningSchema, \
+    CVScreeningJobSchema, ResultStatusSchema, ResultWebhookSchema, CVScreeningBatchSchema, ResultDocumentSchema, \
+    GetAvailableCalendarSchema
 from .serializers import RegisterSerializer, InterviewSerializer, ScheduleSerializer, UserProfileSerializer, \
-    AvailableScheduleSerializer, ResultSerializer, QuestionSerializer, AnswerSerializer, UserProfilesSerializer, \
-    CVScreeningReportSerializer, CustomTokenSerializer
-from .models import Interviews, Schedules, UserProfiles, Results, Questions, Answers, CVScreeningReport
+    ResultSerializer, UserProfilesSerializer, \
+    CVScreeningReportSerializer, CustomTokenSerializer, CVScreeningJobSerializer, ResultWebhookSerializer, \
+    ResultDocumentSerializer, InterviewListSerializer
+from .models import Interviews, Schedules, UserProfiles, Results, Questions, Answers, CVScreeningReport, \
+    CVScreeningJob
+from .async_views import iterate_in_thread
+from .availability import (confirm_reservation, get_availability, get_availability_calendar, hold_slot,
+                           release_reservation)
+from .cv_screening import screen_cv, screen_cv_batch, hash_cv, get_cached_report, clone_report
+from .idempotency import idempotent
+from .pagination import InterviewHistoryPagination
+from .permissions import HasN8NWebhookSecret
+from .results import is_result_ready, mark_result_ready, claim_result_generation, release_result_generation, \
+    load_result, get_interview_owner, invalidate_result_snapshot
+from .screener import build_screener_payload, format_screener_response
+from .uploads import unpack_zip, use_batch_upload_limits
+from . import camera, n8n
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 @extend_schema(**GoogleLoginSchema)
 class GoogleLogin(SocialLoginView):
@@ -85,6 +112,7 @@ def register_api(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser])
+@idempotent
 def submit_screener_api(request):
     user = request.user
 
@@ -93,78 +121,46 @@ def submit_screener_api(request):
     except UserProfiles.DoesNotExist:
         return Response({"error": "User profile not found."}, status=status.HTTP_404_NOT_FOUND)
 
-    schedule_id = request.data.get('schedule_id')
-    date = request.data.get('date')
-    posisi = request.data.get('posisi')
-    industri = request.data.get('industri')
-    nama_perusahaan = request.data.get('nama_perusahaan')
-    tingkatan = request.data.get('tingkatan')
-    jenis_wawancara = request.data.get('jenis_wawancara')
-    detail_pekerjaan = request.data.get('detail_pekerjaan')
-    package = request.data.get('package')
-
-    n8n_data_payload = {
-        'user_profile_id': user_profile.id,
-        'schedule_id': schedule_id,
-        'date': date,
-        'posisi': posisi,
-        'industri': industri,
-        'nama_perusahaan': nama_perusahaan,
-        'tingkatan': tingkatan,
-        'jenis_wawancara': jenis_wawancara,
-        'detail_pekerjaan': detail_pekerjaan,
-        'package': package,
-    }
-
-    if any(value is None or value == '' for key, value in n8n_data_payload.items()
-           if key != 'nama_perusahaan'):
+    n8n_data_payload = build_screener_payload(request.data, user_profile)
+    if n8n_data_payload is None:
         return Response({"error": "Invalid data: Some required fields are missing or empty."},
                         status=status.HTTP_400_BAD_REQUEST)
 
     uploaded_file = request.FILES.get('cv')
-    files_payload = {
-        'cv': (uploaded_file.name, uploaded_file.read(), uploaded_file.content_type)
-    }
-
     if not uploaded_file:
         return Response({"error": "CV file is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    print(f"Sending data to n8n: {n8n_data_payload}")
+    try:
+        reservation = hold_slot(user_profile, n8n_data_payload['schedule_id'], n8n_data_payload['date'])
+    except ValueError:
+        return Response({"error": "Invalid schedule or date."}, status=status.HTTP_400_BAD_REQUEST)
+    if reservation is None:
+        return Response({"error": "This schedule is fully booked."}, status=status.HTTP_409_CONFLICT)
 
-    N8N_SCREENER_URL = os.getenv("N8N_SCREENER_URL")
-    n8n_response = requests.post(
-        N8N_SCREENER_URL,
-        data=n8n_data_payload,
-        files=files_payload
-    )
+    logger.debug("Sending data to n8n: %s", n8n_data_payload)
 
-    n8n_response.raise_for_status()
-    n8n_data = n8n_response.json()
-
-    print(f"n8n response data: {n8n_data}")
-
-    response_status = n8n_data['status']
-    message = n8n_data['message']
-    date = n8n_data.get('date')
-    start_time = n8n_data.get('start_time')
-    end_time = n8n_data.get('end_time')
-    posisi = n8n_data.get('posisi')
-    jenis_wawancara = n8n_data.get('jenis_wawancara')
-    booking_code = n8n_data.get('booking_code')
-
-    if not booking_code:
-        return Response({"error": "Booking code not found."}, status=status.HTTP_400_BAD_REQUEST)
-
-    response = {
-        "status": response_status,
-        "message": message,
-        "date": date,
-        "start_time": start_time[:8],
-        "end_time": end_time[:8],
-        "posisi": posisi,
-        "jenis_wawancara": jenis_wawancara,
-        "booking_code": booking_code
-    }
+    # The seat is held until n8n answers: a booking code confirms it, anything else gives it back.
+    booked = False
+    try:
+        try:
+            n8n_response = n8n.post_multipart('screener', fields=n8n_data_payload, files={'cv': uploaded_file})
+            n8n_response.raise_for_status()
+            n8n_data = n8n_response.json()
+        except requests.exceptions.RequestException as e:
+            return Response({"error": f"Failed to connect to screener service: {e}"},
+                            status=status.HTTP_502_BAD_GATEWAY)
+
+        logger.debug("n8n response data: %s", n8n_data)
+
+        response = format_screener_response(n8n_data)
+        if response is None:
+            return Response({"error": "Booking code not found."}, status=status.HTTP_400_BAD_REQUEST)
+        booked = True
+    finally:
+        if booked:
+            confirm_reservation(reservation)
+        else:
+            release_reservation(reservation)
 
     return Response(response, status=status.HTTP_200_OK)
 
@@ -202,14 +198,7 @@ def get_available_schedules_api(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     try:
-        available_schedules = Schedules.objects.annotate(
-            booked_sessions=Count('interviews', filter=Q(interviews__date=target_date))
-        ).annotate(
-            remaining_capacity=3 - F('booked_sessions')
-        ).order_by('start_time')
-
-        serializer = AvailableScheduleSerializer(available_schedules, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(get_availability(target_date), status=status.HTTP_200_OK)
 
     except Exception as e:
         return Response(
@@ -218,25 +207,60 @@ def get_available_schedules_api(request):
         )
 
 
+@extend_schema(**GetAvailableCalendarSchema)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_available_calendar_api(request):
+    try:
+        start_date = datetime.strptime(request.query_params.get('start_date', ''), '%Y-%m-%d').date()
+        end_date_str = request.query_params.get('end_date')
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str \
+            else start_date + timedelta(days=29)
+    except ValueError:
+        return Response(
+            {"error": "The 'start_date' query parameter is required and dates must be YYYY-MM-DD."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not 0 <= (end_date - start_date).days < settings.AVAILABILITY_CALENDAR_MAX_DAYS:
+        return Response(
+            {"error": f"'end_date' must be on or after 'start_date' and at most "
+                      f"{settings.AVAILABILITY_CALENDAR_MAX_DAYS} days apart."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response(get_availability_calendar(start_date, end_date), status=status.HTTP_200_OK)
+
+
 @extend_schema(**StartResultSchema)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def start_result_api(request):
     interview_id = request.data.get('interview_id')
-    if not interview_id:
+    if not str(interview_id or '').isdigit():
         return Response({"error": "Interview ID is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    N8N_RESULT_URL = os.getenv("N8N_RESULT_URL")
+    # Repeated triggers (retries, several tabs) must not start the expensive workflow again.
+    if is_result_ready(interview_id):
+        return Response({"message": "Result is already available."}, status=status.HTTP_200_OK)
+    if not claim_result_generation(interview_id):
+        return Response({"message": "Result analysis is already in progress."}, status=status.HTTP_200_OK)
+
+    started = False
     try:
-        n8n_response = requests.post(N8N_RESULT_URL, json={"interview_id": interview_id})
-        n8n_response.raise_for_status()
-        n8n_data = n8n_response.json()
-        print(f"n8n response data: {n8n_data}")
-    except requests.exceptions.RequestException as e:
-        return Response({"error": f"Failed to connect to result service: {e}"}, status=status.HTTP_502_BAD_GATEWAY)
+        try:
+            n8n_response = n8n.post('result', json={"interview_id": interview_id})
+            n8n_response.raise_for_status()
+            n8n_data = n8n_response.json()
+            logger.debug("n8n response data: %s", n8n_data)
+        except requests.exceptions.RequestException as e:
+            return Response({"error": f"Failed to connect to result service: {e}"}, status=status.HTTP_502_BAD_GATEWAY)
 
-    if n8n_data.get('status') != 200:
-        return Response({"error": "Failed to start result analysis."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if n8n_data.get('status') != 200:
+            return Response({"error": "Failed to start result analysis."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        started = True
+    finally:
+        if not started:
+            release_result_generation(interview_id)
 
     return Response({
         "message": "Result analysis started successfully."
@@ -249,36 +273,86 @@ def start_result_api(request):
 def get_result_api(request, interview_id):
     if not interview_id:
         return Response({"error": "Interview ID is required."}, status=status.HTTP_400_BAD_REQUEST)
+    # Checked before the snapshot is looked up, so cached results are only served to their owner too.
+    if get_interview_owner(interview_id) != request.user.pk:
+        return Response({"error": "Interview not found."}, status=status.HTTP_404_NOT_FOUND)
 
     try:
-        interview = Interviews.objects.get(id=interview_id)
-        interview_serializer = InterviewSerializer(interview)
+        snapshot, data = load_result(interview_id)
+    except Interviews.DoesNotExist:
+        return Response({"error": "Interview not found."}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        questions = Questions.objects.filter(interview_id=interview_id)
-        question_ids = questions.values_list('id', flat=True)
-        answers = Answers.objects.filter(question_id__in=question_ids)
+    if snapshot is None:
+        return Response(data, status=status.HTTP_200_OK)
 
-        question_serializer = QuestionSerializer(questions, many=True)
-        answer_serializer = AnswerSerializer(answers, many=True)
+    # The snapshot is served as stored; each encoding gets its own strong ETag and either one
+    # revalidates, as both stand for the same result.
+    accepts_gzip = re.search(r'\bgzip\b', request.headers.get('Accept-Encoding', '')) is not None
+    etags = {f'"{snapshot["digest"]}"', f'"{snapshot["digest"]}-gzip"', '*'}
+    if etags.intersection(parse_etags(request.headers.get('If-None-Match', ''))):
+        response = HttpResponseNotModified()
+    elif accepts_gzip:
+        response = HttpResponse(snapshot['body'], content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(snapshot['body']), content_type='application/json')
+    response['ETag'] = f'"{snapshot["digest"]}-gzip"' if accepts_gzip else f'"{snapshot["digest"]}"'
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+@extend_schema(**ResultDocumentSchema)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def result_document_api(request, interview_id):
+    # Three queries in all: the interview joined with its result, its questions and their answers.
+    interview = Interviews.objects.select_related('results').prefetch_related(
+        Prefetch('questions_set', queryset=Questions.objects.order_by('created_at', 'id')),
+        Prefetch('questions_set__answers_set', queryset=Answers.objects.order_by('submitted_at', 'id')),
+    ).filter(pk=interview_id, user_profile__user=request.user).first()
+    if interview is None:
+        return Response({"error": "Interview not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        result_data = None
-        try:
-            result = Results.objects.get(interview_id=interview_id)
-            result_data = ResultSerializer(result).data
-        except Results.DoesNotExist:
-            pass
-        data = {
-            "interview": interview_serializer.data,
-            "result": result_data,
-            "questions": question_serializer.data,
-            "answers": answer_serializer.data,
-        }
+    return Response(ResultDocumentSerializer(interview).data, status=status.HTTP_200_OK)
 
-        return Response(data, status=status.HTTP_200_OK)
-    except Interviews.DoesNotExist:
+
+@extend_schema(**ResultStatusSchema)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def result_status_api(request, interview_id):
+    if get_interview_owner(interview_id) != request.user.pk:
         return Response({"error": "Interview not found."}, status=status.HTTP_404_NOT_FOUND)
-    except Exception as e:
-        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return Response({
+        "interview_id": interview_id,
+        "ready": is_result_ready(interview_id),
+    }, status=status.HTTP_200_OK)
+
+
+@extend_schema(**ResultWebhookSchema)
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([HasN8NWebhookSecret])
+def result_webhook_api(request):
+    serializer = ResultWebhookSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    result_data = dict(serializer.validated_data)
+    interview_id = result_data.pop('interview_id')
+    with transaction.atomic():
+        result, created = Results.objects.update_or_create(interview_id=interview_id, defaults=result_data)
+        Interviews.objects.filter(id=interview_id).update(status=Interviews.StatusField.COMPLETED)
+        # n8n reports the interview complete, and may have written its questions and answers directly
+        # meanwhile; the snapshot is dropped and rebuilt from what is committed now.
+        transaction.on_commit(lambda: invalidate_result_snapshot(interview_id))
+        transaction.on_commit(lambda: mark_result_ready(interview_id))
+        transaction.on_commit(lambda: load_result(interview_id), robust=True)
+
+    return Response(ResultSerializer(result).data,
+                    status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
 
 @permission_classes([IsAuthenticated])
@@ -378,24 +452,15 @@ class UserProfileAPIView(APIView):
 @permission_classes([IsAuthenticated])
 class CVScreeningAPIView(APIView):
 
+    @idempotent
     def post(self, request):
         cv_file = request.FILES.get('cv')
         if not cv_file:
             return Response({"error": "No CV file provided."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # --- Call n8n Synchronously using requests ---
-        n8n_webhook_url = os.getenv('N8N_CV_SCREENER_URL')
-        files = {'cv': (cv_file.name, cv_file.read(), cv_file.content_type)}
-
-        current_time = datetime.now().strftime('%Y%m%d%H%M%S')
-        random_suffix = str(random.randint(100, 999))
-        unique_id = f"CVR-{current_time}-{random_suffix}"
-
+        # --- Call n8n Synchronously, unless an identical CV was screened recently ---
         try:
-            response = requests.post(n8n_webhook_url, json={"id": unique_id}, files=files,
-                                     timeout=90)  # 60-second timeout
-            response.raise_for_status()  # Raises an exception for 4xx/5xx errors
-            n8n_data = response.json()
+            report, errors = screen_cv(request.user, cv_file, cv_file.name, cv_file.content_type)
 
         except requests.exceptions.HTTPError as e:
             return Response({"error": "Failed to get analysis from AI service.", "details": str(e)},
@@ -404,20 +469,96 @@ class CVScreeningAPIView(APIView):
             return Response({"error": "Network error while contacting AI service.", "details": str(e)},
                             status=status.HTTP_504_GATEWAY_TIMEOUT)
 
-        serializer = CVScreeningReportSerializer(data=n8n_data)
-        if serializer.is_valid():
-            # Generate the unique ID string
-            current_time = datetime.now().strftime('%Y%m%d%H%M%S')
-            random_suffix = str(random.randint(100, 999))
-            unique_id = f"{current_time}{random_suffix}"
-
-            # Save the validated data, passing in the user and the custom id
-            serializer.save(user=request.user, id=unique_id)
-
+        if report is not None:
             # We return the serializer's data, which now includes the new ID
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return Response(CVScreeningReportSerializer(report).data, status=status.HTTP_201_CREATED)
         else:
-            return Response(serializer.errors, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response(errors, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@extend_schema(**CVScreeningJobSchema)
+@permission_classes([IsAuthenticated])
+class CVScreeningJobAPIView(APIView):
+    parser_classes = [MultiPartParser, FormParser]
+
+    @idempotent
+    def post(self, request):
+        cv_file = request.FILES.get('cv')
+        if not cv_file:
+            return Response({"error": "No CV file provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # An identical CV that was screened recently completes the job right away.
+        cached_report = get_cached_report(hash_cv(cv_file), count_miss=False)
+        if cached_report is not None:
+            job = CVScreeningJob.objects.create(
+                user=request.user,
+                file_name=cv_file.name,
+                content_type=cv_file.content_type,
+                status=CVScreeningJob.Status.COMPLETED,
+                report=clone_report(cached_report, request.user),
+            )
+            return Response(CVScreeningJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+        # The upload is stored and picked up by `manage.py process_cv_screening_jobs`,
+        # so this worker is free again as soon as the file is on disk.
+        job = CVScreeningJob.objects.create(
+            user=request.user,
+            cv=cv_file,
+            file_name=cv_file.name,
+            content_type=cv_file.content_type,
+        )
+        return Response(CVScreeningJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+@extend_schema(**CVScreeningBatchSchema)
+@permission_classes([IsAuthenticated])
+class CVScreeningBatchAPIView(APIView):
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        use_batch_upload_limits(request)
+        cv_files = [(cv_file.name, cv_file, cv_file.content_type) for cv_file in request.FILES.getlist('cvs')]
+
+        archive = request.FILES.get('archive')
+        if archive:
+            try:
+                cv_files += unpack_zip(archive, settings.CV_SCREENING_BATCH_MAX_FILES, settings.UPLOAD_MAX_CV_SIZE)
+            except zipfile.BadZipFile:
+                return Response({"error": "The archive is not a valid zip file."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not cv_files:
+            return Response({"error": "No CV files provided."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(cv_files) > settings.CV_SCREENING_BATCH_MAX_FILES:
+            return Response({"error": f"A batch can contain at most {settings.CV_SCREENING_BATCH_MAX_FILES} CVs."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        def progress():
+            totals = {"completed": 0, "failed": 0}
+            for event in screen_cv_batch(request.user, cv_files):
+                totals[event["status"]] += 1
+                yield json.dumps(event) + '\n'
+            yield json.dumps({"status": "done", "total": len(cv_files), **totals}) + '\n'
+
+        # Progress is streamed so the client sees every CV as soon as it is screened.
+        stream = progress()
+        if settings.SERVER_MODE == 'asgi':
+            stream = iterate_in_thread(stream)
+        response = StreamingHttpResponse(stream, content_type='application/x-ndjson')
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+@extend_schema(
+    tags=["User: CV Screening"],
+    summary="Retrieve a CV Screening Job",
+    description="Polls the status of a queued CV screening. The `report` field is filled in once the job is completed."
+)
+@permission_classes([IsAuthenticated])
+class CVScreeningJobDetailView(generics.RetrieveAPIView):
+    serializer_class = CVScreeningJobSerializer
+
+    def get_queryset(self):
+        return CVScreeningJob.objects.filter(user=self.request.user).select_related('report')
 
 
 @extend_schema(
@@ -430,6 +571,8 @@ class CVScreeningReportListView(generics.ListAPIView):
     serializer_class = CVScreeningReportSerializer
 
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return CVScreeningReport.objects.none()
         return CVScreeningReport.objects.filter(user=self.request.user).order_by('-created_at')
 
 
@@ -446,6 +589,40 @@ class CVScreeningReportDetailView(generics.RetrieveAPIView):
         return CVScreeningReport.objects.filter(user=self.request.user)
 
 
+@extend_schema(
+    tags=["User: Interview Management"],
+    summary="List Interview History",
+    description="Lists the authenticated user's interviews by interview date, latest first (latest booking first "
+                "within a date, interviews without a date last), with cursor pagination. Entries leave out the "
+                "long free-text fields; fetch a single interview for those."
+)
+@permission_classes([IsAuthenticated])
+class InterviewHistoryListView(generics.ListAPIView):
+    serializer_class = InterviewListSerializer
+    pagination_class = InterviewHistoryPagination
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Interviews.objects.none()
+        return Interviews.objects.filter(user_profile__user=self.request.user).select_related('results').only(
+            'id', 'date', 'schedule', 'booking_code', 'package', 'status', 'tingkatan', 'jenis_wawancara',
+            'posisi', 'industri', 'nama_perusahaan', 'skor_keseluruhan', 'results__final_score',
+        )
+
+
+@extend_schema(
+    tags=["User: Interview Management"],
+    summary="Retrieve an Interview",
+    description="Fetches one of the authenticated user's interviews with all of its fields."
+)
+@permission_classes([IsAuthenticated])
+class InterviewHistoryDetailView(generics.RetrieveAPIView):
+    serializer_class = InterviewSerializer
+
+    def get_queryset(self):
+        return Interviews.objects.filter(user_profile__user=self.request.user).select_related('results')
+
+
 """
 ========================================================================================================
                                          DEPRECATED ZONE
@@ -504,27 +681,31 @@ def get_schedules_api(request, date=None):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def camera_analysis_api(request):
-    if 'image' not in request.FILES:
+    images = request.FILES.getlist('image') + request.FILES.getlist('images')
+    if not images:
         return Response({"error": "No image file provided."}, status=status.HTTP_400_BAD_REQUEST)
 
-    image_file = request.FILES['image']
-    files_payload = {
-        'image': (image_file.name, image_file.read(), image_file.content_type)
-    }
     interview_id = request.data.get('interview_id')
+    if not str(interview_id or '').isdigit():
+        return Response({"error": "Interview ID is required."}, status=status.HTTP_400_BAD_REQUEST)
+    if not Interviews.objects.filter(pk=interview_id, user_profile__user=request.user).exists():
+        return Response({"error": "Interview not found."}, status=status.HTTP_404_NOT_FOUND)
 
-    N8N_CAMERA_ANALYSIS_URL = os.getenv("N8N_CAMERA_ANALYSIS_URL")
-    try:
-        n8n_response = requests.post(N8N_CAMERA_ANALYSIS_URL, data={"interview_id": interview_id}, files=files_payload)
-        n8n_response.raise_for_status()
-        n8n_data = n8n_response.json()
-        print(f"n8n response data: {n8n_data}")
-    except requests.exceptions.RequestException as e:
-        return Response({"error": f"Failed to connect to analysis service: {e}"}, status=status.HTTP_502_BAD_GATEWAY)
+    if not camera.batching_enabled():
+        try:
+            for image in images:
+                camera.send_camera_frame(interview_id, image)
+        except requests.exceptions.RequestException as e:
+            return Response({"error": f"Failed to connect to analysis service: {e}"},
+                            status=status.HTTP_502_BAD_GATEWAY)
+        return Response({"message": "Image uploaded for analysis."}, status=status.HTTP_200_OK)
+
+    # Frames are analysed in batches per interview, see platform_app/camera.py
+    camera.frame_buffer.add(int(interview_id), images)
 
     return Response({
-        "message": "Image uploaded for analysis."
-    }, status=status.HTTP_200_OK)
+        "message": "Images uploaded for analysis."
+    }, status=status.HTTP_202_ACCEPTED)
 
 
 @extend_schema(**AnalyzeVideoSchema, deprecated=True, tags=["DEPRECATED"])